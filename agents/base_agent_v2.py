@@ -31,6 +31,14 @@ except ImportError:
 
 logger = get_logger(__name__)
 
+# Cancelamento cooperativo (AgentWakeManager cancela execuções que passaram do timeout)
+try:
+    from utils.cancellation import AgentCancelledError, raise_if_cancelled
+except ImportError:
+    class AgentCancelledError(Exception):
+        pass
+    def raise_if_cancelled(): pass
+
 @dataclass
 class PerformanceMetrics:
     """Métricas de performance detalhadas"""
@@ -511,7 +519,21 @@ class BaseAgentV2(ABC):
             logger.error(f"Erro ao inicializar LLM para {self.name}: {e}")
             self.llm = None
             self.llm_available = False
-    
+
+    def aquecer(self):
+        """
+        Prepara os recursos usados na primeira requisição (chamado pelo pré-aquecimento)
+
+        Refaz a inicialização do LLM se ela falhou na construção e cria o
+        cliente de rede que o SDK do provider só abriria na primeira chamada.
+        Idempotente: chamadas repetidas não refazem nada.
+        """
+        with self.execution_lock:
+            if not self.llm_available:
+                self._inicializar_llm()
+            if self.llm is not None and hasattr(self.llm, 'aquecer'):
+                self.llm.aquecer()
+
     def _cache_key(self, input_text: str, context: Optional[Dict] = None) -> str:
         """Gera chave de cache"""
         cache_input = f"{input_text}_{json.dumps(context or {}, sort_keys=True)}"
@@ -546,8 +568,12 @@ class BaseAgentV2(ABC):
         backoff_base = self.config.get("retry_backoff_base", 2.0)
         
         for attempt in range(max_attempts):
+            # Execução abandonada pelo chamador não gasta mais tentativas (nem tokens)
+            raise_if_cancelled()
             try:
                 return func(*args, **kwargs)
+            except AgentCancelledError:
+                raise
             except Exception as e:
                 if attempt < max_attempts - 1:
                     wait_time = backoff_base ** attempt
@@ -606,6 +632,10 @@ class BaseAgentV2(ABC):
                     
                     return resultado
                 
+                except AgentCancelledError:
+                    logger.info(f"🛑 {self.name}: execução cancelada pelo chamador")
+                    raise
+                
                 except Exception as e:
                     self.circuit_breaker.record_failure()
                     logger.error(f"Erro no processamento de {self.name}: {e}")
@@ -8,16 +8,17 @@ import json
 import time
 import re
 import threading
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple, Any, Union
+from typing import Dict, List, Optional, Tuple, Any, Union, Callable
 from dataclasses import dataclass, field
 from enum import Enum
 
-from agents.base_agent_v2 import BaseAgentV2
+from agents.base_agent_v2 import BaseAgentV2, AgentCancelledError
 
 # Importar cache manager
 try:
-    from utils.cache_manager import get_cache_manager
+    from utils.cache_manager import get_cache_manager, build_namespace, DEFAULT_NAMESPACE
     cache_manager = get_cache_manager()
 except ImportError:
     cache_manager = None
@@ -54,6 +55,10 @@ except ImportError:
 
 logger = get_logger(__name__)
 
+# Versão dos prompts do Maestro no namespace do cache: incrementar ao mudar
+# prompts/síntese para não servir respostas geradas com os antigos
+CACHE_PROMPT_VERSION = "5.0"
+
 class TipoComando(Enum):
     """Tipos de comando que Carlos pode interpretar"""
     ANALISE_PRODUTO = "analise_produto"
@@ -101,6 +106,22 @@ class ItemAgenda:
     status: StatusExecucao = StatusExecucao.PENDENTE
     observacoes: str = ""
 
+@dataclass
+class RegraSuficiencia:
+    """Quando a execução paralela pode responder sem esperar todos os agentes"""
+    agentes_suficientes: List[str] = field(default_factory=lambda: ["oraculo"])  # Um destes basta sozinho
+    quorum: Optional[int] = None  # Os primeiros N resultados bastam (None = esperar todos)
+    anexar_tardios: bool = False  # Retardatários terminam em segundo plano em vez de cancelados
+    
+    def satisfeita(self, resultados: Dict[str, str], pendentes: List[str]) -> bool:
+        """True quando os resultados já bastam para sintetizar a resposta"""
+        if any(agente in resultados for agente in self.agentes_suficientes):
+            return True
+        # Um agente suficiente ainda rodando vale a espera: a síntese daria prioridade a ele
+        if any(agente in pendentes for agente in self.agentes_suficientes):
+            return False
+        return self.quorum is not None and len(resultados) >= self.quorum
+
 class CarlosMaestroV5(BaseAgentV2):
     """
     🧠 CARLOS v5.0 - MAESTRO SUPREMO COM ROBUSTEZ TOTAL
@@ -184,6 +205,18 @@ class CarlosMaestroV5(BaseAgentV2):
         self.promptcrafter = None
         self.modo_proativo = modo_proativo
         
+        # === EXECUÇÃO PARALELA ESPECULATIVA ===
+        self.modo_especulativo = kwargs.get('modo_especulativo', True)
+        self.regra_suficiencia = kwargs.get('regra_suficiencia') or RegraSuficiencia()
+        self.resultados_tardios = deque(maxlen=50)
+        self.stats_especulativo = {
+            "execucoes": 0,
+            "encerradas_cedo": 0,
+            "retardatarios_cancelados": 0,
+            "resultados_tardios": 0
+        }
+        self._lock_especulativo = threading.Lock()
+        
         # === AGENDA INTERNA ESTRATÉGICA ===
         self.agenda_interna: List[ItemAgenda] = []
         self.contador_agenda = 0
@@ -528,7 +561,14 @@ class CarlosMaestroV5(BaseAgentV2):
             if self.promptcrafter_ativo and hasattr(self, 'promptcrafter'):
                 wake_manager.register_agent("promptcrafter", self.promptcrafter)
                 agentes_registrados.append("promptcrafter")
-            
+
+            # ScoutAI só é usado pelo plano de produtos: construído quando acordado ou pré-aquecido
+            def criar_scout():
+                from agents.scout_ai import criar_scout_ai
+                return criar_scout_ai()
+            wake_manager.register_agent_factory("scout", criar_scout)
+            agentes_registrados.append("scout (sob demanda)")
+
             logger.info(f"🤖 Agentes registrados no WakeManager: {', '.join(agentes_registrados)}")
             
         except Exception as e:
@@ -557,7 +597,11 @@ class CarlosMaestroV5(BaseAgentV2):
         # === VERIFICAÇÃO DE CACHE ===
         if cache_manager:
             # Tentar buscar no cache primeiro
-            resposta_cache, tokens_economizados = cache_manager.get(mensagem)
+            # Respostas gravadas antes do namespace por agente/modelo migram no primeiro hit
+            resposta_cache, tokens_economizados = cache_manager.get(
+                mensagem, namespace=self._namespace_cache(contexto),
+                fallback_namespace=DEFAULT_NAMESPACE
+            )
             
             if resposta_cache:
                 # Hit no cache! Retornar resposta e registrar economia
@@ -730,7 +774,8 @@ class CarlosMaestroV5(BaseAgentV2):
                 tokens_estimados = max(10, len(mensagem) // 4 + len(resultado) // 4)
                 
                 # Salvar no cache
-                cache_manager.put(mensagem, resultado, tokens_estimados)
+                cache_manager.put(mensagem, resultado, tokens_estimados,
+                                  namespace=self._namespace_cache(contexto))
                 logger.info(f"💾 Resposta salva no cache ({tokens_estimados} tokens)")
             
             return resultado
@@ -1078,6 +1123,23 @@ class CarlosMaestroV5(BaseAgentV2):
             self.stats["total_comandos_interpretados"]
         )
     
+    def _namespace_cache(self, contexto: Optional[Dict] = None) -> str:
+        """
+        Namespace do cache: respostas isoladas por provider/modelo do LLM,
+        versão dos prompts do Maestro e tier do usuário (contexto["user_tier"],
+        enviado pelo orquestrador). Trocar CACHE_PROMPT_VERSION isola as
+        respostas geradas com os prompts anteriores.
+        """
+        user_tier = (contexto or {}).get("user_tier")
+        try:
+            import config
+            return build_namespace(agent="carlos", provider=config.LLM_PROVIDER,
+                                   model=config.DEFAULT_MODEL,
+                                   prompt_version=CACHE_PROMPT_VERSION, user_tier=user_tier)
+        except Exception:
+            return build_namespace(agent="carlos", prompt_version=CACHE_PROMPT_VERSION,
+                                   user_tier=user_tier)
+    
     # === MÉTODOS AUXILIARES ===
     
     def _integrar_resultados_agentes(self, mensagem: str, resultados: List[str]) -> str:
@@ -1721,38 +1783,113 @@ Crie uma resposta completamente nova que seja excelente:"""
         # Se chegou aqui, não é tão simples
         return self._resposta_direta_maestro(mensagem)
     
-    def _executar_paralelo_real(self, mensagem: str, agentes: List[str]) -> str:
-        """Execução VERDADEIRAMENTE paralela com threads"""
+    async def executar_paralelo_stream(self, mensagem: str, agentes: List[str],
+                                       regra: Optional[RegraSuficiencia] = None):
+        """
+        Stream assíncrono da execução paralela: cada AgentExecutionResult sai
+        assim que o agente termina e o último item é a síntese (str)
+        """
+        from utils.result_stream import stream_from_thread
+        
+        async for item in stream_from_thread(self._executar_paralelo_real, mensagem, agentes, regra,
+                                             callback_arg="ao_concluir"):
+            yield item
+    
+    def _executar_paralelo_real(self, mensagem: str, agentes: List[str],
+                                regra: Optional[RegraSuficiencia] = None,
+                                ao_concluir: Optional[Callable] = None) -> str:
+        """
+        Execução VERDADEIRAMENTE paralela no pool LLM compartilhado
+        
+        No modo especulativo a coleta termina assim que a regra de suficiência
+        é satisfeita (por padrão: o Oráculo respondeu, já que a síntese usaria
+        só ele). Os retardatários são cancelados - saem da fila do pool ou
+        param no próximo ponto de checagem do agente - ou, com anexar_tardios,
+        terminam em segundo plano e vão para resultados_tardios.
+        
+        ao_concluir, se informado, recebe um AgentExecutionResult por agente
+        assim que ele termina (ou estoura o prazo), antes da síntese.
+        """
         import concurrent.futures
-        import threading
+        from utils.executor_service import get_executor_service, LLM_POOL
+        from utils.adaptive_timeouts import get_adaptive_timeouts
+        from utils.cancellation import CancellationToken, cancellation_scope
+        from utils.agent_wake_manager import AgentExecutionResult, AgentStatus
         
         logger.info(f"⚡ Execução paralela REAL com {len(agentes)} agentes")
         
+        regra = regra or (self.regra_suficiencia if self.modo_especulativo else None)
         resultados = {}
         erros = {}
         
-        # Criar thread pool
-        with concurrent.futures.ThreadPoolExecutor(max_workers=len(agentes)) as executor:
-            # Submeter todas as tarefas
-            futuros = {}
-            for agente in agentes:
-                futuro = executor.submit(self._executar_agente_thread_safe, mensagem, agente)
-                futuros[futuro] = agente
+        # Timeout de cada agente aprendido da latência observada (30s até haver histórico)
+        timeouts = get_adaptive_timeouts()
+        inicio = time.time()
+        prazos = {agente: inicio + timeouts.timeout_for(agente, 30) for agente in agentes}
+        
+        def executar(agente: str, token: CancellationToken) -> Optional[str]:
+            with cancellation_scope(token):
+                return self._executar_agente_thread_safe(mensagem, agente)
+        
+        def emitir(agente: str, status: AgentStatus, resultado: Optional[str] = None, erro: Optional[str] = None):
+            if not ao_concluir:
+                return
+            try:
+                ao_concluir(AgentExecutionResult(
+                    agent_name=agente, status=status, result=resultado, error=erro,
+                    execution_time=time.time() - inicio
+                ))
+            except Exception as e:
+                logger.warning(f"⚠️ Callback de resultado falhou para {agente}: {e}")
+        
+        # Pool compartilhado pelo processo: o total de threads não cresce com o número de requisições.
+        # As threads daqui executam os agentes e nunca esperam tarefas deste mesmo pool
+        pool = get_executor_service().get_pool(LLM_POOL)
+        futuros = {}
+        tokens = {}
+        for agente in agentes:
+            tokens[agente] = CancellationToken()
+            futuro = pool.submit(executar, agente, tokens[agente])
+            futuros[futuro] = agente
+        
+        with self._lock_especulativo:
+            self.stats_especulativo["execucoes"] += 1
+        
+        # Coletar resultados conforme ficam prontos; cada agente até o próprio prazo
+        pendentes = set(futuros)
+        while pendentes:
+            espera = max(0.0, min(prazos[futuros[f]] for f in pendentes) - time.time())
+            prontos, pendentes = concurrent.futures.wait(
+                pendentes, timeout=espera, return_when=concurrent.futures.FIRST_COMPLETED
+            )
             
-            # Coletar resultados conforme ficam prontos
-            for futuro in concurrent.futures.as_completed(futuros):
+            for futuro in prontos:
                 agente = futuros[futuro]
+                timeouts.observe(agente, time.time() - inicio)
                 try:
-                    resultado = futuro.result(timeout=30)  # Timeout de 30 segundos por agente
+                    resultado = futuro.result()
                     if resultado:
                         resultados[agente] = resultado
                         logger.info(f"✅ {agente} concluído")
-                except concurrent.futures.TimeoutError:
-                    erros[agente] = "Timeout"
-                    logger.warning(f"⏱️ {agente} - timeout")
+                    emitir(agente, AgentStatus.COMPLETED, resultado)
                 except Exception as e:
                     erros[agente] = str(e)
                     logger.error(f"❌ {agente} - erro: {e}")
+                    emitir(agente, AgentStatus.ERROR, erro=str(e))
+            
+            for futuro in [f for f in pendentes if time.time() >= prazos[futuros[f]]]:
+                agente = futuros[futuro]
+                pendentes.discard(futuro)
+                futuro.cancel()  # Se ainda estava na fila do pool, nem começa
+                tokens[agente].cancel("timeout")
+                timeouts.observe(agente, prazos[agente] - inicio, timed_out=True)
+                erros[agente] = "Timeout"
+                logger.warning(f"⏱️ {agente} - timeout")
+                emitir(agente, AgentStatus.TIMEOUT, erro="Timeout")
+            
+            if pendentes and regra and regra.satisfeita(resultados, [futuros[f] for f in pendentes]):
+                self._liberar_retardatarios(mensagem, regra, pendentes, futuros, tokens, inicio)
+                break
         
         # Sintetizar resultados
         if resultados:
@@ -1760,6 +1897,50 @@ Crie uma resposta completamente nova que seja excelente:"""
         else:
             return self._resposta_direta_maestro(mensagem)
     
+    def _liberar_retardatarios(self, mensagem: str, regra: RegraSuficiencia, pendentes, futuros: Dict,
+                               tokens: Dict, inicio: float):
+        """Encerra a espera pelos agentes que não são mais necessários para a resposta"""
+        from utils.adaptive_timeouts import get_adaptive_timeouts
+        
+        retardatarios = [futuros[f] for f in pendentes]
+        logger.info(f"🏁 Resposta suficiente em {time.time() - inicio:.2f}s - "
+                    f"{'anexando' if regra.anexar_tardios else 'cancelando'} {', '.join(retardatarios)}")
+        
+        with self._lock_especulativo:
+            self.stats_especulativo["encerradas_cedo"] += 1
+            if not regra.anexar_tardios:
+                self.stats_especulativo["retardatarios_cancelados"] += len(retardatarios)
+        
+        for futuro in pendentes:
+            agente = futuros[futuro]
+            if not regra.anexar_tardios:
+                futuro.cancel()
+                tokens[agente].cancel("resposta suficiente")
+                continue
+            
+            def anexar(f, agente=agente):
+                if f.cancelled() or f.exception() is not None or not f.result():
+                    return
+                get_adaptive_timeouts().observe(agente, time.time() - inicio)
+                self.resultados_tardios.append({
+                    "mensagem": mensagem[:100],
+                    "agente": agente,
+                    "resultado": f.result(),
+                    "timestamp": datetime.now()
+                })
+                with self._lock_especulativo:
+                    self.stats_especulativo["resultados_tardios"] += 1
+                logger.info(f"📎 Resultado tardio de {agente} anexado")
+            
+            futuro.add_done_callback(anexar)
+    
+    def obter_resultados_tardios(self, limpar: bool = True) -> List[Dict[str, Any]]:
+        """Resultados de agentes que terminaram depois da resposta especulativa"""
+        tardios = list(self.resultados_tardios)
+        if limpar:
+            self.resultados_tardios.clear()
+        return tardios
+    
     def _executar_agente_thread_safe(self, mensagem: str, agente: str) -> Optional[str]:
         """Execução thread-safe de um agente"""
         try:
@@ -1792,6 +1973,9 @@ Crie uma resposta completamente nova que seja excelente:"""
             
             return None
             
+        except AgentCancelledError as e:
+            logger.debug(f"Agente {agente} cancelado: {e}")
+            return None
         except Exception as e:
             logger.error(f"Erro na thread do agente {agente}: {e}")
             return None
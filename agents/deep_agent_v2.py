@@ -157,7 +157,14 @@ class DeepAgentWebSearchV2(BaseAgentV2):
         except Exception as e:
             logger.error(f"❌ Erro ao inicializar cliente: {e}")
             raise
-    
+
+    def aquecer(self):
+        """Além do LLM base, prepara o cliente direto do fallback de pesquisa"""
+        super().aquecer()
+        if getattr(self, 'gemini_model', None) is not None:
+            from utils.llm_factory import warm_gemini_client
+            warm_gemini_client()
+
     def pesquisar_produto_web(self, produto: str, usar_web_search: bool = True) -> ResultadoPesquisaWeb:
         """
         🌐 PESQUISA WEB REAL (versão síncrona)
@@ -39,7 +39,9 @@ try:
     
     # Imports das otimizações
     from utils.agent_orchestrator import get_agent_orchestrator
+    from utils.agent_wake_manager import AgentExecutionResult, AgentStatus
     from utils.token_monitor import get_token_monitor
+    from utils.fair_scheduler import get_fair_scheduler
     
     system_logger = get_logger("chainlit_enhanced")
     
@@ -62,6 +64,7 @@ class UserSession:
     def __init__(self, session_id: str):
         self.session_id = session_id
         self.user_id = session_id[:8]  # Usar primeiros 8 chars como user_id
+        self.user_tier = os.getenv("DEFAULT_USER_TIER", "standard")
         self.start_time = datetime.now()
         self.message_count = 0
         self.onboarding_completed = False
@@ -72,6 +75,7 @@ class UserSession:
         self.onboarding_manager = get_onboarding_manager()
         self.orchestrator = get_agent_orchestrator()
         self.token_monitor = get_token_monitor()
+        self.scheduler = get_fair_scheduler()
         
         system_logger.info(f"👤 Nova sessão criada: {self.user_id}")
 
@@ -252,12 +256,50 @@ async def main(message: cl.Message):
         before_usage = user_session.token_monitor.get_current_usage()
         tokens_before = before_usage['total_tokens']
         
+        # Fila justa entre usuários: aguardar a vez mostrando a posição
+        queue_msg = None
+        
+        async def show_queue_position(position: int):
+            nonlocal queue_msg
+            content = f"⏳ Muita gente falando comigo agora - você é o **{position}º** da fila. Já te respondo!"
+            if queue_msg is None:
+                queue_msg = cl.Message(content=content, author="Carlos")
+                await queue_msg.send()
+            else:
+                queue_msg.content = content
+                await queue_msg.update()
+        
+        fair_ticket = await user_session.scheduler.acquire(
+            user_session.user_id, user_session.user_tier, on_position=show_queue_position
+        )
+        
         try:
-            # Processar com orquestrador otimizado
-            optimized_response = user_session.orchestrator.process_optimized(
-                user_input, 
-                context={"user_id": user_session.user_id}
-            )
+            # Processar com orquestrador otimizado (fora do event loop: outras sessões seguem atendidas)
+            # Cada agente que termina já aparece na tela; a resposta consolidada substitui as seções no fim
+            response_msg = None
+            optimized_response = None
+            try:
+                # Dentro do try: erro ou cancelamento aqui também devolve a vaga
+                if queue_msg is not None:
+                    await queue_msg.remove()
+                
+                async for item in user_session.orchestrator.astream_optimized(
+                    user_input, 
+                    context={"user_id": user_session.user_id, "user_tier": user_session.user_tier}
+                ):
+                    if not isinstance(item, AgentExecutionResult):
+                        optimized_response = item
+                        continue
+                    
+                    if item.status == AgentStatus.COMPLETED and item.result:
+                        if response_msg is None:
+                            thinking_indicator.stop()
+                            response_msg = cl.Message(content="", author="Carlos")
+                        await response_msg.stream_token(
+                            f"**{item.agent_name.capitalize()}** ({item.execution_time:.1f}s)\n{item.result}\n\n"
+                        )
+            finally:
+                user_session.scheduler.release(fair_ticket)
             
             # Parar indicador de pensamento
             thinking_indicator.stop()
@@ -295,12 +337,16 @@ async def main(message: cl.Message):
                 metrics_info += "*"
                 response_content += metrics_info
             
-            # Enviar resposta
-            response_msg = cl.Message(
-                content=response_content,
-                author="Carlos"
-            )
-            await response_msg.send()
+            # Enviar resposta (ou substituir as seções parciais já exibidas)
+            if response_msg is not None:
+                response_msg.content = response_content
+                await response_msg.update()
+            else:
+                response_msg = cl.Message(
+                    content=response_content,
+                    author="Carlos"
+                )
+                await response_msg.send()
             
             # Log da interação
             system_logger.info(f"✅ Resposta otimizada: {optimized_response.complexity_detected.value}")
@@ -0,0 +1,280 @@
+"""
+GPT MESTRE AUTÔNOMO - Compactação da Memória Vetorial
+Retenção, deduplicação e reconstrução offline das partições de conversas
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Any, Set, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+from utils.logger import get_logger
+from memory.vector_store import CONVERSATION_PARTITION_PREFIX, COMPACTION_TEMP_PREFIX, conversation_partition
+
+logger = get_logger(__name__)
+
+# Campos que repetiam na metadata o texto que já está no documento
+REDUNDANT_METADATA_FIELDS = ("user_input", "assistant_response")
+
+# Documentos por chamada de add na reconstrução
+REBUILD_BATCH_SIZE = 1000
+
+
+def record_timestamp(metadata: Dict[str, Any]) -> float:
+    """Instante da conversa ("ts"; coleção original só tem o ISO em "timestamp")"""
+    if "ts" in metadata:
+        return float(metadata["ts"])
+    try:
+        return datetime.fromisoformat(metadata["timestamp"]).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return time.time()  # Sem data: tratada como recente (não expira por engano)
+
+
+class ConversationCompactor:
+    """
+    Job de compactação das conversas do MemoryManager
+
+    Por execução:
+    1. partições mensais inteiras fora de max_age_days são apagadas
+    2. nas demais, saem as conversas mais antigas que max_age_days e as que
+       passam de max_per_session por sessão (contando todas as partições,
+       ficam as mais recentes)
+    3. conversas da mesma sessão com cosseno >= similarity_threshold viram
+       uma só (a mais recente, com "duplicates" somando as absorvidas)
+    4. user_input/assistant_response saem da metadata (já estão no documento)
+
+    Cada partição alterada é reconstruída numa coleção à parte
+    (tmpcompact_<nome>) enquanto o recall segue usando a antiga; a troca é
+    feita com as gravações pausadas, copiando antes o que chegou durante a
+    reconstrução. Sobras de uma reconstrução interrompida são apagadas pelo
+    MemoryManager ao abrir as partições.
+
+    Roda offline (python -m memory.compaction) ou periodicamente com
+    MEMORY_COMPACTION_INTERVAL_HOURS > 0 (ver get_memory_manager).
+    """
+
+    def __init__(self, manager: Any, similarity_threshold: float = 0.95,
+                 max_age_days: Optional[float] = 180, max_per_session: Optional[int] = 1000):
+        self.manager = manager
+        self.similarity_threshold = similarity_threshold
+        self.max_age_days = max_age_days
+        self.max_per_session = max_per_session
+
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # === EXECUÇÃO ===
+
+    def run(self) -> Dict[str, Any]:
+        """Executa uma compactação completa e devolve o relatório"""
+        start = time.perf_counter()
+        report: Dict[str, Any] = {
+            "partitions_checked": 0,
+            "partitions_dropped": 0,
+            "partitions_rebuilt": 0,
+            "documents_before": 0,
+            "documents_after": 0,
+            "expired": 0,
+            "over_quota": 0,
+            "merged": 0,
+            "seconds": 0.0
+        }
+
+        if not NUMPY_AVAILABLE or not self.manager.memory_active or not self.manager.wait_until_ready(timeout=60):
+            logger.warning("⚠️ Compactação ignorada: memória vetorial indisponível")
+            return report
+
+        # O que está na fila de ingestão entra na compactação desta rodada
+        self.manager.flush(timeout=30)
+
+        cutoff = (datetime.now() - timedelta(days=self.max_age_days)) if self.max_age_days is not None else None
+        collections = []
+        for collection in self.manager._conversation_collections():
+            report["partitions_checked"] += 1
+            if cutoff is not None and self._partition_expired(collection.name, cutoff):
+                report["documents_before"] += collection.count()
+                self._drop_partition(collection.name)
+                report["partitions_dropped"] += 1
+            else:
+                collections.append(collection)
+
+        removed = self._retention_removals(collections, cutoff, report)
+
+        for collection in collections:
+            self._compact_collection(collection, removed.get(collection.name, set()), report)
+
+        report["seconds"] = time.perf_counter() - start
+        self.manager.last_compaction = {**report, "finished_at": datetime.now().isoformat()}
+        logger.info(f"🧹 Compactação da memória: {report['documents_before']} → {report['documents_after']} "
+                    f"conversas ({report['merged']} duplicadas, {report['expired']} expiradas, "
+                    f"{report['over_quota']} acima da cota) em {report['seconds']:.1f}s")
+        return report
+
+    @staticmethod
+    def _partition_expired(name: str, cutoff: datetime) -> bool:
+        # Partição de um mês anterior ao do corte só tem conversas antes dele
+        return name.startswith(CONVERSATION_PARTITION_PREFIX) and name < conversation_partition(cutoff)
+
+    def _drop_partition(self, name: str):
+        with self.manager._write_lock:
+            self.manager.client.delete_collection(name)
+            self.manager._replace_collection(name, None)
+        logger.info(f"🗑️ Partição {name} removida (fora da retenção)")
+
+    def _retention_removals(self, collections: List[Any], cutoff: Optional[datetime],
+                            report: Dict[str, Any]) -> Dict[str, Set[str]]:
+        """Ids a remover por idade e por cota de sessão, agrupados por coleção"""
+        removed: Dict[str, Set[str]] = {}
+        by_session: Dict[str, List[Tuple[float, str, str]]] = {}
+        cutoff_ts = cutoff.timestamp() if cutoff is not None else None
+
+        for collection in collections:
+            data = collection.get(include=["metadatas"])
+            for doc_id, metadata in zip(data["ids"], data["metadatas"]):
+                ts = record_timestamp(metadata)
+                if cutoff_ts is not None and ts < cutoff_ts:
+                    removed.setdefault(collection.name, set()).add(doc_id)
+                    report["expired"] += 1
+                else:
+                    session = metadata.get("session_id", "default")
+                    by_session.setdefault(session, []).append((ts, collection.name, doc_id))
+
+        if self.max_per_session is not None:
+            for records in by_session.values():
+                if len(records) <= self.max_per_session:
+                    continue
+                records.sort(reverse=True)
+                for _, collection_name, doc_id in records[self.max_per_session:]:
+                    removed.setdefault(collection_name, set()).add(doc_id)
+                    report["over_quota"] += 1
+
+        return removed
+
+    # === DEDUPLICAÇÃO E RECONSTRUÇÃO ===
+
+    def _merge_near_duplicates(self, embeddings: "np.ndarray", metadatas: List[Dict[str, Any]],
+                               rows: List[int]) -> List[int]:
+        """Linhas sobreviventes: por sessão, da mais recente para a mais antiga"""
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        vectors = embeddings / norms
+
+        sessions: Dict[str, List[int]] = {}
+        for row in sorted(rows, key=lambda r: record_timestamp(metadatas[r]), reverse=True):
+            sessions.setdefault(metadatas[row].get("session_id", "default"), []).append(row)
+
+        survivors: List[int] = []
+        for session_rows in sessions.values():
+            kept: List[int] = []
+            for row in session_rows:
+                if kept:
+                    similarities = vectors[kept] @ vectors[row]
+                    best = int(np.argmax(similarities))
+                    if similarities[best] >= self.similarity_threshold:
+                        survivor = metadatas[kept[best]]
+                        survivor["duplicates"] = (survivor.get("duplicates", 0)
+                                                  + metadatas[row].get("duplicates", 0) + 1)
+                        continue
+                kept.append(row)
+            survivors.extend(kept)
+        return sorted(survivors)
+
+    @staticmethod
+    def _strip_metadata(metadata: Dict[str, Any]) -> bool:
+        """Remove os campos redundantes; True se algum existia"""
+        found = False
+        for field in REDUNDANT_METADATA_FIELDS:
+            if metadata.pop(field, None) is not None:
+                found = True
+        return found
+
+    def _compact_collection(self, collection: Any, removed: Set[str], report: Dict[str, Any]):
+        name = collection.name
+        data = collection.get(include=["documents", "metadatas", "embeddings"])
+        ids, documents, metadatas = data["ids"], data["documents"], data["metadatas"]
+        report["documents_before"] += len(ids)
+        if not ids:
+            return
+
+        embeddings = np.asarray(data["embeddings"], dtype=np.float32)
+        stripped = [self._strip_metadata(metadata) for metadata in metadatas]
+        rows = [row for row, doc_id in enumerate(ids) if doc_id not in removed]
+        survivors = self._merge_near_duplicates(embeddings, metadatas, rows) if rows else []
+        report["merged"] += len(rows) - len(survivors)
+
+        if len(survivors) == len(ids) and not any(stripped):
+            report["documents_after"] += len(ids)
+            return
+
+        # Reconstrução fora do caminho do recall
+        temp_name = COMPACTION_TEMP_PREFIX + name
+        try:
+            self.manager.client.delete_collection(temp_name)  # Sobra de uma execução interrompida
+        except Exception:
+            pass
+        rebuilt = self.manager.client.create_collection(name=temp_name, metadata={"hnsw:space": "cosine"})
+        for i in range(0, len(survivors), REBUILD_BATCH_SIZE):
+            batch = survivors[i:i + REBUILD_BATCH_SIZE]
+            rebuilt.add(documents=[documents[r] for r in batch],
+                        embeddings=embeddings[batch].tolist(),
+                        metadatas=[metadatas[r] for r in batch],
+                        ids=[ids[r] for r in batch])
+
+        with self.manager._write_lock:
+            # Conversas gravadas durante a reconstrução vão junto
+            snapshot = set(ids)
+            current = collection.get(include=["documents", "metadatas", "embeddings"])
+            fresh = [i for i, doc_id in enumerate(current["ids"]) if doc_id not in snapshot]
+            if fresh:
+                for i in fresh:
+                    self._strip_metadata(current["metadatas"][i])
+                rebuilt.add(documents=[current["documents"][i] for i in fresh],
+                            embeddings=np.asarray(current["embeddings"], dtype=np.float32)[fresh].tolist(),
+                            metadatas=[current["metadatas"][i] for i in fresh],
+                            ids=[current["ids"][i] for i in fresh])
+
+            # Queda entre as duas chamadas: a abertura da memória promove a temporária
+            self.manager.client.delete_collection(name)
+            rebuilt.modify(name=name)
+            self.manager._replace_collection(name, rebuilt)
+
+        report["partitions_rebuilt"] += 1
+        report["documents_after"] += len(survivors) + len(fresh)
+        logger.info(f"🔧 Partição {name} reconstruída: {len(ids)} → {len(survivors) + len(fresh)} conversas")
+
+    # === AGENDAMENTO ===
+
+    def start_background(self, interval_hours: float = 24):
+        """Roda a compactação periodicamente numa thread daemon"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        def loop():
+            while not self._stop_event.wait(interval_hours * 3600):
+                try:
+                    self.run()
+                except Exception as e:
+                    logger.error(f"❌ Erro na compactação da memória: {e}")
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=loop, name="memory-compaction", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+
+if __name__ == "__main__":
+    # Execução offline: python -m memory.compaction
+    from memory.vector_store import get_memory_manager
+
+    print("🧹 Compactando memória vetorial...")
+    resultado = ConversationCompactor(get_memory_manager()).run()
+    for chave, valor in resultado.items():
+        print(f"   {chave}: {valor}")
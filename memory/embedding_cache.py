@@ -0,0 +1,309 @@
+"""
+GPT MESTRE AUTÔNOMO - Cache de Embeddings
+Memoização de embeddings por hash do texto em arquivos memory-mapped
+"""
+
+import os
+import re
+import json
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Union
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Trava de dono do diretório (POSIX); sem ela cada processo usa um diretório pelo pid
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Tamanho do digest (bytes) usado como chave de cada texto
+KEY_BYTES = 16
+
+# kwargs de encode que não mudam o vetor gerado (o resto desvia do cache)
+NEUTRAL_ENCODE_KWARGS = {"batch_size", "show_progress_bar", "convert_to_numpy"}
+
+# Raiz dos caches: <raiz>/<modelo>/owner-<n>, um diretório por processo escritor
+EMBEDDING_CACHE_ROOT = "memory/embedding_cache"
+MAX_CACHE_OWNERS = 64
+
+
+class EmbeddingCache:
+    """
+    Cache persistente e limitado de embeddings (texto -> vetor float16)
+
+    Vetores ficam em vectors.f16 e as chaves (blake2b do modelo + texto) em
+    keys.bin, ambos np.memmap com `capacity` linhas: a linha i de keys.bin
+    é a chave do vetor na linha i (linha zerada = livre). O índice
+    chave -> linha é reconstruído na abertura lendo keys.bin. Quando enche,
+    a linha substituída é escolhida pelo algoritmo CLOCK (segunda chance
+    para linhas lidas recentemente).
+
+    Um arquivo de cache deve ter um único processo escritor; outros
+    workers devem usar diretórios próprios (get_embedding_cache cuida disso).
+    """
+
+    def __init__(self, cache_dir: str = "memory/embedding_cache", capacity: int = 50000,
+                 model_name: str = "all-MiniLM-L6-v2", flush_every: int = 256):
+        self.cache_dir = Path(cache_dir)
+        self.capacity = capacity
+        self.model_name = model_name
+        self.flush_every = flush_every
+
+        self._lock = threading.Lock()
+        self._index: Dict[bytes, int] = {}
+        self._vectors = None
+        self._keys = None
+        self._referenced: Optional[bytearray] = None
+        self._clock_hand = 0
+        self._dim: Optional[int] = None
+        self._dirty = 0
+
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+        if not NUMPY_AVAILABLE:
+            logger.warning("⚠️ NumPy não disponível - cache de embeddings desativado")
+            return
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._open_existing()
+
+    @property
+    def _meta_path(self) -> Path:
+        return self.cache_dir / "meta.json"
+
+    def _open_existing(self):
+        """Reabre os arquivos se forem do mesmo modelo e capacidade"""
+        if not self._meta_path.exists():
+            return
+
+        try:
+            meta = json.loads(self._meta_path.read_text())
+            if meta.get("model") != self.model_name or meta.get("capacity") != self.capacity:
+                logger.info("🔄 Cache de embeddings de outro modelo/capacidade - recriando")
+                return
+
+            self._map_files(meta["dim"], mode="r+")
+            self._clock_hand = meta.get("clock_hand", 0) % self.capacity
+
+            for slot in np.flatnonzero(self._keys.any(axis=1)).tolist():
+                self._index[self._keys[slot].tobytes()] = slot
+
+            logger.info(f"🧠 Cache de embeddings carregado: {len(self._index)} vetores")
+        except Exception as e:
+            logger.warning(f"⚠️ Cache de embeddings ilegível, recriando: {e}")
+            self._vectors = self._keys = None
+            self._index.clear()
+
+    def _map_files(self, dim: int, mode: str):
+        self._dim = dim
+        self._vectors = np.memmap(self.cache_dir / "vectors.f16", dtype=np.float16,
+                                  mode=mode, shape=(self.capacity, dim))
+        self._keys = np.memmap(self.cache_dir / "keys.bin", dtype=np.uint8,
+                               mode=mode, shape=(self.capacity, KEY_BYTES))
+        self._referenced = bytearray(self.capacity)
+
+    def _create_files(self, dim: int):
+        self._map_files(dim, mode="w+")
+        self._index.clear()
+        self._clock_hand = 0
+        self._write_meta()
+
+    def _write_meta(self):
+        meta = {
+            "model": self.model_name,
+            "capacity": self.capacity,
+            "dim": self._dim,
+            "clock_hand": self._clock_hand
+        }
+        tmp_path = self._meta_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(meta))
+        os.replace(tmp_path, self._meta_path)
+
+    def make_key(self, text: str) -> bytes:
+        """Chave do texto (inclui o nome do modelo)"""
+        return hashlib.blake2b(f"{self.model_name}\0{text}".encode("utf-8"),
+                               digest_size=KEY_BYTES).digest()
+
+    def get_many(self, keys: List[bytes]) -> List[Optional["np.ndarray"]]:
+        """Vetores float32 para as chaves presentes (None nas ausentes)"""
+        results: List[Optional["np.ndarray"]] = []
+        with self._lock:
+            for key in keys:
+                slot = self._index.get(key)
+                if slot is None:
+                    results.append(None)
+                    self.stats["misses"] += 1
+                else:
+                    self._referenced[slot] = 1
+                    results.append(np.array(self._vectors[slot], dtype=np.float32))
+                    self.stats["hits"] += 1
+        return results
+
+    def put_many(self, keys: List[bytes], vectors: "np.ndarray"):
+        """Grava vetores (float16) substituindo linhas pelo CLOCK quando cheio"""
+        if not NUMPY_AVAILABLE or not keys:
+            return
+
+        with self._lock:
+            if self._vectors is None or self._dim != vectors.shape[1]:
+                self._create_files(vectors.shape[1])
+
+            for key, vector in zip(keys, vectors):
+                if key in self._index:
+                    continue
+
+                slot = self._next_free_slot()
+                # Chave zerada antes do vetor: uma queda no meio não deixa par inconsistente
+                self._keys[slot] = 0
+                self._vectors[slot] = vector.astype(np.float16)
+                self._keys[slot] = np.frombuffer(key, dtype=np.uint8)
+                self._index[key] = slot
+                self._referenced[slot] = 0
+                self._dirty += 1
+
+            if self._dirty >= self.flush_every:
+                self._flush_locked()
+
+    def _next_free_slot(self) -> int:
+        """Linha livre ou a escolhida pelo CLOCK (remove a chave antiga do índice)"""
+        if len(self._index) < self.capacity:
+            # Enquanto não enche, as linhas são ocupadas em ordem
+            while True:
+                slot = self._clock_hand
+                self._clock_hand = (self._clock_hand + 1) % self.capacity
+                if not self._keys[slot].any():
+                    return slot
+
+        while self._referenced[self._clock_hand]:
+            self._referenced[self._clock_hand] = 0
+            self._clock_hand = (self._clock_hand + 1) % self.capacity
+
+        slot = self._clock_hand
+        self._clock_hand = (self._clock_hand + 1) % self.capacity
+        self._index.pop(self._keys[slot].tobytes(), None)
+        self.stats["evictions"] += 1
+        return slot
+
+    def _flush_locked(self):
+        if self._vectors is None:
+            return
+        self._vectors.flush()
+        self._keys.flush()
+        self._write_meta()
+        self._dirty = 0
+
+    def flush(self):
+        """Sincroniza os arquivos memory-mapped com o disco"""
+        with self._lock:
+            self._flush_locked()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "entries": len(self._index),
+                "capacity": self.capacity,
+                "hit_rate": self.stats["hits"] / lookups if lookups else 0,
+                "bytes_per_vector": (self._dim or 0) * 2 + KEY_BYTES
+            }
+
+
+class CachedEmbeddingModel:
+    """
+    Envolve um modelo de embedding (SentenceTransformer) com o EmbeddingCache
+
+    encode() tem a mesma assinatura: textos já vistos viram leitura do
+    memmap e só os inéditos (sem repetição dentro do lote) passam pelo
+    transformer, numa única chamada.
+    """
+
+    def __init__(self, model: Any, cache: EmbeddingCache):
+        self.model = model
+        self.cache = cache
+
+    def encode(self, sentences: Union[str, List[str]], **kwargs):
+        if not NUMPY_AVAILABLE or set(kwargs) - NEUTRAL_ENCODE_KWARGS:
+            return self.model.encode(sentences, **kwargs)
+
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return self.model.encode(texts, **kwargs)
+
+        keys = [self.cache.make_key(text) for text in texts]
+        cached = self.cache.get_many(keys)
+
+        # Textos inéditos, sem repetir os iguais no mesmo lote
+        missing: Dict[bytes, str] = {}
+        for key, text, vector in zip(keys, texts, cached):
+            if vector is None:
+                missing.setdefault(key, text)
+
+        computed: Dict[bytes, "np.ndarray"] = {}
+        if missing:
+            kwargs.pop("convert_to_numpy", None)
+            vectors = np.asarray(self.model.encode(list(missing.values()), **kwargs), dtype=np.float32)
+            computed = dict(zip(missing.keys(), vectors))
+            self.cache.put_many(list(computed.keys()), vectors)
+
+        result = np.stack([
+            vector if vector is not None else computed[key]
+            for key, vector in zip(keys, cached)
+        ])
+        return result[0] if single else result
+
+    def __getattr__(self, name: str):
+        # Demais atributos (get_sentence_embedding_dimension etc.) vêm do modelo
+        return getattr(self.model, name)
+
+
+def _claim_cache_dir(model_dir: Path) -> Path:
+    """
+    Primeiro owner-<n> livre em model_dir, travado (flock) enquanto o processo viver
+
+    Um reinício reaproveita o mesmo diretório (owner-0, em geral); workers
+    simultâneos ficam com diretórios distintos em vez de dividir os memmaps.
+    """
+    if FCNTL_AVAILABLE:
+        for n in range(MAX_CACHE_OWNERS):
+            owner_dir = model_dir / f"owner-{n}"
+            owner_dir.mkdir(parents=True, exist_ok=True)
+            lock_file = open(owner_dir / "owner.lock", "a")
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                continue
+            _owner_locks.append(lock_file)  # Fechar o arquivo soltaria a trava
+            return owner_dir
+    return model_dir / f"owner-pid{os.getpid()}"
+
+
+# Instâncias globais por modelo, compartilhadas por quem usa o mesmo modelo de embedding
+_embedding_caches: Dict[str, EmbeddingCache] = {}
+_owner_locks: List[Any] = []
+_embedding_cache_lock = threading.Lock()
+
+
+def get_embedding_cache(model_name: str = "all-MiniLM-L6-v2") -> EmbeddingCache:
+    """Retorna o cache de embeddings do modelo (diretório próprio do modelo e do processo)"""
+    with _embedding_cache_lock:
+        if model_name not in _embedding_caches:
+            model_dir = Path(EMBEDDING_CACHE_ROOT) / re.sub(r"[^A-Za-z0-9._-]", "_", model_name)
+            _embedding_caches[model_name] = EmbeddingCache(
+                cache_dir=str(_claim_cache_dir(model_dir)), model_name=model_name
+            )
+        return _embedding_caches[model_name]
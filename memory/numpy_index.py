@@ -0,0 +1,639 @@
+"""
+GPT MESTRE AUTÔNOMO - Índice Vetorial Local em NumPy
+Fallback da memória vetorial quando o ChromaDB não está instalado
+"""
+
+import os
+import json
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Linhas por bloco no produto matricial (limita memória temporária)
+SCAN_CHUNK_ROWS = 65536
+
+# Linhas de códigos convertidas para float32 por vez na varredura quantizada
+DECODE_CHUNK_ROWS = 1024
+
+# Modos de armazenamento quantizado para a busca de candidatos
+QUANTIZATION_MODES = (None, "float16", "int8")
+
+# Campos de metadata com índice invertido (filtros de igualdade sem varredura)
+DEFAULT_INDEXED_FIELDS = ("session_id", "agent")
+
+
+def indexed_equalities(where: Optional[Dict[str, Any]], fields: Tuple[str, ...]) -> Dict[str, Any]:
+    """Condições de igualdade do where (no topo ou em $and) sobre campos indexados"""
+    if not where:
+        return {}
+
+    found: Dict[str, Any] = {}
+    for field, condition in where.items():
+        if field == "$and":
+            for sub in condition:
+                found.update(indexed_equalities(sub, fields))
+        elif field in fields:
+            if not isinstance(condition, dict):
+                found[field] = condition
+            elif set(condition) == {"$eq"}:
+                found[field] = condition["$eq"]
+    return found
+
+
+def match_where(metadata: Dict[str, Any], where: Optional[Dict[str, Any]]) -> bool:
+    """
+    Avalia filtro de metadata no formato do ChromaDB
+
+    Suporta igualdade direta, $eq/$ne/$gt/$gte/$lt/$lte/$in/$nin e
+    combinações com $and/$or.
+    """
+    if not where:
+        return True
+
+    for field, condition in where.items():
+        if field == "$and":
+            if not all(match_where(metadata, sub) for sub in condition):
+                return False
+            continue
+        if field == "$or":
+            if not any(match_where(metadata, sub) for sub in condition):
+                return False
+            continue
+
+        value = metadata.get(field)
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+
+        for op, expected in condition.items():
+            if op == "$eq" and not value == expected:
+                return False
+            if op == "$ne" and not value != expected:
+                return False
+            if op == "$in" and value not in expected:
+                return False
+            if op == "$nin" and value in expected:
+                return False
+            if op in ("$gt", "$gte", "$lt", "$lte"):
+                if value is None:
+                    return False
+                if op == "$gt" and not value > expected:
+                    return False
+                if op == "$gte" and not value >= expected:
+                    return False
+                if op == "$lt" and not value < expected:
+                    return False
+                if op == "$lte" and not value <= expected:
+                    return False
+
+    return True
+
+
+class NumpyVectorCollection:
+    """
+    Coleção vetorial com a mesma interface usada do ChromaDB (add/query/count)
+
+    Vetores normalizados (float32) ficam em vectors.npy aberto como memmap,
+    com capacidade dobrada quando enche; ids, documentos e metadata ficam no
+    sidecar records.jsonl (uma linha por vetor, gravada depois do vetor -
+    a linha é o "commit"). Busca por similaridade de cosseno:
+
+    - até ivf_threshold vetores: exata, por produto matricial em blocos
+    - acima disso: IVF - k-means com ~sqrt(n) centróides, e a busca varre só
+      as n_probe listas mais próximas da query (re-treina quando n dobra)
+
+    Com quantization="float16" ou "int8" os candidatos são pontuados sobre
+    uma cópia compacta (codes.npy; no int8 com escala por vetor em
+    scales.npy) e só os rerank_factor × n_results melhores são re-ranqueados
+    com os float32 de vectors.npy - que então só é lido nessas linhas. Os
+    códigos são uma cópia adicional: o disco cresce 50% (float16) ou ~25%
+    (int8, 384 dimensões) em troca de ler 2× ou ~4× menos na varredura.
+    Com o índice em memória o int8 pontua mais rápido que o float32 e, com
+    re-ranking, tem o mesmo recall; o float16 é mais lento (a conversão
+    float16→float32 do numpy domina) e só compensa quando a varredura é
+    limitada pelo disco (run_quantization_benchmark mede os três).
+
+    Filtros de igualdade em indexed_fields (session_id, agent) usam um
+    índice invertido em memória: só as linhas da partição filtrada são
+    avaliadas e, se forem menos que ivf_threshold, varridas de forma exata.
+    """
+
+    def __init__(self, name: str, directory: str, ivf_threshold: int = 20000,
+                 n_probe: int = 8, initial_capacity: int = 1024,
+                 quantization: Optional[str] = None, rerank_factor: int = 4,
+                 indexed_fields: Tuple[str, ...] = DEFAULT_INDEXED_FIELDS):
+        if quantization not in QUANTIZATION_MODES:
+            raise ValueError(f"Quantização inválida: {quantization}")
+
+        self.name = name
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.ivf_threshold = ivf_threshold
+        self.n_probe = n_probe
+        self.initial_capacity = initial_capacity
+        self.quantization = quantization
+        self.rerank_factor = rerank_factor
+        self.indexed_fields = tuple(indexed_fields)
+
+        self._lock = threading.RLock()
+        self._vectors = None
+        self._codes = None
+        self._scales = None
+        self._size = 0
+        self.ids: List[str] = []
+        self.documents: List[str] = []
+        self.metadatas: List[Dict[str, Any]] = []
+        self._id_set = set()
+        self._field_index: Dict[str, Dict[Any, List[int]]] = {field: {} for field in self.indexed_fields}
+
+        # Estado do IVF
+        self._centroids = None
+        self._assignments = None
+        self._trained_size = 0
+
+        self._load()
+
+    @property
+    def _vectors_path(self) -> Path:
+        return self.directory / "vectors.npy"
+
+    @property
+    def _records_path(self) -> Path:
+        return self.directory / "records.jsonl"
+
+    @property
+    def _codes_path(self) -> Path:
+        return self.directory / "codes.npy"
+
+    @property
+    def _scales_path(self) -> Path:
+        return self.directory / "scales.npy"
+
+    def _load(self):
+        if not self._vectors_path.exists():
+            return
+
+        self._vectors = np.load(self._vectors_path, mmap_mode="r+")
+        ends = []  # Offset do fim de cada linha confirmada
+        if self._records_path.exists():
+            with open(self._records_path, "rb") as f:
+                offset = 0
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # Linha cortada por queda: o resto não foi confirmado
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        break
+                    offset += len(line)
+                    ends.append(offset)
+                    self.ids.append(record["id"])
+                    self.documents.append(record["document"])
+                    self.metadatas.append(record["metadata"])
+
+        self._size = min(len(self.ids), self._vectors.shape[0])
+        del self.ids[self._size:], self.documents[self._size:], self.metadatas[self._size:]
+        self._truncate_records(ends[self._size - 1] if self._size else 0)
+        self._id_set = set(self.ids)
+        self._index_metadata(0)
+
+        if self.quantization:
+            self._load_codes()
+
+        if self._size >= self.ivf_threshold:
+            self._train_ivf()
+
+        logger.debug(f"📂 Coleção '{self.name}' carregada: {self._size} vetores")
+
+    def _truncate_records(self, length: int):
+        """
+        Corta o sidecar no fim do último registro confirmado, senão o próximo
+        add() anexaria depois da linha quebrada e se perderia no reload. As
+        linhas de vectors/codes além de _size não precisam de corte: são
+        capacidade livre, sobrescrita pelo próximo add().
+        """
+        if not self._records_path.exists() or self._records_path.stat().st_size == length:
+            return
+        with open(self._records_path, "r+b") as f:
+            f.truncate(length)
+        logger.warning(f"✂️ Coleção '{self.name}': registros não confirmados descartados "
+                       f"(mantidos {self._size})")
+
+    def _grow(self, path: Path, current, capacity: int, dtype, shape_tail: tuple):
+        """Novo memmap com `capacity` linhas, copiando as _size primeiras de `current`"""
+        tmp_path = path.with_name(path.stem + ".tmp.npy")
+        grown = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=dtype,
+                                          shape=(capacity,) + shape_tail)
+        if current is not None and self._size:
+            grown[:self._size] = current[:self._size]
+        grown.flush()
+        del grown
+        os.replace(tmp_path, path)
+        return np.load(path, mmap_mode="r+")
+
+    def _ensure_capacity(self, needed: int, dim: int):
+        """Cria ou dobra os memmaps de vetores (e códigos) copiando o que já existe"""
+        if self._vectors is not None and self._vectors.shape[0] >= needed:
+            return
+
+        capacity = max(self.initial_capacity, needed,
+                       (self._vectors.shape[0] * 2) if self._vectors is not None else 0)
+        self._vectors = self._grow(self._vectors_path, self._vectors, capacity, np.float32, (dim,))
+
+        if self.quantization:
+            self._codes = self._grow(self._codes_path, self._codes, capacity, self._code_dtype, (dim,))
+            if self.quantization == "int8":
+                self._scales = self._grow(self._scales_path, self._scales, capacity, np.float32, ())
+
+    # === QUANTIZAÇÃO ===
+
+    @property
+    def _code_dtype(self):
+        return np.int8 if self.quantization == "int8" else np.float16
+
+    def _quantize(self, vectors: "np.ndarray"):
+        """Códigos compactos dos vetores (e escala por vetor no int8)"""
+        if self.quantization == "float16":
+            return vectors.astype(np.float16), None
+
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales.astype(np.float32)
+
+    def _write_codes(self, start: int, vectors: "np.ndarray"):
+        codes, scales = self._quantize(vectors)
+        self._codes[start:start + len(vectors)] = codes
+        self._codes.flush()
+        if scales is not None:
+            self._scales[start:start + len(vectors)] = scales
+            self._scales.flush()
+
+    def _load_codes(self):
+        """Abre codes.npy/scales.npy ou os gera a partir dos float32 (modo ligado depois)"""
+        try:
+            codes = np.load(self._codes_path, mmap_mode="r+")
+            scales = np.load(self._scales_path, mmap_mode="r+") if self.quantization == "int8" else None
+            if codes.dtype == self._code_dtype and codes.shape == self._vectors.shape:
+                self._codes, self._scales = codes, scales
+                return
+        except (FileNotFoundError, ValueError):
+            pass
+
+        capacity, dim = self._vectors.shape
+        self._codes = self._grow(self._codes_path, None, capacity, self._code_dtype, (dim,))
+        if self.quantization == "int8":
+            self._scales = self._grow(self._scales_path, None, capacity, np.float32, ())
+        for start in range(0, self._size, SCAN_CHUNK_ROWS):
+            end = min(self._size, start + SCAN_CHUNK_ROWS)
+            self._write_codes(start, np.asarray(self._vectors[start:end]))
+        logger.info(f"🗜️ Códigos {self.quantization} gerados para '{self.name}': {self._size} vetores")
+
+    def _approx_scores(self, rows: "np.ndarray", query: "np.ndarray") -> "np.ndarray":
+        """Similaridade aproximada a partir dos códigos"""
+        # Matmul em float16/int8 não tem caminho BLAS: os códigos são convertidos
+        # para float32 em sub-blocos pequenos, que cabem no cache da CPU
+        scores = np.empty(len(rows), dtype=np.float32)
+        for i in range(0, len(rows), DECODE_CHUNK_ROWS):
+            block = rows[i:i + DECODE_CHUNK_ROWS]
+            scores[i:i + len(block)] = self._codes[block].astype(np.float32) @ query
+        if self.quantization == "int8":
+            scores *= self._scales[rows]
+        return scores
+
+    def bytes_per_vector(self) -> int:
+        """Bytes lidos por vetor na varredura de candidatos"""
+        dim = self._vectors.shape[1] if self._vectors is not None else 0
+        if self.quantization == "int8":
+            return dim + 4
+        if self.quantization == "float16":
+            return dim * 2
+        return dim * 4
+
+    def disk_bytes_per_vector(self) -> int:
+        """Bytes em disco por vetor: os códigos são gravados além do vectors.npy"""
+        dim = self._vectors.shape[1] if self._vectors is not None else 0
+        if self.quantization:
+            return dim * 4 + self.bytes_per_vector()
+        return dim * 4
+
+    @staticmethod
+    def _normalize(vectors: "np.ndarray") -> "np.ndarray":
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def count(self) -> int:
+        return self._size
+
+    def get(self, include: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Todos os registros (formato do ChromaDB); embeddings como matriz float32"""
+        include = include or ["documents", "metadatas"]
+        with self._lock:
+            result: Dict[str, Any] = {"ids": list(self.ids)}
+            if "documents" in include:
+                result["documents"] = list(self.documents)
+            if "metadatas" in include:
+                result["metadatas"] = [dict(m) for m in self.metadatas]
+            if "embeddings" in include:
+                result["embeddings"] = (np.array(self._vectors[:self._size]) if self._size
+                                        else np.empty((0, 0), dtype=np.float32))
+            return result
+
+    def modify(self, name: Optional[str] = None, metadata: Optional[Dict[str, Any]] = None):
+        """Renomeia a coleção (move o diretório; o destino não pode existir)"""
+        if not name or name == self.name:
+            return
+        with self._lock:
+            target = self.directory.with_name(name)
+            if target.exists():
+                raise ValueError(f"Coleção {name} já existe")
+            os.rename(self.directory, target)
+            self.name, self.directory = name, target
+
+    def add(self, documents: List[str], embeddings: List[List[float]],
+            metadatas: List[Dict[str, Any]], ids: List[str]):
+        """Adiciona vetores (ids repetidos são ignorados)"""
+        vectors = self._normalize(np.asarray(embeddings, dtype=np.float32))
+
+        with self._lock:
+            fresh = [i for i, doc_id in enumerate(ids) if doc_id not in self._id_set]
+            if not fresh:
+                return
+
+            start = self._size
+            self._ensure_capacity(start + len(fresh), vectors.shape[1])
+            self._vectors[start:start + len(fresh)] = vectors[fresh]
+            self._vectors.flush()
+            if self.quantization:
+                self._write_codes(start, vectors[fresh])
+
+            with open(self._records_path, "a", encoding="utf-8") as f:
+                for i in fresh:
+                    f.write(json.dumps({"id": ids[i], "document": documents[i],
+                                        "metadata": metadatas[i]}, ensure_ascii=False) + "\n")
+
+            for i in fresh:
+                self.ids.append(ids[i])
+                self.documents.append(documents[i])
+                self.metadatas.append(metadatas[i])
+                self._id_set.add(ids[i])
+            self._size += len(fresh)
+            self._index_metadata(start)
+
+            if self._centroids is not None:
+                self._assign_new(start)
+            if self._size >= self.ivf_threshold and self._size >= 2 * self._trained_size:
+                self._train_ivf()
+
+    # === IVF ===
+
+    def _train_ivf(self, iterations: int = 10, sample_size: int = 50000):
+        """k-means esférico sobre uma amostra; atribui todos os vetores"""
+        vectors = self._vectors[:self._size]
+        n_lists = max(1, int(np.sqrt(self._size)))
+        rng = np.random.default_rng(0)
+
+        sample = vectors[rng.choice(self._size, size=min(sample_size, self._size), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(n_lists):
+                members = sample[labels == c]
+                if len(members):
+                    centroids[c] = members.mean(axis=0)
+            centroids = self._normalize(centroids)
+
+        self._centroids = centroids
+        self._assignments = np.empty(0, dtype=np.int32)
+        self._assign_new(0)
+        self._trained_size = self._size
+        logger.info(f"🗂️ IVF treinado para '{self.name}': {n_lists} listas, {self._size} vetores")
+
+    def _assign_new(self, start: int):
+        labels = [np.argmax(self._vectors[i:i + SCAN_CHUNK_ROWS] @ self._centroids.T, axis=1)
+                  for i in range(start, self._size, SCAN_CHUNK_ROWS)]
+        self._assignments = np.concatenate([self._assignments[:start], *labels]).astype(np.int32)
+
+    # === FILTROS ===
+
+    def _index_metadata(self, start: int):
+        """Acrescenta as linhas a partir de `start` ao índice invertido"""
+        for field, postings in self._field_index.items():
+            for row in range(start, self._size):
+                value = self.metadatas[row].get(field)
+                if value is not None:
+                    postings.setdefault(value, []).append(row)
+
+    def _allowed_rows(self, where: Dict[str, Any]) -> "np.ndarray":
+        """Máscara das linhas que passam no filtro (partição indexada quando possível)"""
+        allowed = np.zeros(self._size, dtype=bool)
+        equalities = indexed_equalities(where, self.indexed_fields)
+
+        if equalities:
+            rows = None
+            for field, value in equalities.items():
+                postings = set(self._field_index[field].get(value, ()))
+                rows = postings if rows is None else rows & postings
+            for row in rows:
+                allowed[row] = match_where(self.metadatas[row], where)
+        else:
+            allowed[:] = np.fromiter((match_where(m, where) for m in self.metadatas),
+                                     dtype=bool, count=self._size)
+        return allowed
+
+    # === BUSCA ===
+
+    def _candidate_rows(self, query: "np.ndarray", allowed: Optional["np.ndarray"]) -> "np.ndarray":
+        if allowed is not None and (self._centroids is None or allowed.sum() < self.ivf_threshold):
+            # Partição filtrada pequena: varredura exata só dela
+            return np.flatnonzero(allowed)
+        if self._centroids is None:
+            rows = np.arange(self._size)
+        else:
+            probe = min(self.n_probe, len(self._centroids))
+            nearest = np.argpartition(-(self._centroids @ query), probe - 1)[:probe]
+            rows = np.flatnonzero(np.isin(self._assignments[:self._size], nearest))
+        if allowed is not None:
+            rows = rows[allowed[rows]]
+        return rows
+
+    @staticmethod
+    def _best(scores: "np.ndarray", k: int) -> "np.ndarray":
+        """Posições dos k maiores scores, em ordem decrescente"""
+        k = min(k, len(scores))
+        best = np.argpartition(-scores, k - 1)[:k]
+        return best[np.argsort(-scores[best])]
+
+    def _top_k(self, query: "np.ndarray", rows: "np.ndarray", k: int):
+        if not len(rows) or k <= 0:
+            return [], []
+
+        if self.quantization:
+            # Candidatos pelos códigos compactos; re-ranking exato em float32
+            approx = np.concatenate([
+                self._approx_scores(rows[i:i + SCAN_CHUNK_ROWS], query)
+                for i in range(0, len(rows), SCAN_CHUNK_ROWS)
+            ])
+            rows = np.sort(rows[self._best(approx, k * self.rerank_factor)])
+
+        scores = np.concatenate([
+            self._vectors[rows[i:i + SCAN_CHUNK_ROWS]] @ query
+            for i in range(0, len(rows), SCAN_CHUNK_ROWS)
+        ])
+        best = self._best(scores, k)
+        return rows[best].tolist(), scores[best].tolist()
+
+    def query(self, query_embeddings: List[List[float]], n_results: int = 10,
+              where: Optional[Dict[str, Any]] = None,
+              include: Optional[List[str]] = None) -> Dict[str, List]:
+        """Busca os n_results mais similares de cada query (formato do ChromaDB)"""
+        include = include or ["documents", "metadatas", "distances"]
+        queries = self._normalize(np.asarray(query_embeddings, dtype=np.float32))
+
+        result: Dict[str, List] = {"ids": []}
+        for field in include:
+            result[field] = []
+
+        with self._lock:
+            allowed = self._allowed_rows(where) if where else None
+
+            for query in queries:
+                rows, scores = self._top_k(query, self._candidate_rows(query, allowed), n_results)
+                result["ids"].append([self.ids[r] for r in rows])
+                if "documents" in result:
+                    result["documents"].append([self.documents[r] for r in rows])
+                if "metadatas" in result:
+                    result["metadatas"].append([self.metadatas[r] for r in rows])
+                if "distances" in result:
+                    result["distances"].append([1.0 - s for s in scores])
+
+        return result
+
+
+class NumpyVectorStore:
+    """Cliente mínimo compatível com chromadb.PersistentClient (coleções em subdiretórios)"""
+
+    def __init__(self, path: str, ivf_threshold: int = 20000, quantization: Optional[str] = None):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.ivf_threshold = ivf_threshold
+        self.quantization = quantization
+        self._collections: Dict[str, NumpyVectorCollection] = {}
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        """Re-indexa as coleções abertas pelo nome atual (modify renomeia, delete remove)"""
+        self._collections = {c.name: c for c in self._collections.values() if c.directory.exists()}
+
+    def get_collection(self, name: str) -> NumpyVectorCollection:
+        with self._lock:
+            self._refresh()
+            if name not in self._collections:
+                if not (self.path / name).exists():
+                    raise ValueError(f"Coleção {name} não existe")
+                self._collections[name] = NumpyVectorCollection(
+                    name, str(self.path / name), ivf_threshold=self.ivf_threshold,
+                    quantization=self.quantization
+                )
+            return self._collections[name]
+
+    def list_collections(self) -> List[str]:
+        """Nomes das coleções existentes (subdiretórios)"""
+        return sorted(entry.name for entry in self.path.iterdir() if entry.is_dir())
+
+    def delete_collection(self, name: str):
+        with self._lock:
+            self._refresh()
+            self._collections.pop(name, None)
+            if not (self.path / name).exists():
+                raise ValueError(f"Coleção {name} não existe")
+            shutil.rmtree(self.path / name)
+
+    def create_collection(self, name: str, metadata: Optional[Dict[str, Any]] = None) -> NumpyVectorCollection:
+        with self._lock:
+            self._refresh()
+            if name not in self._collections:
+                self._collections[name] = NumpyVectorCollection(
+                    name, str(self.path / name), ivf_threshold=self.ivf_threshold,
+                    quantization=self.quantization
+                )
+            return self._collections[name]
+
+
+def run_quantization_benchmark(vectors: Optional["np.ndarray"] = None, num_queries: int = 200,
+                               k: int = 10, rerank_factor: int = 4) -> Dict[str, Dict[str, float]]:
+    """
+    Benchmark recall@k × bytes/vetor × latência dos modos de quantização
+
+    vectors: embeddings do corpus (ex.: vectors.npy da coleção conversations);
+    sem eles usa 5000 vetores sintéticos de 384 dimensões. As queries são
+    vetores do corpus com ruído e a referência é a busca exata em float32.
+    Cada modo é medido com e sem re-ranking.
+    """
+    import tempfile
+
+    rng = np.random.default_rng(0)
+    if vectors is None:
+        vectors = rng.standard_normal((5000, 384)).astype(np.float32)
+    vectors = NumpyVectorCollection._normalize(np.asarray(vectors, dtype=np.float32))
+    picks = rng.choice(len(vectors), size=min(num_queries, len(vectors)), replace=False)
+    noise = rng.standard_normal((len(picks), vectors.shape[1])).astype(np.float32)
+    queries = vectors[picks] + 0.05 * noise
+
+    configs = {"float32": (None, 1)}
+    for mode in ("float16", "int8"):
+        configs[mode] = (mode, rerank_factor)
+        configs[f"{mode}_sem_rerank"] = (mode, 1)
+
+    results: Dict[str, Dict[str, float]] = {}
+    reference = None
+    ids = [str(i) for i in range(len(vectors))]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for label, (mode, factor) in configs.items():
+            collection = NumpyVectorCollection(label, os.path.join(tmpdir, label), ivf_threshold=len(ids) + 1,
+                                               quantization=mode, rerank_factor=factor)
+            collection.add(documents=ids, embeddings=vectors, metadatas=[{}] * len(ids), ids=ids)
+
+            started = time.perf_counter()
+            found = collection.query(query_embeddings=queries, n_results=k, include=[])["ids"]
+            query_ms = (time.perf_counter() - started) * 1000 / len(queries)
+            if reference is None:
+                reference = found
+
+            hits = sum(len(set(a) & set(b)) for a, b in zip(found, reference))
+            results[label] = {
+                "recall_at_k": hits / (len(reference) * k),
+                "bytes_per_vector": collection.bytes_per_vector(),
+                "disk_bytes_per_vector": collection.disk_bytes_per_vector(),
+                "query_ms": query_ms
+            }
+
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+
+    corpus = None
+    if len(sys.argv) > 1:
+        # Ex.: python -m memory.numpy_index memory/chroma_db/numpy_index/conversations/vectors.npy
+        count = sum(1 for _ in open(Path(sys.argv[1]).with_name("records.jsonl"), encoding="utf-8"))
+        corpus = np.load(sys.argv[1], mmap_mode="r")[:count]
+
+    for label, metrics in run_quantization_benchmark(corpus).items():
+        print(f"{label:>17}: recall@10={metrics['recall_at_k']:.3f}  "
+              f"bytes/vetor={metrics['bytes_per_vector']}  disco/vetor={metrics['disk_bytes_per_vector']}  "
+              f"query={metrics['query_ms']:.2f}ms")
@@ -5,19 +5,25 @@ Versão simplificada e otimizada para Fase 2
 
 import os
 import json
-from datetime import datetime
-from typing import Dict, List, Optional, Any
+import time
+import uuid
+import atexit
+import threading
+import importlib.util
+from collections import deque
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Any, Callable, Tuple
 from dataclasses import dataclass
 
-try:
-    import chromadb
-    from chromadb.config import Settings
-    from sentence_transformers import SentenceTransformer
-    CHROMADB_AVAILABLE = True
-except ImportError:
-    CHROMADB_AVAILABLE = False
+# chromadb e sentence_transformers são imports pesados (segundos): aqui só se
+# verifica se existem; o import de fato acontece na carga em background
+CHROMADB_AVAILABLE = importlib.util.find_spec("chromadb") is not None
+SENTENCE_TRANSFORMERS_AVAILABLE = importlib.util.find_spec("sentence_transformers") is not None
 
 from utils.logger import get_logger
+from memory.embedding_cache import CachedEmbeddingModel, get_embedding_cache
+from memory.numpy_index import NumpyVectorStore, NUMPY_AVAILABLE
 
 logger = get_logger(__name__)
 
@@ -30,48 +36,320 @@ class MemoryDocument:
     timestamp: datetime
     agent_source: str
 
+# Item de ingestão: (nome da coleção, doc_id, texto, metadata)
+IngestionItem = Tuple[str, str, str, Dict[str, Any]]
+
+# Conversas novas vão para uma coleção por mês (conversations_AAAAMM); a
+# coleção "conversations" original continua sendo lida como a mais antiga
+CONVERSATION_PARTITION_PREFIX = "conversations_"
+
+
+# Coleções temporárias da compactação (memory/compaction.py): fora do prefixo
+# das partições, para nunca serem abertas como conversas
+COMPACTION_TEMP_PREFIX = "tmpcompact_"
+
+# Intervalo da compactação periódica em segundo plano; 0 = só offline
+# (python -m memory.compaction)
+COMPACTION_INTERVAL_HOURS = float(os.getenv("MEMORY_COMPACTION_INTERVAL_HOURS", "0"))
+
+
+def conversation_partition(moment: datetime) -> str:
+    """Nome da partição mensal de conversas de um instante"""
+    return f"{CONVERSATION_PARTITION_PREFIX}{moment.strftime('%Y%m')}"
+
+
+class EmbeddingIngestionQueue:
+    """
+    Fila de ingestão write-behind para a memória vetorial
+    
+    Os remember_* só enfileiram; uma thread em background junta micro-lotes
+    (até max_batch_size documentos ou max_wait_ms desde o primeiro da fila) e
+    entrega o lote inteiro para write_batch, que faz um único encode e um
+    único add por coleção. Com a fila cheia o produtor espera até
+    put_timeout (backpressure); se ainda assim não couber, grava o item
+    sincronamente para não perder memória.
+    """
+    
+    def __init__(self, write_batch: Callable[[List[IngestionItem]], None],
+                 max_batch_size: int = 64, max_wait_ms: float = 200,
+                 max_queue_size: int = 1000, put_timeout: float = 5.0):
+        self.write_batch = write_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_queue_size = max_queue_size
+        self.put_timeout = put_timeout
+        
+        self._items: deque = deque()
+        self._pending = 0  # Enfileirados + em gravação
+        self._cond = threading.Condition()
+        self._stopped = False
+        
+        self.stats = {
+            "enqueued": 0,
+            "written": 0,
+            "batches": 0,
+            "failed": 0,
+            "sync_fallbacks": 0,
+            "producer_waits": 0
+        }
+        
+        self._worker = threading.Thread(target=self._run, name="embedding-ingestion", daemon=True)
+        self._worker.start()
+    
+    def submit(self, item: IngestionItem) -> bool:
+        """Enfileira um documento; retorna False se foi gravado de forma síncrona"""
+        with self._cond:
+            if self._stopped:
+                queued = False
+            else:
+                if len(self._items) >= self.max_queue_size:
+                    self.stats["producer_waits"] += 1
+                    self._cond.wait_for(
+                        lambda: len(self._items) < self.max_queue_size or self._stopped,
+                        timeout=self.put_timeout
+                    )
+                queued = not self._stopped and len(self._items) < self.max_queue_size
+            
+            if queued:
+                self._items.append(item)
+                self._pending += 1
+                self.stats["enqueued"] += 1
+                self._cond.notify_all()
+                return True
+            
+            self.stats["sync_fallbacks"] += 1
+        
+        self._write([item])
+        return False
+    
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._items or self._stopped)
+                if not self._items:
+                    return  # Parada com a fila vazia
+                
+                # Esperar o lote encher ou o prazo do primeiro item vencer
+                deadline = time.monotonic() + self.max_wait
+                while len(self._items) < self.max_batch_size and not self._stopped:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                
+                batch = [self._items.popleft()
+                         for _ in range(min(self.max_batch_size, len(self._items)))]
+                self._cond.notify_all()  # Libera produtores esperando espaço
+            
+            self._write(batch)
+            
+            with self._cond:
+                self._pending -= len(batch)
+                self._cond.notify_all()
+    
+    def _write(self, batch: List[IngestionItem]):
+        try:
+            self.write_batch(batch)
+            with self._cond:
+                self.stats["written"] += len(batch)
+                self.stats["batches"] += 1
+        except Exception as e:
+            with self._cond:
+                self.stats["failed"] += len(batch)
+            logger.error(f"❌ Erro ao gravar lote de {len(batch)} memórias: {e}")
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Espera tudo que foi enfileirado ser gravado; False se o timeout venceu"""
+        with self._cond:
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._pending == 0, timeout=timeout)
+    
+    def close(self, timeout: Optional[float] = 10.0) -> bool:
+        """Grava o que falta e encerra a thread"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        self._worker.join(timeout)
+        return not self._worker.is_alive()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cond:
+            stats = dict(self.stats)
+            stats["queue_depth"] = len(self._items)
+        stats["avg_batch_size"] = stats["written"] / stats["batches"] if stats["batches"] else 0
+        return stats
+
+
 class MemoryManager:
     """
     Gerenciador de Memória Vetorial - Versão Integrada
     Sistema inteligente que lembra de tudo que o Carlos conversa
+    
+    Com async_ingestion, remember_* retornam o doc_id na hora e a gravação
+    (encode + add) acontece em lote numa thread de background - uma memória
+    recém-enfileirada pode levar até batch_wait_ms para aparecer no recall.
+    
+    Com background_load, o modelo de embedding e o banco vetorial carregam
+    numa thread (self.ready é o Future da carga). Até ficar pronto, as
+    gravações aguardam na fila (sem async_ingestion, num buffer gravado
+    quando a carga termina) e recall_context devolve contexto vazio em
+    vez de bloquear. Tempos de import/carga ficam em load_metrics.
+    
+    vector_quantization ("float16"/"int8") liga a busca quantizada com
+    re-ranking exato no índice NumPy; o ChromaDB gerencia o próprio
+    armazenamento e ignora a opção.
+    
+    Conversas ficam particionadas por mês e recall_context aceita filtros
+    (session_id, agent, since_hours) aplicados dentro da busca: só as
+    partições da janela são consultadas, da mais recente para a mais
+    antiga, até recall_budget_ms.
     """
     
-    def __init__(self, persist_directory: str = "memory/chroma_db"):
+    EMPTY_CONTEXT = "CONTEXTO RELEVANTE:\n\n"
+    
+    def __init__(self, persist_directory: str = "memory/chroma_db",
+                 async_ingestion: bool = True, batch_size: int = 64,
+                 batch_wait_ms: float = 200, max_queue_size: int = 1000,
+                 background_load: bool = True, vector_quantization: Optional[str] = None,
+                 recall_budget_ms: Optional[float] = 250):
         self.persist_directory = persist_directory
+        self.vector_quantization = vector_quantization
+        self.recall_budget_ms = recall_budget_ms
+        self._partitions: Dict[str, Any] = {}
+        self._partitions_lock = threading.Lock()
+        self._write_lock = threading.RLock()  # Segura gravações durante a troca de partição compactada
+        self.last_compaction: Optional[Dict[str, Any]] = None
+        self.compactor = None  # Compactação periódica (MEMORY_COMPACTION_INTERVAL_HOURS)
+        self.recall_stats = {
+            "recalls": 0,
+            "partitions_searched": 0,
+            "partitions_skipped_by_budget": 0,
+            "total_ms": 0.0
+        }
         self.session_memory = {}  # Memória temporária da sessão
+        self.ingestion_queue: Optional[EmbeddingIngestionQueue] = None
+        self.max_queue_size = max_queue_size
+        self._pre_ready_writes: List[IngestionItem] = []  # Sem fila: gravações antes da carga
+        self._pre_ready_lock = threading.Lock()
+        self._pre_ready_flushed = threading.Event()
+        self.client = None
+        self.embedding_model = None
+        self.ready: Future = Future()
+        self._created_at = time.perf_counter()
+        self.load_metrics: Dict[str, Any] = {
+            "import_seconds": None,
+            "model_load_seconds": None,
+            "backend_open_seconds": None,
+            "ready_seconds": None,
+            "first_use_seconds": None,
+            "first_use_waited": None,
+            "recalls_before_ready": 0
+        }
+        
+        # Sem ChromaDB, o índice em NumPy assume; sem modelo de embedding não há memória
+        if CHROMADB_AVAILABLE:
+            self.vector_backend = "chromadb"
+        elif NUMPY_AVAILABLE:
+            self.vector_backend = "numpy"
+        else:
+            self.vector_backend = None
         
-        # Verificar se ChromaDB está disponível
-        if not CHROMADB_AVAILABLE:
-            logger.warning("⚠️ ChromaDB não disponível - Memória vetorial DESATIVADA")
+        if not SENTENCE_TRANSFORMERS_AVAILABLE or self.vector_backend is None:
+            logger.warning("⚠️ sentence-transformers ou backend vetorial (ChromaDB/NumPy) "
+                           "não disponível - Memória vetorial DESATIVADA")
             self.memory_active = False
-            self.client = None
-            self.embedding_model = None
+            self.ready.set_result(False)
+            self._pre_ready_flushed.set()
             return
         
+        # Ativa desde já: o que chegar antes da carga espera na fila
+        self.memory_active = True
+        
+        if async_ingestion:
+            self.ingestion_queue = EmbeddingIngestionQueue(
+                self._write_documents,
+                max_batch_size=batch_size,
+                max_wait_ms=batch_wait_ms,
+                max_queue_size=max_queue_size
+            )
+            atexit.register(self.shutdown)
+            self._pre_ready_flushed.set()
+        else:
+            self.ready.add_done_callback(self._flush_pre_ready_writes)
+        
+        if background_load:
+            threading.Thread(target=self._load_backend, name="memory-loader", daemon=True).start()
+        else:
+            self._load_backend()
+    
+    def _load_backend(self):
+        """Importa e carrega modelo de embedding e banco vetorial (resolve self.ready)"""
         try:
             # Criar diretório se não existir
-            os.makedirs(persist_directory, exist_ok=True)
+            os.makedirs(self.persist_directory, exist_ok=True)
             
-            # Inicializar modelo de embedding (leve e eficiente)
-            self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+            start = time.perf_counter()
+            from sentence_transformers import SentenceTransformer
+            if self.vector_backend == "chromadb":
+                import chromadb
+                from chromadb.config import Settings
+            self.load_metrics["import_seconds"] = time.perf_counter() - start
             
-            # Inicializar ChromaDB
-            self.client = chromadb.PersistentClient(
-                path=persist_directory,
-                settings=Settings(anonymized_telemetry=False)
+            # Inicializar modelo de embedding (leve e eficiente), com memoização
+            start = time.perf_counter()
+            self.embedding_model = CachedEmbeddingModel(
+                SentenceTransformer('all-MiniLM-L6-v2'),
+                get_embedding_cache('all-MiniLM-L6-v2')
             )
+            self.load_metrics["model_load_seconds"] = time.perf_counter() - start
+            
+            # Inicializar ChromaDB (ou o índice local em NumPy)
+            start = time.perf_counter()
+            if self.vector_backend == "chromadb":
+                self.client = chromadb.PersistentClient(
+                    path=self.persist_directory,
+                    settings=Settings(anonymized_telemetry=False)
+                )
+            else:
+                self.client = NumpyVectorStore(os.path.join(self.persist_directory, "numpy_index"),
+                                               quantization=self.vector_quantization)
+                logger.info("📐 ChromaDB ausente - usando índice vetorial local em NumPy")
             
-            # Coleções por tipo de conteúdo
+            # Coleções por tipo de conteúdo (depois de concluir trocas da compactação)
+            self._recover_compaction()
             self.conversations = self._get_or_create_collection("conversations")
             self.learnings = self._get_or_create_collection("learnings") 
+            self._discover_partitions()
+            self.load_metrics["backend_open_seconds"] = time.perf_counter() - start
+            
+            self.load_metrics["ready_seconds"] = time.perf_counter() - self._created_at
+            self.ready.set_result(True)
             
-            self.memory_active = True
-            logger.info(f"🧠 MemoryManager inicializado: {persist_directory}")
+            logger.info(f"🧠 MemoryManager inicializado: {self.persist_directory} "
+                        f"(pronto em {self.load_metrics['ready_seconds']:.1f}s)")
             
         except Exception as e:
             logger.error(f"❌ Erro ao inicializar memória: {e}")
             self.memory_active = False
             self.client = None
+            self.ready.set_exception(e)
+    
+    def is_ready(self) -> bool:
+        """Modelo e banco vetorial carregados com sucesso"""
+        return self.ready.done() and self.ready.exception() is None and self.ready.result()
+    
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """Bloqueia até a carga terminar; False em caso de erro ou timeout"""
+        try:
+            return bool(self.ready.result(timeout))
+        except Exception:
+            return False
+    
+    def _mark_first_use(self):
+        """Registra quando a memória foi usada pela primeira vez e se já estava pronta"""
+        if self.load_metrics["first_use_seconds"] is None:
+            self.load_metrics["first_use_seconds"] = time.perf_counter() - self._created_at
+            self.load_metrics["first_use_waited"] = not self.ready.done()
     
     def _get_or_create_collection(self, name: str):
         """Obtém ou cria uma coleção"""
@@ -83,36 +361,165 @@ class MemoryManager:
                 metadata={"hnsw:space": "cosine"}
             )
     
+    def _collection_names(self) -> List[str]:
+        # chromadb < 0.6 devolve objetos Collection
+        return [getattr(entry, "name", entry) for entry in self.client.list_collections()]
+    
+    def _recover_compaction(self):
+        """
+        Conclui ou descarta trocas da compactação interrompidas
+        
+        A compactação só apaga a coleção original depois que a temporária
+        está completa. Com a original presente, a temporária é sobra de uma
+        reconstrução interrompida e é apagada; sem ela, o processo caiu
+        entre apagar e renomear, e a temporária assume o nome da original.
+        """
+        names = set(self._collection_names())
+        for name in names:
+            if not name.startswith(COMPACTION_TEMP_PREFIX):
+                continue
+            original = name[len(COMPACTION_TEMP_PREFIX):]
+            if original in names:
+                self.client.delete_collection(name)
+                logger.info(f"🧹 Sobra de compactação removida: {name}")
+            else:
+                self.client.get_collection(name).modify(name=original)
+                logger.warning(f"♻️ Troca de compactação interrompida concluída: {name} → {original}")
+    
+    def _discover_partitions(self):
+        """Abre as partições mensais de conversas já existentes"""
+        for name in self._collection_names():
+            if name.startswith(CONVERSATION_PARTITION_PREFIX):
+                self._partitions[name] = self.client.get_collection(name)
+    
+    def _collection(self, name: str):
+        """Coleção pelo nome, criando partições de conversas sob demanda"""
+        if not name.startswith(CONVERSATION_PARTITION_PREFIX):
+            return getattr(self, name)
+        with self._partitions_lock:
+            if name not in self._partitions:
+                self._partitions[name] = self._get_or_create_collection(name)
+            return self._partitions[name]
+    
+    def _replace_collection(self, name: str, collection: Any):
+        """Troca (ou remove, com None) a coleção de conversas usada pelo recall"""
+        with self._partitions_lock:
+            if name == "conversations":
+                self.conversations = collection
+            elif collection is None:
+                self._partitions.pop(name, None)
+            else:
+                self._partitions[name] = collection
+    
+    def _conversation_collections(self, since: Optional[datetime] = None) -> List[Any]:
+        """Partições de conversas da mais recente para a mais antiga (só as da janela)"""
+        with self._partitions_lock:
+            names = sorted(self._partitions, reverse=True)
+            if since is not None:
+                oldest = conversation_partition(since)
+                names = [name for name in names if name >= oldest]
+            collections = [self._partitions[name] for name in names]
+        
+        # A coleção original não tem "ts": só entra em buscas sem janela de tempo
+        if since is None:
+            collections.append(self.conversations)
+        return collections
+    
+    @staticmethod
+    def _build_where(session_id: Optional[str], agent: Optional[str],
+                     since: Optional[datetime]) -> Optional[Dict[str, Any]]:
+        """Filtro de metadata no formato do ChromaDB ($and só com mais de uma condição)"""
+        conditions = []
+        if session_id is not None:
+            conditions.append({"session_id": session_id})
+        if agent is not None:
+            conditions.append({"agent": agent})
+        if since is not None:
+            conditions.append({"ts": {"$gte": since.timestamp()}})
+        
+        if not conditions:
+            return None
+        return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+    
+    def _new_doc_id(self, prefix: str, suffix: str) -> str:
+        """doc_id único mesmo para várias memórias no mesmo segundo (mesmo lote)"""
+        return f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{suffix}_{uuid.uuid4().hex[:8]}"
+    
+    def _ingest(self, collection_name: str, doc_id: str, text: str, metadata: Dict[str, Any]):
+        """Envia documento para a fila de ingestão (ou grava direto sem fila)"""
+        item = (collection_name, doc_id, text, metadata)
+        if self.ingestion_queue is not None:
+            self.ingestion_queue.submit(item)
+            return
+        
+        with self._pre_ready_lock:
+            if not self.ready.done() and len(self._pre_ready_writes) < self.max_queue_size:
+                self._pre_ready_writes.append(item)
+                return
+        self._write_documents([item])
+    
+    def _flush_pre_ready_writes(self, ready: Future):
+        """Grava o buffer de antes da carga (callback de self.ready, na thread da carga)"""
+        with self._pre_ready_lock:
+            items, self._pre_ready_writes = self._pre_ready_writes, []
+        try:
+            if items and self.is_ready():
+                self._write_documents(items)
+            elif items:
+                logger.warning(f"⚠️ {len(items)} memórias descartadas: memória vetorial indisponível")
+        except Exception as e:
+            logger.error(f"❌ Erro ao gravar memórias anteriores à carga: {e}")
+        finally:
+            self._pre_ready_flushed.set()
+    
+    def _write_documents(self, items: List[IngestionItem]):
+        """Um encode em lote para todos os textos e um add por coleção"""
+        # Na thread da fila ou da carga; no caminho do usuário só com o buffer cheio
+        if not self.ready.result():
+            raise RuntimeError("memória vetorial indisponível")
+        
+        embeddings = self.embedding_model.encode(
+            [text for _, _, text, _ in items], batch_size=len(items)
+        ).tolist()
+        
+        by_collection: Dict[str, List[int]] = {}
+        for position, (collection_name, _, _, _) in enumerate(items):
+            by_collection.setdefault(collection_name, []).append(position)
+        
+        with self._write_lock:
+            for collection_name, positions in by_collection.items():
+                self._collection(collection_name).add(
+                    documents=[items[i][2] for i in positions],
+                    embeddings=[embeddings[i] for i in positions],
+                    metadatas=[items[i][3] for i in positions],
+                    ids=[items[i][1] for i in positions]
+                )
+        
+        logger.debug(f"💾 Lote gravado na memória vetorial: {len(items)} documentos")
+    
     def remember_conversation(self, user_input: str, assistant_response: str, 
                             agent_name: str = "Carlos", session_id: str = None):
         """Salva conversa na memória permanente"""
         if not self.memory_active:
             return None
+        self._mark_first_use()
             
         try:
-            doc_id = f"conv_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{agent_name}"
+            doc_id = self._new_doc_id("conv", agent_name)
             
-            # Combinar input e response para busca
+            # Combinar input e response para busca (o texto fica só no documento)
             full_text = f"Pergunta: {user_input}\nResposta: {assistant_response}"
             
+            now = datetime.now()
             metadata = {
                 "type": "conversation",
                 "agent": agent_name,
-                "timestamp": datetime.now().isoformat(),
-                "user_input": user_input,
-                "assistant_response": assistant_response,
+                "timestamp": now.isoformat(),
+                "ts": now.timestamp(),
                 "session_id": session_id or "default"
             }
             
-            # Gerar embedding
-            embedding = self.embedding_model.encode(full_text).tolist()
-            
-            self.conversations.add(
-                documents=[full_text],
-                embeddings=[embedding],
-                metadatas=[metadata],
-                ids=[doc_id]
-            )
+            self._ingest(conversation_partition(now), doc_id, full_text, metadata)
             
             logger.debug(f"💬 Conversa salva: {doc_id}")
             return doc_id
@@ -125,9 +532,10 @@ class MemoryManager:
         """Salva aprendizado na memória"""
         if not self.memory_active:
             return None
+        self._mark_first_use()
             
         try:
-            doc_id = f"learn_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{category}"
+            doc_id = self._new_doc_id("learn", category)
             
             metadata = {
                 "type": "learning",
@@ -136,14 +544,7 @@ class MemoryManager:
                 "timestamp": datetime.now().isoformat()
             }
             
-            embedding = self.embedding_model.encode(text).tolist()
-            
-            self.learnings.add(
-                documents=[text],
-                embeddings=[embedding],
-                metadatas=[metadata],
-                ids=[doc_id]
-            )
+            self._ingest("learnings", doc_id, text, metadata)
             
             logger.info(f"🧠 Aprendizado salvo: {category}")
             return doc_id
@@ -152,30 +553,67 @@ class MemoryManager:
             logger.error(f"❌ Erro ao salvar aprendizado: {e}")
             return None
     
-    def recall_context(self, query: str, max_results: int = 3) -> str:
-        """Recupera contexto relevante como texto formatado"""
+    def recall_context(self, query: str, max_results: int = 3, session_id: Optional[str] = None,
+                       agent: Optional[str] = None, since_hours: Optional[float] = None,
+                       budget_ms: Optional[float] = None, min_similarity: float = 50,
+                       snippet_chars: int = 150) -> str:
+        """
+        Recupera contexto relevante como texto formatado
+        
+        session_id/agent/since_hours restringem a busca (filtro aplicado no
+        banco vetorial). As partições são consultadas da mais recente para a
+        mais antiga; estourado budget_ms (padrão recall_budget_ms), as
+        restantes ficam de fora - a mais recente é sempre consultada.
+        """
         if not self.memory_active:
             return "CONTEXTO RELEVANTE: Memória vetorial não disponível.\n\n"
+        self._mark_first_use()
+        
+        # Modelo ainda carregando: não bloquear a resposta
+        if not self.is_ready():
+            self.load_metrics["recalls_before_ready"] += 1
+            return self.EMPTY_CONTEXT
             
         try:
+            start = time.perf_counter()
+            budget_ms = self.recall_budget_ms if budget_ms is None else budget_ms
+            since = datetime.now() - timedelta(hours=since_hours) if since_hours is not None else None
+            where = self._build_where(session_id, agent, since)
+            
             # Buscar conversas similares
             query_embedding = self.embedding_model.encode(query).tolist()
             
-            results = self.conversations.query(
-                query_embeddings=[query_embedding],
-                n_results=max_results,
-                include=["documents", "metadatas", "distances"]
-            )
+            collections = self._conversation_collections(since)
+            hits: List[Tuple[float, str]] = []
+            searched = 0
+            for collection in collections:
+                if searched and budget_ms is not None and (time.perf_counter() - start) * 1000 > budget_ms:
+                    break
+                searched += 1
+                
+                size = collection.count()
+                if size == 0:
+                    continue
+                results = collection.query(
+                    query_embeddings=[query_embedding],
+                    n_results=min(max_results, size),
+                    where=where,
+                    include=["documents", "distances"]
+                )
+                hits.extend(zip(results["distances"][0], results["documents"][0]))
+            
+            hits = sorted(hits)[:max_results]
+            self._record_recall(searched, len(collections) - searched, start)
             
             formatted_context = "CONTEXTO RELEVANTE:\n\n"
             
             # Conversas similares
-            if results["documents"][0]:
+            if hits:
                 formatted_context += "CONVERSAS ANTERIORES SIMILARES:\n"
-                for i, doc in enumerate(results["documents"][0]):
-                    similarity = (1 - results["distances"][0][i]) * 100
-                    if similarity > 50:  # Só mostrar se similaridade > 50%
-                        formatted_context += f"• [{similarity:.1f}% similar] {doc[:150]}...\n"
+                for distance, doc in hits:
+                    similarity = (1 - distance) * 100
+                    if similarity > min_similarity:  # Só mostrar acima do mínimo (50% por padrão)
+                        formatted_context += f"• [{similarity:.1f}% similar] {doc[:snippet_chars]}...\n"
                 formatted_context += "\n"
             
             return formatted_context
@@ -184,6 +622,19 @@ class MemoryManager:
             logger.error(f"❌ Erro ao recuperar contexto: {e}")
             return "CONTEXTO RELEVANTE: Erro na busca.\n\n"
     
+    def _record_recall(self, searched: int, skipped: int, start: float):
+        self.recall_stats["recalls"] += 1
+        self.recall_stats["partitions_searched"] += searched
+        self.recall_stats["partitions_skipped_by_budget"] += skipped
+        self.recall_stats["total_ms"] += (time.perf_counter() - start) * 1000
+        if skipped:
+            logger.debug(f"⏱️ Recall no limite de tempo: {skipped} partições antigas não consultadas")
+    
+    def compact(self, **options) -> Dict[str, Any]:
+        """Roda o job de compactação das conversas (opções do ConversationCompactor)"""
+        from memory.compaction import ConversationCompactor
+        return ConversationCompactor(self, **options).run()
+    
     def save_memory(self, user_input: str, assistant_response: str, 
                    agent_name: str = "Carlos", session_id: str = None):
         """Método de compatibilidade para salvar memória (alias para remember_conversation)"""
@@ -196,10 +647,20 @@ class MemoryManager:
                 "memory_active": False,
                 "error": "ChromaDB não disponível"
             }
+        
+        if not self.is_ready():
+            return {
+                "memory_active": True,
+                "ready": False,
+                "load_metrics": dict(self.load_metrics),
+                "ingestion": self.ingestion_queue.get_stats() if self.ingestion_queue else None,
+                "timestamp": datetime.now().isoformat()
+            }
             
         try:
-            conv_count = self.conversations.count()
+            conv_count = sum(collection.count() for collection in self._conversation_collections())
             learn_count = self.learnings.count()
+            recalls = self.recall_stats["recalls"]
             
             return {
                 "memory_active": True,
@@ -207,13 +668,24 @@ class MemoryManager:
                     "conversations": conv_count,
                     "learnings": learn_count,
                     "total_documents": conv_count + learn_count,
+                    "conversation_partitions": len(self._partitions),
                     "storage_path": self.persist_directory,
+                    "backend": self.vector_backend,
                     "embedding_model": "all-MiniLM-L6-v2"
                 },
                 "session_memory": {
                     "active_sessions": len(self.session_memory),
                     "session_keys": list(self.session_memory.keys())
                 },
+                "ingestion": self.ingestion_queue.get_stats() if self.ingestion_queue else None,
+                "embedding_cache": self.embedding_model.cache.get_stats(),
+                "recall": {
+                    **self.recall_stats,
+                    "avg_ms": self.recall_stats["total_ms"] / recalls if recalls else 0
+                },
+                "last_compaction": self.last_compaction,
+                "ready": True,
+                "load_metrics": dict(self.load_metrics),
                 "timestamp": datetime.now().isoformat()
             }
         except Exception as e:
@@ -222,6 +694,24 @@ class MemoryManager:
                 "error": str(e)
             }
 
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Espera as memórias enfileiradas serem gravadas"""
+        if self.ingestion_queue is None:
+            return self._pre_ready_flushed.wait(timeout)
+        return self.ingestion_queue.flush(timeout)
+    
+    def shutdown(self):
+        """Grava as memórias pendentes, encerra a fila de ingestão e sincroniza o cache de embeddings"""
+        if self.ingestion_queue is not None:
+            queue, self.ingestion_queue = self.ingestion_queue, None
+            if queue.close():
+                logger.info(f"💾 Fila de ingestão finalizada - {queue.stats['written']} memórias gravadas")
+            else:
+                logger.warning("⚠️ Fila de ingestão não terminou de gravar no prazo")
+        
+        if isinstance(self.embedding_model, CachedEmbeddingModel):
+            self.embedding_model.cache.flush()
+
 # Instância global para uso nos agentes
 _memory_manager = None
 
@@ -230,6 +720,10 @@ def get_memory_manager() -> MemoryManager:
     global _memory_manager
     if _memory_manager is None:
         _memory_manager = MemoryManager()
+        if COMPACTION_INTERVAL_HOURS > 0:
+            from memory.compaction import ConversationCompactor
+            _memory_manager.compactor = ConversationCompactor(_memory_manager)
+            _memory_manager.compactor.start_background(COMPACTION_INTERVAL_HOURS)
     return _memory_manager
 
 # Funções de conveniência
@@ -237,9 +731,9 @@ def remember_conversation(user_input: str, response: str, agent: str = "Carlos",
     """Função de conveniência para salvar conversas"""
     return get_memory_manager().remember_conversation(user_input, response, agent, session_id)
 
-def recall_context(query: str) -> str:
-    """Função de conveniência para recuperar contexto"""
-    return get_memory_manager().recall_context(query)
+def recall_context(query: str, **filters) -> str:
+    """Função de conveniência para recuperar contexto (filtros: session_id, agent, since_hours)"""
+    return get_memory_manager().recall_context(query, **filters)
 
 # Teste básico
 if __name__ == "__main__":
@@ -0,0 +1,58 @@
+"""
+Testes dos timeouts adaptativos por agente (utils/adaptive_timeouts.py)
+"""
+
+from utils.adaptive_timeouts import AdaptiveTimeoutRegistry, LatencyHistogram
+
+
+def test_percentil_do_histograma():
+    """Teste: p99 do histograma acompanha a cauda das latências"""
+    histograma = LatencyHistogram(decay=1.0)
+    for _ in range(98):
+        histograma.observe(1.0)
+    histograma.observe(8.0)
+    histograma.observe(8.0)
+
+    assert 1.0 <= histograma.percentile(0.5) < 1.3
+    assert 8.0 <= histograma.percentile(0.99) < 10.5
+
+    print("✅ Percentis do histograma")
+
+
+def test_timeout_adaptativo_com_limites(tmp_path):
+    """Teste: Timeout padrão até ter amostras; depois p99 × fator limitado"""
+    registro = AdaptiveTimeoutRegistry(path=str(tmp_path / "t.json"), factor=2.0, min_samples=10,
+                                       min_timeout=5, max_timeout=90)
+
+    assert registro.timeout_for("oraculo", 60) == 60
+    for _ in range(30):
+        registro.observe("oraculo", 10.0)
+        registro.observe("reflexor", 0.2)
+        registro.observe("deepagent", 80.0)
+
+    assert 20 <= registro.timeout_for("oraculo", 60) < 26  # Saudável e lento: não é cortado cedo
+    assert registro.timeout_for("reflexor", 20) == 5       # Rápido: corta falhas lentas mais cedo
+    assert registro.timeout_for("deepagent", 45) == 90     # Nunca passa do teto
+
+    snapshot = registro.snapshot({"oraculo": 60, "scout": 45})
+    assert snapshot["oraculo"]["adaptive"] and snapshot["oraculo"]["samples"] == 30
+    assert snapshot["scout"] == {"timeout": 45, "default": 45, "adaptive": False, "samples": 0,
+                                 "timeouts": 0, "p50": None, "p95": None, "p99": None}
+
+    print("✅ Timeout adaptativo limitado")
+
+
+def test_persistencia_entre_reinicios(tmp_path):
+    """Teste: Histogramas salvos sobrevivem ao reinício"""
+    caminho = str(tmp_path / "timeouts.json")
+    registro = AdaptiveTimeoutRegistry(path=caminho, min_samples=5, save_every=1000)
+    for _ in range(10):
+        registro.observe("psymind", 3.0)
+    registro.observe("psymind", 30.0, timed_out=True)
+    registro.save()
+
+    reaberto = AdaptiveTimeoutRegistry(path=caminho, min_samples=5)
+    assert reaberto.timeout_for("psymind", 30) == registro.timeout_for("psymind", 30)
+    assert reaberto.snapshot()["psymind"]["timeouts"] == 1
+
+    print("✅ Timeouts persistidos")
@@ -0,0 +1,87 @@
+"""
+Testes do controle de admissão do orquestrador (utils/admission_control.py)
+"""
+
+import threading
+import time
+
+from utils.admission_control import AdmissionController, DEFAULT_TIER
+
+
+def test_fila_atende_por_tier_e_complexidade():
+    """Teste: Vaga liberada vai para o tier maior e, no mesmo tier, para a requisição mais simples"""
+    controller = AdmissionController(initial_limit=1, min_limit=1, queue_budget=5)
+    ocupando = controller.acquire("complex")
+    ordem = []
+
+    def pedir(nome, complexidade, tier):
+        ticket = controller.acquire(complexidade, tier)
+        ordem.append(nome)
+        controller.release(ticket)
+
+    threads = [
+        threading.Thread(target=pedir, args=("free_critico", "critical", "free")),
+        threading.Thread(target=pedir, args=("premium_complexo", "complex", "premium")),
+        threading.Thread(target=pedir, args=("premium_simples", "simple", "premium")),
+    ]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.05)
+
+    assert controller.get_stats()["queue_depth"] == 3
+    controller.release(ocupando)
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert ordem == ["premium_simples", "premium_complexo", "free_critico"]
+    print("✅ Fila de admissão respeita tier e complexidade")
+
+
+def test_descarte_apos_orcamento_e_vagas_degradadas():
+    """Teste: Passado o orçamento de fila a requisição é descartada e cai nas vagas degradadas"""
+    controller = AdmissionController(initial_limit=1, min_limit=1, queue_budget=0.1, degraded_slots=1)
+    ocupando = controller.acquire("moderate")
+
+    inicio = time.time()
+    assert controller.acquire("complex") is None
+    assert 0.1 <= time.time() - inicio < 1.0
+
+    degradado = controller.acquire_degraded("complex")
+    assert degradado is not None
+    assert controller.acquire_degraded("complex") is None
+
+    controller.release(degradado)
+    controller.release(ocupando)
+    stats = controller.get_stats()
+    assert stats["shed"] == 1 and stats["degraded"] == 1 and stats["rejected"] == 1
+    assert stats["in_flight"] == 0 and stats["queue_depth"] == 0
+    print("✅ Descarte de carga com caminho degradado limitado")
+
+
+def test_limite_encolhe_quando_latencia_sobe():
+    """Teste: Latência acima da referência reduz o limite; latência estável o faz crescer"""
+    controller = AdmissionController(initial_limit=8, min_limit=2, max_limit=32)
+
+    def ciclo(latencia, vezes):
+        for _ in range(vezes):
+            tickets = [controller.acquire("moderate", budget=0) for _ in range(controller.limit)]
+            for ticket in tickets:
+                controller.release(ticket, latencia)
+
+    ciclo(1.0, 3)
+    estavel = controller.limit
+    assert estavel > 8
+
+    ciclo(4.0, 5)
+    assert controller.limit < estavel
+    print("✅ Limite de concorrência acompanha a latência medida")
+
+
+def test_sem_tier_entra_como_tier_padrao():
+    """Teste: Requisição sem tier (ou com tier desconhecido) é priorizada como DEFAULT_TIER"""
+    padrao = AdmissionController.priority_for("moderate", DEFAULT_TIER)
+
+    assert AdmissionController.priority_for("moderate") == padrao
+    assert AdmissionController.priority_for("moderate", "desconhecido") == padrao
+    assert AdmissionController.priority_for("moderate", "premium") < padrao
+    print("✅ Tier ausente cai no tier padrão")
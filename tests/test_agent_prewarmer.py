@@ -0,0 +1,45 @@
+"""
+Testes do pré-aquecimento preditivo de agentes (utils/agent_prewarmer.py)
+"""
+
+from utils.agent_optimizer import AgentOptimizer
+from utils.agent_prewarmer import AgentPrewarmer
+
+
+class WakeManagerFake:
+    def __init__(self):
+        self.aquecidos = []
+
+    def prewarm(self, agent_names):
+        self.aquecidos.extend(agent_names)
+        return {name: None for name in agent_names}
+
+
+def test_previsao_usa_plano_e_historico_do_usuario():
+    """Teste: Agentes do plano primeiro, depois os que o usuário costuma acabar usando"""
+    optimizer = AgentOptimizer()
+    analise = optimizer.analyze_message("Analise o mercado de patinhos no Shopee")
+    plano = analise.activation_plan.primary_agents + analise.activation_plan.secondary_agents
+    prewarmer = AgentPrewarmer(WakeManagerFake(), max_agents=len(plano) + 1)
+
+    assert prewarmer.predict(analise, "ana") == plano
+
+    for _ in range(3):
+        prewarmer.record(analise, "ana", plano[:1] + ["oraculo"])
+    prewarmer.record(analise, "ana", ["psymind"])
+
+    previsto = prewarmer.predict(analise, "ana")
+    assert previsto == plano + ["oraculo"]
+    assert prewarmer.predict(analise, "bruno") == plano
+    print("✅ Previsão combina plano de ativação e histórico")
+
+
+def test_saudacao_nao_aquece_nada():
+    """Teste: Mensagens TRIVIAL/bypass não disparam aquecimento"""
+    wake_manager = WakeManagerFake()
+    prewarmer = AgentPrewarmer(wake_manager)
+
+    analise = AgentOptimizer().analyze_message("oi")
+    assert prewarmer.prewarm(analise, "ana") == []
+    assert wake_manager.aquecidos == []
+    print("✅ Saudação sem pré-aquecimento")
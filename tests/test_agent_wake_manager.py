@@ -0,0 +1,329 @@
+"""
+Testes do AgentWakeManager (utils/agent_wake_manager.py)
+DAG de agentes com dependências, streaming e timeouts
+"""
+
+import tempfile
+import time
+
+from utils.adaptive_timeouts import AdaptiveTimeoutRegistry
+from utils.agent_wake_manager import AgentWakeManager, AgentWakeTask, AgentStatus
+
+
+def _registro_temporario():
+    """Timeouts adaptativos isolados (não grava em data/)"""
+    return AdaptiveTimeoutRegistry(path=f"{tempfile.mkdtemp()}/timeouts.json")
+
+
+class AgenteMock:
+    def __init__(self, nome, duracao=0.0, falha=False, inicios=None):
+        self.nome = nome
+        self.duracao = duracao
+        self.falha = falha
+        self.inicios = inicios if inicios is not None else {}
+
+    def processar(self, mensagem, contexto):
+        self.inicios[self.nome] = time.monotonic()
+        time.sleep(self.duracao)
+        if self.falha:
+            raise RuntimeError(f"{self.nome} falhou")
+        return f"{self.nome}: {mensagem}"
+
+
+def _tarefa(nome, dependencias=(), prioridade=0):
+    return AgentWakeTask(agent_name=nome, priority=prioridade, dependencies=set(dependencias),
+                         timeout=5, context={"message": "oi"})
+
+
+def _manager(agentes, max_concurrent_agents=5):
+    manager = AgentWakeManager(max_concurrent_agents=max_concurrent_agents,
+                               timeout_registry=_registro_temporario())
+    for agente in agentes:
+        manager.register_agent(agente.nome, agente)
+    return manager
+
+
+def test_dependentes_liberados_na_conclusao():
+    """Teste: Dependente começa logo que a dependência termina (sem polling)"""
+    inicios = {}
+    manager = _manager([
+        AgenteMock("supervisor", 0.2, inicios=inicios),
+        AgenteMock("deepagent", 0.05, inicios=inicios),
+        AgenteMock("scout", 0.05, inicios=inicios),
+        AgenteMock("reflexor", 0.0, inicios=inicios),
+    ])
+    tarefas = [
+        _tarefa("supervisor"),
+        _tarefa("deepagent"),
+        _tarefa("scout", {"deepagent"}),
+        _tarefa("reflexor", {"supervisor", "scout"}),
+    ]
+
+    inicio = time.monotonic()
+    ordem = [r.agent_name for r in manager.stream_agents(tarefas, global_timeout=10)]
+    total = time.monotonic() - inicio
+
+    assert ordem.index("deepagent") < ordem.index("scout") < ordem.index("reflexor")
+    assert ordem[-1] == "reflexor"
+    # scout não espera o supervisor nem um ciclo de polling de 0.5s
+    assert inicios["scout"] - inicios["deepagent"] < 0.15
+    assert total < 0.45
+
+    print(f"✅ DAG por callbacks em {total:.2f}s")
+
+
+def test_falha_derruba_dependentes_e_ciclos():
+    """Teste: Dependência com erro, ciclo e dependência ausente viram ERROR sem travar"""
+    manager = _manager([AgenteMock("deepagent", falha=True), AgenteMock("scout"),
+                        AgenteMock("a"), AgenteMock("b"), AgenteMock("c")])
+    resultados = manager.wake_agents_sequence([
+        _tarefa("deepagent"),
+        _tarefa("scout", {"deepagent"}),
+        _tarefa("a", {"b"}),
+        _tarefa("b", {"a"}),
+        _tarefa("c", {"inexistente"}),
+    ], global_timeout=5)
+
+    assert resultados["deepagent"].status == AgentStatus.ERROR
+    assert "deepagent" in resultados["scout"].error
+    assert resultados["a"].error == "Dependência circular"
+    assert "inexistente" in resultados["c"].error
+    assert manager.circuit_breakers["scout"].failure_count == 0
+
+    print("✅ Falhas propagadas no DAG")
+
+
+def test_caminho_critico_primeiro():
+    """Teste: Com um slot livre, sai primeiro a tarefa de maior caminho crítico"""
+    inicios = {}
+    manager = _manager([AgenteMock(n, 0.01, inicios=inicios) for n in ("rapido", "lento", "depois")],
+                       max_concurrent_agents=1)
+    manager.latency_estimates.update({"rapido": 0.1, "lento": 0.5, "depois": 2.0})
+
+    # "rapido" tem prioridade melhor, mas "depois" depende dele: caminho crítico 2.1s
+    manager.wake_agents_sequence([
+        _tarefa("lento", prioridade=0),
+        _tarefa("rapido", prioridade=5),
+        _tarefa("depois", {"rapido"}, prioridade=9),
+    ])
+    assert inicios["rapido"] < inicios["lento"]
+
+    print("✅ Ordem por caminho crítico")
+
+
+def test_timeout_global_nao_levanta():
+    """Teste: Timeout global devolve TIMEOUT para as tarefas pendentes"""
+    manager = _manager([AgenteMock("oraculo", 1.0), AgenteMock("reflexor")])
+    inicio = time.monotonic()
+    resultados = manager.wake_agents_sequence([
+        _tarefa("oraculo"),
+        _tarefa("reflexor", {"oraculo"}),
+    ], global_timeout=0.2)
+
+    assert time.monotonic() - inicio < 0.6
+    assert resultados["oraculo"].status == AgentStatus.TIMEOUT
+    assert resultados["reflexor"].status == AgentStatus.TIMEOUT
+
+    print("✅ Timeout global sem exceção")
+
+
+class AgenteCooperativo:
+    """Agente que checa o cancelamento entre passos (como antes de cada chamada ao LLM)"""
+    nome = "cooperativo"
+
+    def __init__(self):
+        self.passos = 0
+
+    def processar(self, mensagem, contexto):
+        from utils.cancellation import raise_if_cancelled
+        for _ in range(100):
+            raise_if_cancelled()
+            self.passos += 1
+            time.sleep(0.02)
+        return "terminou"
+
+
+def _esperar(condicao, limite=2.0):
+    fim = time.monotonic() + limite
+    while time.monotonic() < fim and not condicao():
+        time.sleep(0.01)
+    return condicao()
+
+
+def test_timeout_cancela_execucao_cooperativa():
+    """Teste: Timeout cancela o agente e a execução abandonada é contabilizada"""
+    agente = AgenteCooperativo()
+    manager = _manager([agente])
+    resultado = manager.wake_agents_sequence([AgentWakeTask(
+        agent_name="cooperativo", priority=0, dependencies=set(), timeout=0.1, context={"message": "x"}
+    )])["cooperativo"]
+    assert resultado.status == AgentStatus.TIMEOUT
+
+    pool = manager.agent_pools["AgenteCooperativo"]
+    assert _esperar(lambda: pool.get_stats()["abandoned_cancelled"] == 1)
+    assert agente.passos < 20
+    stats = pool.get_stats()
+    assert stats["abandoned_running"] == 0 and stats["in_flight"] == 0
+    manager.shutdown()
+
+    print("✅ Cancelamento cooperativo no timeout")
+
+
+def test_pool_por_classe_limita_threads():
+    """Teste: Execuções presas não criam threads novas; excesso é recusado"""
+    import threading
+
+    liberar = threading.Event()
+
+    class AgentePreso:
+        nome = "preso"
+
+        def processar(self, mensagem, contexto):
+            liberar.wait(timeout=5)
+            return "ok"
+
+    manager = AgentWakeManager(max_concurrent_agents=8, agent_pool_workers=1, agent_pool_queue=1,
+                               timeout_registry=_registro_temporario())
+    for i in range(4):
+        manager.register_agent(f"preso{i}", AgentePreso())
+
+    resultados = manager.wake_agents_sequence([
+        AgentWakeTask(agent_name=f"preso{i}", priority=i, dependencies=set(), timeout=0.2,
+                      context={"message": "x"}) for i in range(4)
+    ])
+    recusados = [r for r in resultados.values() if r.status == AgentStatus.OVERLOADED]
+    assert len(recusados) == 2 and all("lotado" in r.error for r in recusados)
+
+    # Pool lotado não abre o circuit breaker do agente recusado
+    for resultado in recusados:
+        assert manager.circuit_breakers[resultado.agent_name].failure_count == 0
+
+    threads = [t for t in threading.enumerate() if t.name.startswith("agent-AgentePreso")]
+    assert len(threads) == 1
+
+    stats = manager.agent_pools["AgentePreso"].get_stats()
+    assert stats["rejected"] == 2
+    assert stats["abandoned"] == 1 and stats["cancelled_before_start"] == 1
+
+    liberar.set()
+    manager.shutdown()
+
+    print("✅ Pool limitado com controle de admissão")
+
+
+def test_resultado_pronto_no_limite_do_timeout_nao_e_descartado():
+    """Teste: Future que termina junto com o timeout devolve o resultado do agente"""
+    import concurrent.futures
+
+    class FuturoNoLimite(concurrent.futures.Future):
+        def result(self, timeout=None):
+            if timeout is not None:
+                raise concurrent.futures.TimeoutError()  # Espera venceu...
+            return super().result()  # ...mas o agente já tinha terminado
+
+    class PoolStub:
+        def submit(self, fn, token):
+            futuro = FuturoNoLimite()
+            futuro.set_result(fn())
+            return futuro
+
+    manager = _manager([AgenteMock("oraculo")])
+    manager._get_agent_pool = lambda agente: PoolStub()
+
+    assert manager._execute_with_timeout(AgenteMock("oraculo"), {"message": "oi"}, 1) == "oraculo: oi"
+
+    print("✅ Resultado no limite do timeout preservado")
+
+
+def test_timeout_do_agente_vem_do_historico():
+    """Teste: Depois de amostras suficientes o timeout fixo dá lugar ao aprendido"""
+    manager = _manager([AgenteMock("reflexor")])
+    assert manager.get_agent_timeout("reflexor", 5) == 20  # Valor inicial fixo
+
+    for _ in range(manager.timeout_registry.min_samples):
+        manager.wake_agents_sequence([_tarefa("reflexor")])
+
+    assert manager.get_agent_timeout("reflexor", 5) == manager.timeout_registry.min_timeout
+    assert manager.get_timeouts_snapshot()["reflexor"]["adaptive"]
+
+    print("✅ Timeout aprendido no wake manager")
+
+
+def test_pre_aquecimento_constroi_uma_vez_e_marca_quente():
+    """Teste: prewarm constrói o agente pela fábrica, chama aquecer() e a execução reaproveita"""
+    construcoes = []
+
+    class AgenteLento(AgenteMock):
+        def __init__(self):
+            time.sleep(0.1)  # Custo de setup (cliente LLM, grafos...)
+            construcoes.append(1)
+            super().__init__("deepagent")
+            self.aquecido = False
+
+        def aquecer(self):
+            self.aquecido = True
+
+    manager = AgentWakeManager(timeout_registry=_registro_temporario())
+    manager.register_agent_factory("deepagent", AgenteLento)
+
+    futuros = manager.prewarm(["deepagent", "desconhecido"])
+    assert list(futuros) == ["deepagent"]
+    assert manager.prewarm(["deepagent"]) == {}  # Já em aquecimento
+
+    futuros["deepagent"].result(timeout=2)
+    assert manager.get_agent_status("deepagent") == AgentStatus.WARM
+    assert manager.agent_registry["deepagent"].aquecido
+
+    resultados = manager.wake_agents_sequence([_tarefa("deepagent")])
+    assert resultados["deepagent"].status == AgentStatus.COMPLETED
+    assert len(construcoes) == 1
+    assert manager.prewarm_stats["warm_hits"] == 1 and manager.prewarm_stats["cold_starts"] == 0
+
+    # Depois da execução o agente segue quente: novo prewarm não reenfileira nada
+    assert manager.get_agent_status("deepagent") == AgentStatus.WARM
+    assert manager.prewarm(["deepagent"]) == {}
+    manager.wake_agents_sequence([_tarefa("deepagent")])
+    assert manager.prewarm_stats["warm_hits"] == 2 and manager.prewarm_stats["requested"] == 1
+    print("✅ Pré-aquecimento reaproveitado pela execução")
+
+
+def test_execucao_concorrente_com_pre_aquecimento_nao_duplica_construcao():
+    """Teste: Execução que chega durante o aquecimento espera a mesma construção"""
+    construcoes = []
+
+    def fabrica():
+        time.sleep(0.2)
+        construcoes.append(1)
+        return AgenteMock("oraculo")
+
+    manager = AgentWakeManager(timeout_registry=_registro_temporario())
+    manager.register_agent_factory("oraculo", fabrica)
+
+    manager.prewarm(["oraculo"])
+    time.sleep(0.05)
+    resultados = manager.wake_agents_sequence([_tarefa("oraculo")])
+
+    assert resultados["oraculo"].status == AgentStatus.COMPLETED
+    assert len(construcoes) == 1
+    print("✅ Construção única com aquecimento e execução concorrentes")
+
+
+def test_despacho_nao_ocupa_pool_llm(monkeypatch):
+    """Teste: Agente que faz fan-out no pool LLM não trava com o pool de uma vaga só"""
+    import utils.agent_wake_manager as agent_wake_manager
+    from utils.executor_service import ExecutorService, LLM_POOL
+
+    servico = ExecutorService(pool_sizes={"llm": 1, "dispatch": 1, "cpu": 1, "io": 1})
+    monkeypatch.setattr(agent_wake_manager, "get_executor_service", lambda: servico)
+
+    class AgenteComFanOut(AgenteMock):
+        def processar(self, mensagem, contexto):
+            return servico.submit(LLM_POOL, lambda: f"fan-out: {mensagem}").result(timeout=2)
+
+    manager = _manager([AgenteComFanOut("carlos")])
+    resultados = manager.wake_agents_sequence([_tarefa("carlos")])
+
+    assert resultados["carlos"].status == AgentStatus.COMPLETED
+    assert resultados["carlos"].result == "fan-out: oi"
+    servico.shutdown(timeout=1)
+    print("✅ Despacho do wake manager fora do pool LLM")
@@ -0,0 +1,323 @@
+"""
+Testes do CacheManager (cache hierárquico exato + similaridade)
+Verifica warm-up, persistência e invalidação
+"""
+
+import sqlite3
+import pytest
+
+from utils.cache_manager import CacheManager, build_namespace
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    """Diretório isolado para o cache.db de cada teste"""
+    return str(tmp_path)
+
+
+def test_cache_hit_exato_e_similaridade(cache_dir):
+    """Teste: Hits exato e por similaridade"""
+    cache = CacheManager(cache_dir=cache_dir, async_warmup=False, similarity_threshold=0.5)
+
+    cache.put("Qual a capital da França?", "A capital da França é Paris.", 50)
+
+    response, tokens = cache.get("Qual a capital da França?")
+    assert response == "A capital da França é Paris."
+    assert tokens == 50
+
+    response, _ = cache.get("capital da França qual")
+    assert response == "A capital da França é Paris."
+
+    print("✅ Hits exato e por similaridade funcionando")
+
+
+def test_warmup_assincrono_nao_bloqueia(cache_dir):
+    """Teste: Warm-up em background preenche memória e índice de similaridade"""
+    primeiro = CacheManager(cache_dir=cache_dir, async_warmup=False)
+    for i in range(25):
+        primeiro.put(f"pergunta numero {i} sobre mercado", f"resposta {i}", 10)
+
+    cache = CacheManager(cache_dir=cache_dir, warmup_batch_size=7)
+
+    # Hit exato é servido pelo SQLite mesmo antes do warm-up terminar
+    response, _ = cache.get("pergunta numero 3 sobre mercado")
+    assert response == "resposta 3"
+
+    assert cache.wait_until_warm(timeout=5)
+    stats = cache.get_stats()
+    assert stats['warmup_complete'] is True
+    assert stats['memory_items'] == 25
+    assert stats['similarity_items'] == 25
+
+    print("✅ Warm-up assíncrono concluído sem bloquear o construtor")
+
+
+def test_warmup_reaproveita_tokens_persistidos(cache_dir, monkeypatch):
+    """Teste: Restart não re-tokeniza queries com tokens já persistidos"""
+    primeiro = CacheManager(cache_dir=cache_dir, async_warmup=False)
+    primeiro.put("estratégia de marketing digital", "resposta", 10)
+
+    chamadas = []
+    original = CacheManager._tokenize_query
+
+    def contar(self, query):
+        chamadas.append(query)
+        return original(self, query)
+
+    monkeypatch.setattr(CacheManager, "_tokenize_query", contar)
+    cache = CacheManager(cache_dir=cache_dir, async_warmup=False)
+
+    assert chamadas == []
+    query_hash = cache._hash_query("estratégia de marketing digital")
+    assert cache.similarity_index[query_hash] == \
+        original(cache, "estratégia de marketing digital")
+
+    print("✅ Tokens de similaridade reaproveitados do disco")
+
+
+def test_warmup_migra_banco_antigo(cache_dir):
+    """Teste: Bancos sem a coluna query_tokens são migrados e preenchidos"""
+    with sqlite3.connect(f"{cache_dir}/cache.db") as conn:
+        conn.execute("""
+            CREATE TABLE cache (
+                query_hash TEXT PRIMARY KEY,
+                query_normalized TEXT,
+                response TEXT,
+                tokens_used INTEGER,
+                timestamp REAL,
+                access_count INTEGER DEFAULT 1,
+                last_accessed REAL
+            )
+        """)
+        conn.execute(
+            "INSERT INTO cache VALUES ('h1', 'preço do produto', 'r', 5, strftime('%s','now'), 1, strftime('%s','now'))"
+        )
+        conn.commit()
+
+    cache = CacheManager(cache_dir=cache_dir, async_warmup=False)
+    assert "h1" in cache.similarity_index
+
+    with sqlite3.connect(f"{cache_dir}/cache.db") as conn:
+        raw = conn.execute("SELECT query_tokens FROM cache WHERE query_hash = 'h1'").fetchone()[0]
+    assert raw is not None
+
+    print("✅ Banco antigo migrado com tokens persistidos")
+
+
+def test_resposta_grande_comprimida_no_disco(cache_dir):
+    """Teste: Respostas grandes vão comprimidas para o SQLite e voltam intactas"""
+    cache = CacheManager(cache_dir=cache_dir, async_warmup=False)
+    resposta = "Análise multi-agente detalhada. " * 2000
+
+    cache.put("analise completa do mercado", resposta, 900)
+    cache.put("oi", "Olá!", 1)
+
+    with sqlite3.connect(f"{cache_dir}/cache.db") as conn:
+        rows = dict(conn.execute("SELECT query_normalized, compression FROM cache"))
+        tamanho = conn.execute(
+            "SELECT length(response) FROM cache WHERE query_normalized = 'analise completa do mercado'"
+        ).fetchone()[0]
+    assert rows["analise completa do mercado"] == "zlib"
+    assert rows["oi"] is None
+    assert tamanho < len(resposta.encode("utf-8")) / 10
+
+    # Leitura pelo disco (memória vazia) descomprime transparentemente
+    novo = CacheManager(cache_dir=cache_dir, async_warmup=False, max_memory_items=0)
+    response, tokens = novo.get("analise completa do mercado")
+    assert response == resposta
+    assert tokens == 900
+
+    print("✅ Compressão transparente no SQLite")
+
+
+def test_niveis_compartilham_resposta_internada(cache_dir):
+    """Teste: Memória e similaridade referenciam o mesmo objeto de resposta"""
+    cache = CacheManager(cache_dir=cache_dir, async_warmup=False)
+    cache.put("preço ideal do produto", "x" * 5000, 100)
+
+    item = next(iter(cache.memory_cache.values()))
+    similar = cache.similarity_cache[cache._hash_query("preço ideal do produto")]
+    assert item['response'] is similar['response']
+    assert cache.get_stats()['interned_responses'] == 1
+
+    cache.invalidate("preço ideal do produto")
+    assert cache.get_stats()['memory_bytes'] == 0
+
+    print("✅ Resposta internada e liberada corretamente")
+
+
+def test_orcamento_de_memoria_em_bytes(cache_dir):
+    """Teste: Orçamento em bytes remove os itens menos recentes"""
+    cache = CacheManager(cache_dir=cache_dir, async_warmup=False, max_memory_bytes=50_000)
+
+    for i in range(10):
+        cache.put(f"consulta grande {i}", str(i) * 10_000, 10)
+
+    stats = cache.get_stats()
+    assert stats['memory_bytes'] <= 50_000
+    assert stats['memory_items'] < 10
+    assert "consulta grande 9" in {i['normalized_query'] for i in cache.memory_cache.values()}
+
+    # Itens removidos da memória continuam disponíveis no disco
+    response, _ = cache.get("consulta grande 0")
+    assert response == "0" * 10_000
+
+    print("✅ Orçamento de memória por bytes respeitado")
+
+
+def test_namespaces_isolam_entradas(cache_dir):
+    """Teste: Mesma pergunta em namespaces diferentes não colide"""
+    cache = CacheManager(cache_dir=cache_dir, async_warmup=False)
+    ns_flash = build_namespace(agent="carlos", model="gemini-flash")
+    ns_pro = build_namespace(agent="carlos", model="gemini-pro")
+
+    cache.put("como precificar produto", "resposta flash", 10, namespace=ns_flash)
+
+    assert cache.get("como precificar produto", namespace=ns_flash)[0] == "resposta flash"
+    assert cache.get("como precificar produto", namespace=ns_pro) == (None, 0)
+    assert cache.get("como precificar produto") == (None, 0)
+
+    print("✅ Namespaces isolados")
+
+
+def test_invalidacao_por_namespace_e_tag(cache_dir):
+    """Teste: Invalidação em massa atinge só a fatia afetada (memória e disco)"""
+    cache = CacheManager(cache_dir=cache_dir, async_warmup=False)
+    ns_carlos = build_namespace(agent="carlos", model="gemini-flash")
+    ns_oraculo = build_namespace(agent="oraculo", model="gemini-flash")
+    ns_novo = build_namespace(agent="carlos", model="gemini-pro")
+
+    cache.put("pergunta um", "r1", 10, namespace=ns_carlos, tags={"precos"})
+    cache.put("pergunta dois", "r2", 10, namespace=ns_oraculo)
+    cache.put("pergunta tres", "r3", 10, namespace=ns_novo)
+    cache.put("pergunta quatro", "r4", 10)
+
+    # Tag derivada do namespace: troca de modelo invalida só "gemini-flash"
+    assert cache.invalidate(tags={"model:gemini-flash"}) == 2
+    assert cache.get("pergunta um", namespace=ns_carlos) == (None, 0)
+    assert cache.get("pergunta dois", namespace=ns_oraculo) == (None, 0)
+    assert cache.get("pergunta tres", namespace=ns_novo)[0] == "r3"
+
+    assert cache.invalidate(namespace=ns_novo) == 1
+    assert cache.get("pergunta quatro")[0] == "r4"
+
+    # Um novo processo também não enxerga a fatia invalidada
+    novo = CacheManager(cache_dir=cache_dir, async_warmup=False)
+    assert novo.get("pergunta tres", namespace=ns_novo) == (None, 0)
+    assert novo.get("pergunta quatro")[0] == "r4"
+
+    print("✅ Invalidação por namespace e tag")
+
+
+def test_namespace_antigo_migra_no_primeiro_hit(cache_dir):
+    """Teste: Entrada do namespace padrão é achada pelo fallback e movida para o novo"""
+    antigo = CacheManager(cache_dir=cache_dir, async_warmup=False)
+    antigo.put("pergunta legada", "resposta legada", 40)
+
+    cache = CacheManager(cache_dir=cache_dir, async_warmup=False)
+    ns = build_namespace(agent="carlos", prompt_version="5.0", user_tier="premium")
+    assert cache.get("pergunta legada", namespace=ns) == (None, 0)
+    assert cache.get("pergunta legada", namespace=ns, fallback_namespace="default") == ("resposta legada", 40)
+
+    # Migrada: responde no namespace novo e saiu do padrão (memória e disco)
+    assert cache.get("pergunta legada", namespace=ns)[0] == "resposta legada"
+    assert cache.get("pergunta legada") == (None, 0)
+    assert cache.invalidate(tags={"tier:premium"}) == 1
+    print("✅ Migração preguiçosa do namespace padrão")
+
+
+def test_invalidar_fatia_durante_warmup_nao_aborta_o_resto(cache_dir, monkeypatch):
+    """Teste: Fatia invalidada no meio do warm-up sai dos lotes; as demais seguem carregando"""
+    import time
+
+    ns_carlos = build_namespace(agent="carlos")
+    ns_oraculo = build_namespace(agent="oraculo")
+    primeiro = CacheManager(cache_dir=cache_dir, async_warmup=False)
+    for i in range(20):
+        primeiro.put(f"pergunta carlos {i}", f"c{i}", 10, namespace=ns_carlos)
+        primeiro.put(f"pergunta oraculo {i}", f"o{i}", 10, namespace=ns_oraculo)
+
+    populate = CacheManager._populate_memory
+
+    def populate_lento(self, batch):
+        time.sleep(0.01)
+        return populate(self, batch)
+
+    monkeypatch.setattr(CacheManager, "_populate_memory", populate_lento)
+    cache = CacheManager(cache_dir=cache_dir, warmup_batch_size=2)
+    time.sleep(0.03)
+    cache.invalidate(namespace=ns_oraculo)
+    assert cache.wait_until_warm(timeout=5)
+
+    assert len(cache._namespace_index.get(ns_carlos, ())) == 20
+    assert ns_oraculo not in cache._namespace_index
+    assert cache.get("pergunta oraculo 19", namespace=ns_oraculo) == (None, 0)
+    print("✅ Invalidação de fatia preserva o warm-up das outras")
+
+
+def test_snapshot_exporta_mais_quentes_e_aquece_no_novo(tmp_path):
+    """Teste: Snapshot leva as entradas mais quentes para um nó novo"""
+    # Camada de memória padrão: os hits servidos por ela também contam no calor
+    origem = CacheManager(cache_dir=str(tmp_path / "origem"), async_warmup=False)
+    ns = build_namespace(agent="carlos", model="gemini-flash")
+
+    origem.put("pergunta barata", "r1", 200, namespace=ns)
+    origem.put("pergunta cara", "r2", 500, namespace=ns, tags={"precos"})
+    origem.put("pergunta popular", "r3", 100, namespace=ns)
+    for _ in range(10):
+        origem.get("pergunta popular", namespace=ns)
+
+    snapshot = str(tmp_path / "cache_snapshot.json.gz")
+    assert origem.export_snapshot(snapshot, max_entries=2) == 2
+
+    destino = CacheManager(cache_dir=str(tmp_path / "destino"), async_warmup=False)
+    assert destino.import_snapshot(snapshot) == 2
+
+    # Já em memória, inclusive índice de similaridade
+    assert destino.get_stats()['memory_items'] == 2
+    assert destino.get("pergunta popular", namespace=ns)[0] == "r3"
+    assert destino.get("pergunta cara", namespace=ns)[0] == "r2"
+    assert destino.get("pergunta barata", namespace=ns) == (None, 0)
+
+    # Tags sobrevivem ao snapshot
+    assert destino.invalidate(tags={"precos"}) == 1
+
+    print("✅ Snapshot exportado e importado com entradas quentes")
+
+
+def test_snapshot_nao_sobrescreve_entradas_locais(tmp_path):
+    """Teste: Importar snapshot não troca resposta nem soma tags de entradas já existentes"""
+    origem = CacheManager(cache_dir=str(tmp_path / "origem"), async_warmup=False)
+    origem.put("pergunta comum", "resposta antiga", 50, tags={"snapshot"})
+    origem.put("pergunta nova", "r-nova", 50)
+    snapshot = str(tmp_path / "cache_snapshot.json.gz")
+    origem.export_snapshot(snapshot)
+
+    destino = CacheManager(cache_dir=str(tmp_path / "destino"), async_warmup=False)
+    destino.put("pergunta comum", "resposta local", 50, tags={"local"})
+
+    assert destino.import_snapshot(snapshot) == 1
+    assert destino.get("pergunta comum")[0] == "resposta local"
+    assert destino.get("pergunta nova")[0] == "r-nova"
+    assert destino.invalidate(tags={"snapshot"}) == 0
+
+    # Reabrindo, o disco também manteve a versão local
+    reaberto = CacheManager(cache_dir=str(tmp_path / "destino"), async_warmup=False)
+    assert reaberto.get("pergunta comum")[0] == "resposta local"
+    print("✅ Snapshot respeita entradas locais")
+
+
+def test_snapshot_versao_invalida(tmp_path):
+    """Teste: Snapshot de versão futura é rejeitado"""
+    import gzip
+    import json
+
+    path = tmp_path / "futuro.json.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump({"format": "gptma-cache-snapshot", "version": 99, "entries": []}, f)
+
+    cache = CacheManager(cache_dir=str(tmp_path / "cache"), async_warmup=False)
+    with pytest.raises(ValueError):
+        cache.import_snapshot(str(path))
+
+    print("✅ Versão de snapshot validada")
@@ -0,0 +1,116 @@
+"""
+Testes da execução paralela especulativa do Carlos (agents/carlos.py)
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+import utils.adaptive_timeouts as adaptive_timeouts
+from agents.carlos import CarlosMaestroV5, RegraSuficiencia
+from utils.agent_wake_manager import AgentExecutionResult, AgentStatus
+from utils.cancellation import raise_if_cancelled
+
+
+@pytest.fixture
+def carlos(tmp_path, monkeypatch):
+    """Carlos sem inicialização completa: só o necessário para o fan-out paralelo"""
+    monkeypatch.setattr(
+        adaptive_timeouts, "_timeout_registry",
+        adaptive_timeouts.AdaptiveTimeoutRegistry(path=str(tmp_path / "timeouts.json"))
+    )
+    instancia = CarlosMaestroV5.__new__(CarlosMaestroV5)
+    instancia.modo_especulativo = True
+    instancia.regra_suficiencia = RegraSuficiencia()
+    instancia.resultados_tardios = []
+    instancia.stats_especulativo = {
+        "execucoes": 0, "encerradas_cedo": 0, "retardatarios_cancelados": 0, "resultados_tardios": 0
+    }
+    instancia._lock_especulativo = threading.Lock()
+    instancia._resposta_direta_maestro = lambda mensagem: "direta"
+    return instancia
+
+
+def _agentes_fake(atrasos, cancelados):
+    def executar(mensagem, agente):
+        limite = time.time() + atrasos[agente]
+        while time.time() < limite:
+            try:
+                raise_if_cancelled()
+            except Exception:
+                cancelados.append(agente)
+                raise
+            time.sleep(0.01)
+        return f"resposta do {agente} com detalhes"
+    return executar
+
+
+def test_oraculo_basta_e_retardatarios_sao_cancelados(carlos):
+    """Teste: Resposta sai quando o Oráculo termina, sem esperar o agente lento"""
+    cancelados = []
+    carlos._executar_agente_thread_safe = _agentes_fake(
+        {"oraculo": 0.05, "supervisor": 0.02, "deepagent": 2.0}, cancelados
+    )
+
+    inicio = time.time()
+    resposta = carlos._executar_paralelo_real("pergunta", ["oraculo", "supervisor", "deepagent"])
+
+    assert resposta == "resposta do oraculo com detalhes"
+    assert time.time() - inicio < 1.0
+    assert carlos.stats_especulativo["encerradas_cedo"] == 1
+    assert carlos.stats_especulativo["retardatarios_cancelados"] == 1
+
+    time.sleep(0.2)
+    assert cancelados == ["deepagent"]
+    print("✅ Oráculo suficiente encerra a espera e cancela retardatários")
+
+
+def test_quorum_com_resultados_tardios_anexados(carlos):
+    """Teste: Quorum de 2 responde cedo e o terceiro agente é anexado depois"""
+    carlos._executar_agente_thread_safe = _agentes_fake(
+        {"supervisor": 0.02, "psymind": 0.05, "automaster": 0.4}, []
+    )
+    regra = RegraSuficiencia(agentes_suficientes=[], quorum=2, anexar_tardios=True)
+
+    inicio = time.time()
+    resposta = carlos._executar_paralelo_real("pergunta", ["supervisor", "psymind", "automaster"], regra)
+
+    assert time.time() - inicio < 0.35
+    assert "Supervisor" in resposta and "Psymind" in resposta
+    assert "Automaster" not in resposta
+
+    time.sleep(0.6)
+    tardios = carlos.obter_resultados_tardios()
+    assert [t["agente"] for t in tardios] == ["automaster"]
+    assert carlos.stats_especulativo["resultados_tardios"] == 1
+    print("✅ Quorum responde cedo e anexa resultado tardio")
+
+
+def test_quorum_espera_agente_suficiente_em_andamento():
+    """Teste: Quorum atingido não encerra enquanto o Oráculo ainda está rodando"""
+    regra = RegraSuficiencia(quorum=2)
+
+    assert not regra.satisfeita({"supervisor": "a", "psymind": "b"}, ["oraculo"])
+    assert regra.satisfeita({"supervisor": "a", "psymind": "b"}, ["deepagent"])
+    assert regra.satisfeita({"oraculo": "c"}, ["supervisor"])
+    assert not RegraSuficiencia().satisfeita({"supervisor": "a"}, ["deepagent"])
+    print("✅ Regra de suficiência respeita agentes prioritários")
+
+
+def test_stream_paralelo_entrega_cada_agente_e_a_sintese(carlos):
+    """Teste: O stream assíncrono entrega cada agente ao terminar e a síntese por último"""
+    carlos.modo_especulativo = False
+    carlos._executar_agente_thread_safe = _agentes_fake({"supervisor": 0.02, "psymind": 0.2}, [])
+
+    async def consumir():
+        return [item async for item in carlos.executar_paralelo_stream("pergunta", ["psymind", "supervisor"])]
+
+    itens = asyncio.run(consumir())
+
+    assert [i.agent_name for i in itens[:-1]] == ["supervisor", "psymind"]
+    assert all(isinstance(i, AgentExecutionResult) and i.status == AgentStatus.COMPLETED for i in itens[:-1])
+    assert itens[0].execution_time < itens[1].execution_time
+    assert "Supervisor" in itens[-1] and "Psymind" in itens[-1]
+    print("✅ Stream paralelo do Carlos progressivo")
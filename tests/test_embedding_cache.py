@@ -0,0 +1,101 @@
+"""
+Testes do cache de embeddings (memory/embedding_cache.py)
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from memory.embedding_cache import EmbeddingCache, CachedEmbeddingModel
+
+
+class FakeModel:
+    """Modelo de embedding determinístico que conta textos codificados"""
+
+    def __init__(self, dim=8):
+        self.dim = dim
+        self.encoded = []
+
+    def encode(self, sentences, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else sentences
+        self.encoded.extend(texts)
+        vectors = np.stack([
+            np.random.default_rng(abs(hash(text)) % (2 ** 32)).standard_normal(self.dim)
+            for text in texts
+        ]).astype(np.float32)
+        return vectors[0] if single else vectors
+
+
+def test_repeticao_vira_leitura_do_cache(tmp_path):
+    """Teste: Texto repetido não passa de novo pelo modelo"""
+    model = FakeModel()
+    cached = CachedEmbeddingModel(model, EmbeddingCache(cache_dir=str(tmp_path), capacity=100))
+
+    primeiro = cached.encode(["como precificar", "como precificar", "frete grátis"])
+    assert model.encoded == ["como precificar", "frete grátis"]
+
+    segundo = cached.encode("como precificar")
+    assert model.encoded == ["como precificar", "frete grátis"]
+    assert segundo.shape == (8,)
+    np.testing.assert_allclose(segundo, primeiro[0], atol=1e-2)
+
+    print("✅ Embeddings memoizados")
+
+
+def test_cache_persiste_entre_processos(tmp_path):
+    """Teste: Vetores sobrevivem à reabertura do cache"""
+    cache = EmbeddingCache(cache_dir=str(tmp_path), capacity=100)
+    CachedEmbeddingModel(FakeModel(), cache).encode(["texto persistido"])
+    cache.flush()
+
+    model = FakeModel()
+    reaberto = CachedEmbeddingModel(model, EmbeddingCache(cache_dir=str(tmp_path), capacity=100))
+    reaberto.encode(["texto persistido"])
+    assert model.encoded == []
+
+    print("✅ Cache de embeddings persistente")
+
+
+def test_capacidade_limitada_com_clock(tmp_path):
+    """Teste: Cache cheio substitui linhas não lidas recentemente"""
+    cache = EmbeddingCache(cache_dir=str(tmp_path), capacity=4)
+    model = FakeModel()
+    cached = CachedEmbeddingModel(model, cache)
+
+    cached.encode(["a", "b", "c", "d"])
+    cached.encode(["a"])              # "a" ganha segunda chance
+    cached.encode(["e"])
+
+    stats = cache.get_stats()
+    assert stats["entries"] == 4
+    assert stats["evictions"] == 1
+
+    model.encoded.clear()
+    cached.encode(["a"])
+    assert model.encoded == []
+
+    print("✅ Capacidade respeitada (CLOCK)")
+
+
+def test_cache_global_por_modelo_e_por_processo_escritor(tmp_path, monkeypatch):
+    """Teste: Cada modelo tem seu cache e um segundo dono não reaproveita o diretório travado"""
+    import memory.embedding_cache as embedding_cache
+
+    monkeypatch.setattr(embedding_cache, "EMBEDDING_CACHE_ROOT", str(tmp_path))
+    monkeypatch.setattr(embedding_cache, "_embedding_caches", {})
+
+    mini = embedding_cache.get_embedding_cache("all-MiniLM-L6-v2")
+    outro = embedding_cache.get_embedding_cache("org/outro-modelo")
+
+    assert embedding_cache.get_embedding_cache("all-MiniLM-L6-v2") is mini
+    assert outro is not mini and outro.model_name == "org/outro-modelo"
+    assert mini.cache_dir.parent == tmp_path / "all-MiniLM-L6-v2"
+    assert outro.cache_dir.parent == tmp_path / "org_outro-modelo"
+
+    # Outro processo (trava já tomada) fica com um diretório próprio
+    if embedding_cache.FCNTL_AVAILABLE:
+        segundo = embedding_cache._claim_cache_dir(tmp_path / "all-MiniLM-L6-v2")
+        assert segundo != mini.cache_dir
+
+    print("✅ Cache de embeddings por modelo e por dono")
@@ -0,0 +1,63 @@
+"""
+Testes do serviço de executores compartilhados (utils/executor_service.py)
+"""
+
+import threading
+import time
+
+import pytest
+
+from utils.executor_service import ExecutorService, ExecutorServiceShutdown
+
+
+def test_pool_limita_concorrencia_e_mede_fila():
+    """Teste: Tarefas além do limite esperam na fila e aparecem nas métricas"""
+    service = ExecutorService(pool_sizes={"llm": 2, "cpu": 1, "io": 1})
+    liberar = threading.Event()
+    em_execucao = []
+    pico = [0]
+    lock = threading.Lock()
+
+    def tarefa():
+        with lock:
+            em_execucao.append(1)
+            pico[0] = max(pico[0], len(em_execucao))
+        liberar.wait(timeout=5)
+        with lock:
+            em_execucao.pop()
+        return "ok"
+
+    futuros = [service.submit("llm", tarefa) for _ in range(6)]
+    time.sleep(0.1)
+
+    stats = service.get_stats()["llm"]
+    assert stats["active"] == 2
+    assert stats["queue_depth"] == 4
+    assert stats["peak_queue_depth"] >= 4
+
+    liberar.set()
+    assert [f.result(timeout=5) for f in futuros] == ["ok"] * 6
+    assert pico[0] == 2
+    assert service.get_stats()["llm"]["completed"] == 6
+    assert service.get_stats()["llm"]["queue_depth"] == 0
+    service.shutdown()
+
+    print("✅ Pool limitado com métricas de fila")
+
+
+def test_shutdown_gracioso():
+    """Teste: Shutdown espera as em execução, cancela as da fila e recusa novas"""
+    service = ExecutorService(pool_sizes={"llm": 1, "cpu": 1, "io": 1})
+    em_andamento = service.submit("io", time.sleep, 0.2)
+    na_fila = service.submit("io", time.sleep, 0.2)
+    time.sleep(0.05)
+
+    assert service.shutdown(timeout=2)
+    assert em_andamento.done() and not em_andamento.cancelled()
+    assert na_fila.cancelled()
+    assert service.get_stats()["io"]["cancelled"] == 1
+
+    with pytest.raises(ExecutorServiceShutdown):
+        service.submit("io", time.sleep, 0)
+
+    print("✅ Encerramento gracioso")
@@ -0,0 +1,88 @@
+"""
+Testes do escalonador justo por usuário (utils/fair_scheduler.py)
+"""
+
+import asyncio
+
+from utils.fair_scheduler import FairShareScheduler
+
+
+def test_usuario_leve_nao_espera_rajada_do_pesado():
+    """Teste: Requisições pesadas em sequência não seguram o usuário leve atrás delas"""
+    async def cenario():
+        scheduler = FairShareScheduler(max_concurrent=1, per_user_limit=1)
+        ordem = []
+
+        pesado = [scheduler.enqueue("pesado") for _ in range(4)]
+        leve = scheduler.enqueue("leve")
+
+        pendentes = pesado + [leve]
+        while pendentes:
+            atual = next(t for t in pendentes if t.granted)
+            ordem.append(atual.user_id)
+            pendentes.remove(atual)
+            if atual.user_id == "pesado":
+                atual.granted_at -= 5  # Simula execução de 5s
+            scheduler.release(atual)
+
+        return ordem
+
+    ordem = asyncio.run(cenario())
+
+    assert ordem.index("leve") <= 1
+    assert ordem.count("pesado") == 4
+    print("✅ Deficit round-robin intercala o usuário leve")
+
+
+def test_limite_por_usuario_e_posicao_na_fila():
+    """Teste: Cada usuário tem no máximo per_user_limit em andamento e recebe posição na fila"""
+    async def cenario():
+        scheduler = FairShareScheduler(max_concurrent=4, per_user_limit=2)
+        tickets = [scheduler.enqueue("ana") for _ in range(3)]
+        outro = scheduler.enqueue("bruno")
+
+        assert [t.granted for t in tickets] == [True, True, False]
+        assert outro.granted
+        assert scheduler.queue_position(tickets[2]) == 1
+
+        posicoes = []
+
+        async def avisar(posicao):
+            posicoes.append(posicao)
+
+        espera = asyncio.create_task(scheduler.wait(tickets[2], poll=0.05, on_position=avisar))
+        await asyncio.sleep(0.1)
+        assert not espera.done()
+
+        scheduler.release(tickets[0])
+        await asyncio.wait_for(espera, timeout=1)
+        assert tickets[2].granted
+        assert posicoes == [1]
+        return scheduler.get_stats()
+
+    stats = asyncio.run(cenario())
+    assert stats["granted"] == 4 and stats["queue_depth"] == 0
+    print("✅ Limite por usuário e feedback de posição")
+
+
+def test_espera_cancelada_sai_da_fila():
+    """Teste: Sessão que desiste da espera libera o lugar na fila"""
+    async def cenario():
+        scheduler = FairShareScheduler(max_concurrent=1, per_user_limit=1)
+        ocupando = scheduler.enqueue("ana")
+        espera = asyncio.create_task(scheduler.acquire("bruno"))
+        await asyncio.sleep(0.05)
+
+        espera.cancel()
+        try:
+            await espera
+        except asyncio.CancelledError:
+            pass
+
+        assert scheduler.get_stats()["queue_depth"] == 0
+        scheduler.release(ocupando)
+        return scheduler.get_stats()
+
+    stats = asyncio.run(cenario())
+    assert stats["cancelled"] == 1 and stats["in_flight"] == 0
+    print("✅ Espera cancelada removida da fila justa")
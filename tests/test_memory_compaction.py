@@ -0,0 +1,121 @@
+"""
+Testes do job de compactação das conversas (memory/compaction.py)
+Usam o índice NumPy e um modelo de embedding determinístico
+"""
+
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from memory.compaction import ConversationCompactor
+from tests.test_vector_store import _manager_com_modelo_fake
+
+
+def _adicionar(manager, particao, doc_id, texto, sessao, ts, **extra):
+    manager._collection(particao).add(
+        documents=[texto],
+        embeddings=[manager.embedding_model.encode(texto).tolist()],
+        metadatas=[{"session_id": sessao, "agent": "Carlos", "ts": ts, **extra}],
+        ids=[doc_id]
+    )
+
+
+def test_compactacao_deduplica_e_remove_payload(tmp_path, monkeypatch):
+    """Teste: Quase-duplicatas da sessão viram uma e a metadata perde o texto repetido"""
+    manager = _manager_com_modelo_fake(tmp_path, monkeypatch, np)
+    agora = time.time()
+    particao = "conversations_209901"
+
+    _adicionar(manager, particao, "a", "preço do patinho amarelo", "s1", agora - 30,
+               user_input="preço do patinho amarelo", assistant_response="...")
+    _adicionar(manager, particao, "b", "preço do patinho amarelo", "s1", agora - 20)
+    _adicionar(manager, particao, "c", "preço do patinho amarelo", "s2", agora - 10)
+    _adicionar(manager, particao, "d", "frete para o nordeste", "s1", agora)
+
+    relatorio = manager.compact(similarity_threshold=0.95, max_age_days=None)
+    assert relatorio["merged"] == 1
+    assert relatorio["partitions_rebuilt"] == 1
+
+    dados = manager._partitions[particao].get(include=["metadatas"])
+    assert sorted(dados["ids"]) == ["b", "c", "d"]  # Fica a mais recente da sessão s1
+    metadatas = dict(zip(dados["ids"], dados["metadatas"]))
+    assert metadatas["b"]["duplicates"] == 1
+    assert all("user_input" not in m for m in metadatas.values())
+
+    # Coleção reconstruída segue servindo o recall e sem sobras da troca
+    assert "frete para o nordeste" in manager.recall_context("frete nordeste", session_id="s1")
+    assert not (tmp_path / "db" / "numpy_index" / ("tmpcompact_" + particao)).exists()
+
+    # Segunda rodada não tem o que fazer
+    assert manager.compact(max_age_days=None)["partitions_rebuilt"] == 0
+    manager.shutdown()
+
+    print("✅ Deduplicação e metadata enxuta")
+
+
+def test_compactacao_aplica_retencao(tmp_path, monkeypatch):
+    """Teste: Partições antigas somem inteiras e cada sessão mantém só as mais recentes"""
+    manager = _manager_com_modelo_fake(tmp_path, monkeypatch, np)
+    agora = time.time()
+
+    _adicionar(manager, "conversations_201001", "velha", "conversa antiga", "s1", 1262304000.0)
+    for i in range(5):
+        _adicionar(manager, "conversations_209901", f"n{i}", f"assunto numero{i} distinto{i * 7}", "s1", agora + i)
+
+    relatorio = manager.compact(max_age_days=365, max_per_session=3)
+    assert relatorio["partitions_dropped"] == 1
+    assert relatorio["over_quota"] == 2
+    assert "conversations_201001" not in manager._partitions
+
+    restantes = manager._partitions["conversations_209901"].get()["ids"]
+    assert sorted(restantes) == ["n2", "n3", "n4"]
+    assert manager.get_stats()["last_compaction"]["documents_after"] == 3
+    manager.shutdown()
+
+    print("✅ Retenção por idade e por sessão")
+
+
+def test_sobra_de_compactacao_nao_vira_particao(tmp_path, monkeypatch):
+    """Teste: Coleção temporária de uma compactação interrompida é apagada ao abrir a memória"""
+    manager = _manager_com_modelo_fake(tmp_path, monkeypatch, np)
+    _adicionar(manager, "conversations_209901", "a", "conversa mantida", "s1", time.time())
+    manager.client.create_collection("tmpcompact_conversations_209901")
+    manager.client.create_collection("tmpcompact_conversations")
+    manager.shutdown()
+
+    reaberto = _manager_com_modelo_fake(tmp_path, monkeypatch, np)
+    assert sorted(reaberto._partitions) == ["conversations_209901"]
+    assert not any(nome.startswith("tmpcompact_") for nome in reaberto.client.list_collections())
+    reaberto.shutdown()
+
+    print("✅ Sobras da compactação removidas na abertura")
+
+
+def test_queda_entre_apagar_e_renomear_promove_temporaria(tmp_path, monkeypatch):
+    """Teste: Original apagada e temporária ainda sem renomear - a abertura conclui a troca"""
+    manager = _manager_com_modelo_fake(tmp_path, monkeypatch, np)
+    particao = "conversations_209901"
+    _adicionar(manager, particao, "a", "conversa compactada", "s1", time.time())
+    for temporaria, doc_id, texto in (("tmpcompact_" + particao, "a", "conversa compactada"),
+                                      ("tmpcompact_conversations", "legado", "conversa legada")):
+        manager.client.create_collection(temporaria).add(
+            documents=[texto],
+            embeddings=[manager.embedding_model.encode(texto).tolist()],
+            metadatas=[{"session_id": "s1", "agent": "Carlos", "ts": time.time()}],
+            ids=[doc_id]
+        )
+
+    # Crash simulado: delete_collection rodou, modify(name=...) não
+    manager.client.delete_collection(particao)
+    manager.client.delete_collection("conversations")
+    manager.shutdown()
+
+    reaberto = _manager_com_modelo_fake(tmp_path, monkeypatch, np)
+    assert reaberto._partitions[particao].get()["ids"] == ["a"]
+    assert reaberto.conversations.get()["ids"] == ["legado"]
+    assert not any(nome.startswith("tmpcompact_") for nome in reaberto.client.list_collections())
+    reaberto.shutdown()
+
+    print("✅ Troca interrompida concluída sem perder a partição")
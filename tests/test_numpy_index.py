@@ -0,0 +1,167 @@
+"""
+Testes do índice vetorial em NumPy (fallback sem ChromaDB)
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from memory.numpy_index import NumpyVectorCollection, NumpyVectorStore, match_where
+
+
+def _vetores(n, dim=16, seed=0):
+    return np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+
+
+def _adicionar(colecao, vetores, inicio=0):
+    n = len(vetores)
+    colecao.add(
+        documents=[f"doc {inicio + i}" for i in range(n)],
+        embeddings=vetores.tolist(),
+        metadatas=[{"session_id": f"s{(inicio + i) % 3}", "ordem": inicio + i} for i in range(n)],
+        ids=[f"id{inicio + i}" for i in range(n)]
+    )
+
+
+def test_busca_exata_e_filtros(tmp_path):
+    """Teste: Top-k exato por cosseno com filtro de metadata"""
+    colecao = NumpyVectorCollection("conversations", str(tmp_path), initial_capacity=8)
+    vetores = _vetores(50)
+    _adicionar(colecao, vetores)
+
+    resultado = colecao.query(query_embeddings=[vetores[7].tolist()], n_results=3)
+    assert resultado["ids"][0][0] == "id7"
+    assert resultado["distances"][0][0] == pytest.approx(0.0, abs=1e-5)
+    assert resultado["distances"][0] == sorted(resultado["distances"][0])
+
+    filtrado = colecao.query(query_embeddings=[vetores[7].tolist()], n_results=5,
+                             where={"session_id": "s2"})
+    assert all(m["session_id"] == "s2" for m in filtrado["metadatas"][0])
+    assert "id7" not in filtrado["ids"][0]
+
+    assert colecao.count() == 50
+
+    print("✅ Busca exata com filtros")
+
+
+def test_persistencia_em_memmap(tmp_path):
+    """Teste: Coleção reabre a partir do .npy e do sidecar"""
+    store = NumpyVectorStore(str(tmp_path))
+    colecao = store.create_collection("learnings")
+    vetores = _vetores(20)
+    _adicionar(colecao, vetores)
+    _adicionar(colecao, vetores[:5])  # ids repetidos ignorados
+
+    reaberta = NumpyVectorStore(str(tmp_path)).get_collection("learnings")
+    assert reaberta.count() == 20
+    resultado = reaberta.query(query_embeddings=[vetores[3].tolist()], n_results=1)
+    assert resultado["ids"] == [["id3"]]
+    assert resultado["metadatas"][0][0]["ordem"] == 3
+
+    with pytest.raises(ValueError):
+        NumpyVectorStore(str(tmp_path)).get_collection("inexistente")
+
+    print("✅ Persistência em memmap")
+
+
+def test_cauda_cortada_e_descartada_antes_do_proximo_add(tmp_path):
+    """Teste: Linha quebrada no fim do sidecar não engole os registros gravados depois"""
+    colecao = NumpyVectorCollection("conversations", str(tmp_path), initial_capacity=8)
+    vetores = _vetores(5)
+    _adicionar(colecao, vetores[:3])
+
+    # Queda no meio da gravação do registro seguinte
+    with open(tmp_path / "records.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"id": "id3", "document": "doc')
+
+    reaberta = NumpyVectorCollection("conversations", str(tmp_path))
+    assert reaberta.count() == 3
+    _adicionar(reaberta, vetores[3:], inicio=3)
+
+    final = NumpyVectorCollection("conversations", str(tmp_path))
+    assert final.count() == 5
+    assert final.ids == [f"id{i}" for i in range(5)]
+    resultado = final.query(query_embeddings=[vetores[4].tolist()], n_results=1)
+    assert resultado["ids"] == [["id4"]]
+
+    print("✅ Cauda cortada descartada no load")
+
+
+def test_ivf_mantem_recall(tmp_path):
+    """Teste: Busca IVF acima do limiar encontra os vizinhos da busca exata"""
+    dados = _vetores(3000, dim=32, seed=1)
+    exata = NumpyVectorCollection("exata", str(tmp_path / "exata"), ivf_threshold=10 ** 9)
+    ivf = NumpyVectorCollection("ivf", str(tmp_path / "ivf"), ivf_threshold=1000, n_probe=16)
+    _adicionar(exata, dados)
+    _adicionar(ivf, dados)
+    assert ivf._centroids is not None
+
+    consultas = dados[:50] + 0.1 * _vetores(50, dim=32, seed=2)
+    acertos = 0
+    for consulta in consultas:
+        esperado = set(exata.query(query_embeddings=[consulta.tolist()], n_results=10)["ids"][0])
+        obtido = set(ivf.query(query_embeddings=[consulta.tolist()], n_results=10)["ids"][0])
+        acertos += len(esperado & obtido)
+
+    assert acertos / (50 * 10) > 0.6
+
+    print(f"✅ IVF recall@10 = {acertos / 500:.2f}")
+
+
+def test_match_where_operadores():
+    """Teste: Operadores de filtro no formato do ChromaDB"""
+    meta = {"agent": "Carlos", "ts": 10}
+    assert match_where(meta, {"agent": "Carlos"})
+    assert match_where(meta, {"ts": {"$gte": 10}})
+    assert not match_where(meta, {"ts": {"$gt": 10}})
+    assert match_where(meta, {"$or": [{"agent": "Oraculo"}, {"ts": {"$lt": 20}}]})
+    assert not match_where(meta, {"$and": [{"agent": "Carlos"}, {"agent": {"$nin": ["Carlos"]}}]})
+
+    print("✅ Operadores de filtro")
+
+
+def test_quantizacao_com_rerank(tmp_path):
+    """Teste: Modos int8/float16 reproduzem a busca exata e sobrevivem à reabertura"""
+    dados = _vetores(2000, dim=64, seed=3)
+    exata = NumpyVectorCollection("exata", str(tmp_path / "exata"))
+    _adicionar(exata, dados)
+    consultas = dados[:30] + 0.05 * _vetores(30, dim=64, seed=4)
+    esperado = exata.query(query_embeddings=consultas.tolist(), n_results=10, include=[])["ids"]
+
+    for modo in ("int8", "float16"):
+        colecao = NumpyVectorCollection(modo, str(tmp_path / modo), quantization=modo)
+        _adicionar(colecao, dados)
+        assert colecao.bytes_per_vector() < exata.bytes_per_vector()
+        assert colecao.disk_bytes_per_vector() == exata.disk_bytes_per_vector() + colecao.bytes_per_vector()
+        assert colecao.query(query_embeddings=consultas.tolist(), n_results=10, include=[])["ids"] == esperado
+
+    # Ligar a quantização numa coleção existente gera os códigos na abertura
+    reaberta = NumpyVectorCollection("exata", str(tmp_path / "exata"), quantization="int8")
+    assert (tmp_path / "exata" / "codes.npy").exists()
+    assert reaberta.query(query_embeddings=consultas.tolist(), n_results=10, include=[])["ids"] == esperado
+
+    with pytest.raises(ValueError):
+        NumpyVectorCollection("x", str(tmp_path / "x"), quantization="int4")
+
+    print("✅ Busca quantizada com re-ranking exato")
+
+
+def test_filtro_indexado_por_sessao(tmp_path):
+    """Teste: Filtro por session_id usa o índice invertido e varre só a partição"""
+    colecao = NumpyVectorCollection("conversations", str(tmp_path), ivf_threshold=200)
+    dados = _vetores(600, dim=16, seed=5)
+    _adicionar(colecao, dados)
+    assert colecao._centroids is not None
+
+    permitidas = colecao._allowed_rows({"$and": [{"session_id": "s1"}, {"ordem": {"$lt": 300}}]})
+    assert permitidas.sum() == 100
+    assert set(colecao._field_index["session_id"]) == {"s0", "s1", "s2"}
+
+    # Partição filtrada menor que o limiar do IVF: busca exata, acha o próprio vetor
+    resultado = colecao.query(query_embeddings=[dados[4].tolist()], n_results=1, where={"session_id": "s1"})
+    assert resultado["ids"] == [["id4"]]
+
+    reaberta = NumpyVectorCollection("conversations", str(tmp_path), ivf_threshold=200)
+    assert len(reaberta._field_index["session_id"]["s2"]) == 200
+
+    print("✅ Filtro indexado por sessão")
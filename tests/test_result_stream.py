@@ -0,0 +1,51 @@
+"""
+Testes do stream assíncrono de resultados (utils/result_stream.py)
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from utils.result_stream import stream_from_thread
+
+
+def _executar(etapas, on_result=None):
+    for etapa in etapas:
+        time.sleep(0.05)
+        on_result(etapa)
+    return "final"
+
+
+def test_itens_chegam_antes_do_fim_e_retorno_por_ultimo():
+    """Teste: Cada item sai assim que emitido e o retorno da função fecha o stream"""
+    async def consumir():
+        recebidos = []
+        inicio = time.monotonic()
+        async for item in stream_from_thread(_executar, ["a", "b", "c"]):
+            recebidos.append((item, time.monotonic() - inicio))
+        return recebidos
+
+    recebidos = asyncio.run(consumir())
+
+    assert [item for item, _ in recebidos] == ["a", "b", "c", "final"]
+    assert recebidos[0][1] < recebidos[2][1]
+    assert recebidos[0][1] < 0.14
+    print("✅ Stream entrega itens progressivamente")
+
+
+def test_excecao_da_thread_chega_ao_consumidor():
+    """Teste: Erro na execução é relançado depois dos itens já emitidos"""
+    def falhar(on_result=None):
+        on_result("parcial")
+        raise ValueError("quebrou")
+
+    async def consumir(recebidos):
+        async for item in stream_from_thread(falhar):
+            recebidos.append(item)
+
+    recebidos = []
+    with pytest.raises(ValueError):
+        asyncio.run(consumir(recebidos))
+    assert recebidos == ["parcial"]
+    print("✅ Exceção propagada pelo stream")
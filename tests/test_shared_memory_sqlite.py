@@ -0,0 +1,113 @@
+"""
+Testes do backend SQLite da memória compartilhada
+Verifica a mesma API do SharedMemorySystem e o compartilhamento entre processos
+"""
+
+import multiprocessing
+import pytest
+
+from utils.shared_memory_sqlite import SQLiteSharedMemory
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Arquivo SQLite isolado por teste"""
+    return str(tmp_path / "shared_memory.db")
+
+
+def test_api_igual_ao_backend_em_memoria(db_path):
+    """Teste: Store, retrieve, busca ranqueada e permissões"""
+    memory = SQLiteSharedMemory(db_path=db_path)
+
+    memory.store_memory("deepagent", "research_patinhos",
+                        "pesquisa mercado patinhos decorativos shopee",
+                        share_with={"scout"}, tags={"research"})
+    memory.store_memory("scout", "geral", "relatorio geral vendas loja")
+
+    assert memory.retrieve_memory("deepagent", "research_patinhos") == \
+        "pesquisa mercado patinhos decorativos shopee"
+
+    encontrados = memory.search_shared_memory("scout", "patinhos decorativos")
+    assert [(key, owner) for key, _, owner in encontrados] == [("research_patinhos", "deepagent")]
+    assert memory.search_shared_memory("psymind", "patinhos decorativos") == []
+
+    # Busca só por tag
+    assert [k for k, _, _ in memory.search_shared_memory("scout", "xyz", tags={"research"})] == \
+        ["research_patinhos"]
+
+    assert memory.get_system_stats()["total_memory_entries"] == 2
+
+    print("✅ API do backend SQLite funcionando")
+
+
+def test_economia_estimada_so_do_top_k(db_path):
+    """Teste: tokens_saved cresce com os resultados retornados, não com os candidatos"""
+    memory = SQLiteSharedMemory(db_path=db_path)
+    for i in range(5):
+        memory.store_memory("scout", f"k{i}", f"analise mercado item{i}")
+
+    assert len(memory.search_shared_memory("scout", "analise mercado", top_k=2)) == 2
+    assert memory.stats["tokens_saved"] == 2 * 50
+
+    print("✅ Economia estimada só do top-k")
+
+
+def test_versao_invalida_cache_de_outra_instancia(db_path):
+    """Teste: Escrita de um worker invalida o cache local do outro"""
+    worker_a = SQLiteSharedMemory(db_path=db_path)
+    worker_b = SQLiteSharedMemory(db_path=db_path)
+
+    chave = worker_a.store_memory("oraculo", "decisao", "investir em marketing digital")
+
+    # Sem shared_with a memória vale para todos; o B lê e guarda no cache local
+    assert [k for k, _, _ in worker_b.search_shared_memory("carlos", "marketing digital")] == ["decisao"]
+
+    # Restringir no A precisa valer no B, mesmo com a busca em cache
+    worker_a.share_memory_with_agents(chave, {"scout"})
+    assert worker_b.search_shared_memory("carlos", "marketing digital") == []
+    assert [k for k, _, _ in worker_b.search_shared_memory("scout", "marketing digital")] == ["decisao"]
+
+    print("✅ Cache local invalidado por versão")
+
+
+def test_expiracao_e_capacidade(db_path):
+    """Teste: Expiradas somem e capacidade é respeitada removendo menor valor"""
+    memory = SQLiteSharedMemory(db_path=db_path, max_memory_items=10, cleanup_interval=0)
+
+    memory.store_memory("scout", "efemero", "cotacao instantanea frete", ttl_seconds=-1)
+    assert memory.retrieve_memory("scout", "efemero") is None
+
+    memory.store_memory("oraculo", "estrategia", "estrategia anual", is_high_value=True)
+    for i in range(20):
+        memory.store_memory("scout", f"k{i}", f"registro descartavel item{i}")
+
+    stats = memory.get_system_stats()
+    assert stats["total_memory_entries"] <= 10
+    assert memory.retrieve_memory("oraculo", "estrategia") == "estrategia anual"
+    assert memory.search_shared_memory("scout", "item0") == []
+
+    print("✅ Expiração e capacidade no SQLite")
+
+
+def _worker_grava(db_path, agent_id):
+    memory = SQLiteSharedMemory(db_path=db_path)
+    for i in range(20):
+        memory.store_memory(f"agente_{agent_id}", f"k{i}", f"analise compartilhada {agent_id} item{i}")
+    memory.shutdown()
+
+
+def test_processos_compartilham_memoria(db_path):
+    """Teste: Memórias gravadas por outros processos são visíveis"""
+    processos = [multiprocessing.Process(target=_worker_grava, args=(db_path, n)) for n in range(3)]
+    for processo in processos:
+        processo.start()
+    for processo in processos:
+        processo.join(timeout=30)
+        assert processo.exitcode == 0
+
+    memory = SQLiteSharedMemory(db_path=db_path)
+    assert memory.get_system_stats()["total_memory_entries"] == 60
+    assert memory.retrieve_memory("agente_2", "k7") == "analise compartilhada 2 item7"
+    assert len(memory.search_shared_memory("carlos", "analise compartilhada", top_k=5)) == 5
+
+    print("✅ Memória compartilhada entre processos")
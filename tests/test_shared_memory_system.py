@@ -0,0 +1,264 @@
+"""
+Testes do SharedMemorySystem (memória compartilhada entre agentes)
+Verifica armazenamento, busca, permissões e concorrência
+"""
+
+import threading
+import pytest
+
+from utils.shared_memory_system import (
+    SharedMemorySystem, run_contention_benchmark, WAL_FILE, SNAPSHOT_FILE
+)
+
+
+@pytest.fixture
+def memory_system(tmp_path):
+    """Sistema isolado por teste (sem dados persistentes de outros testes)"""
+    return SharedMemorySystem(data_dir=str(tmp_path / "shared"))
+
+
+def test_store_retrieve_e_busca(memory_system):
+    """Teste: Memória armazenada pode ser recuperada e encontrada por busca"""
+    memory_system.store_memory(
+        agent_name="deepagent",
+        key="research_patinhos",
+        value="pesquisa mercado patinhos decorativos shopee",
+        share_with={"scout"},
+        tags={"research"}
+    )
+
+    assert memory_system.retrieve_memory("deepagent", "research_patinhos") == \
+        "pesquisa mercado patinhos decorativos shopee"
+
+    encontrados = memory_system.search_shared_memory("scout", "patinhos decorativos")
+    assert [owner for _, _, owner in encontrados] == ["deepagent"]
+
+    # Agente sem permissão não enxerga a memória
+    assert memory_system.search_shared_memory("psymind", "patinhos decorativos") == []
+
+    print("✅ Store, retrieve e busca funcionando")
+
+
+def test_store_duplicado_nao_cria_entrada(memory_system):
+    """Teste: Mesmo conteúdo do mesmo agente não é duplicado"""
+    chave1 = memory_system.store_memory("oraculo", "decisao", "investir em marketing")
+    chave2 = memory_system.store_memory("oraculo", "decisao", "investir em marketing",
+                                        share_with={"carlos"})
+
+    assert chave1 == chave2
+    assert memory_system.get_system_stats()["total_memory_entries"] == 1
+
+    print("✅ Deduplicação de memórias")
+
+
+def test_store_concorrente_sem_perda(tmp_path):
+    """Teste: Agentes em paralelo armazenam sem perder entradas"""
+    memory_system = SharedMemorySystem(data_dir=str(tmp_path / "shared"), num_shards=8)
+
+    def worker(agent_id):
+        for i in range(200):
+            memory_system.store_memory(f"agente_{agent_id}", f"k{i}", f"valor {agent_id} {i}")
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert memory_system.get_system_stats()["total_memory_entries"] == 1600
+    assert memory_system.retrieve_memory("agente_3", "k150") == "valor 3 150"
+
+    print("✅ Store concorrente consistente")
+
+
+def test_busca_ranqueada_por_bm25(memory_system):
+    """Teste: Memória mais relevante para a query vem primeiro, limitada a top_k"""
+    memory_system.store_memory("scout", "geral", "relatorio geral vendas produtos loja")
+    memory_system.store_memory("scout", "precos", "precos precos concorrentes precos shopee")
+    memory_system.store_memory("scout", "ruido", "relatorio logistica entregas")
+    for i in range(20):
+        memory_system.store_memory("scout", f"extra{i}", f"vendas produtos item{i}")
+
+    encontrados = memory_system.search_shared_memory("scout", "precos concorrentes")
+    assert encontrados[0][0] == "precos"
+
+    # Termo raro pesa mais que termo comum (IDF)
+    encontrados = memory_system.search_shared_memory("scout", "vendas logistica", top_k=3)
+    assert len(encontrados) == 3
+    assert encontrados[0][0] == "ruido"
+
+    print("✅ Ranking BM25 com top-k limitado")
+
+
+def test_busca_conta_acesso_so_dos_retornados(memory_system):
+    """Teste: Apenas as memórias retornadas têm o acesso contabilizado"""
+    for i in range(5):
+        memory_system.store_memory("scout", f"k{i}", f"analise mercado item{i}")
+
+    memory_system.search_shared_memory("scout", "analise mercado", top_k=2)
+
+    acessos = sorted(
+        entry.access_count for entry in memory_system.memory_store.values()
+    )
+    assert acessos == [0, 0, 0, 1, 1]
+    assert memory_system.stats["tokens_saved"] == 2 * 50  # Economia estimada só do top-k
+
+    print("✅ Acesso contabilizado só para o top-k")
+
+
+def test_wal_recupera_apos_crash(tmp_path):
+    """Teste: Sem shutdown, um novo processo reconstrói o estado pelo WAL"""
+    data_dir = str(tmp_path / "shared")
+    memory_system = SharedMemorySystem(data_dir=data_dir)
+
+    chave = memory_system.store_memory("oraculo", "decisao", "investir em marketing digital",
+                                       tags={"analysis"})
+    memory_system.share_memory_with_agents(chave, {"carlos"})
+    memory_system.store_memory("scout", "tendencia", "patinhos decorativos em alta")
+    memory_system.wal.close()  # simula crash: nada de snapshot
+
+    recuperado = SharedMemorySystem(data_dir=data_dir)
+    assert recuperado.retrieve_memory("oraculo", "decisao") == "investir em marketing digital"
+    assert recuperado.memory_store[chave].shared_with == {"carlos"}
+    assert [k for k, _, _ in recuperado.search_shared_memory("carlos", "marketing digital")] == ["decisao"]
+    assert recuperado.get_system_stats()["total_memory_entries"] == 2
+
+    print("✅ Estado recuperado do WAL")
+
+
+def test_wal_descarta_registro_incompleto(tmp_path):
+    """Teste: Registro cortado no fim do WAL é ignorado e truncado"""
+    data_dir = tmp_path / "shared"
+    memory_system = SharedMemorySystem(data_dir=str(data_dir))
+    memory_system.store_memory("scout", "k1", "valor um")
+    memory_system.wal.close()
+
+    wal_path = data_dir / WAL_FILE
+    tamanho_valido = wal_path.stat().st_size
+    with open(wal_path, "ab") as f:
+        f.write(b"\x40\x00\x00\x00lixo")
+
+    recuperado = SharedMemorySystem(data_dir=str(data_dir))
+    assert recuperado.retrieve_memory("scout", "k1") == "valor um"
+    assert wal_path.stat().st_size == tamanho_valido
+
+    print("✅ Cauda corrompida do WAL descartada")
+
+
+def test_compactacao_gera_snapshot_e_zera_wal(tmp_path):
+    """Teste: Compactação grava snapshot, esvazia o WAL e preserva expirações"""
+    data_dir = tmp_path / "shared"
+    memory_system = SharedMemorySystem(data_dir=str(data_dir), wal_compact_every=0)
+
+    memory_system.store_memory("oraculo", "estrategia", "plano anual", is_high_value=True)
+    memory_system.store_memory("scout", "temporario", "dado efemero", ttl_seconds=0)
+    memory_system._cleanup_expired()
+    memory_system.shutdown()
+
+    assert (data_dir / SNAPSHOT_FILE).exists()
+    assert (data_dir / WAL_FILE).stat().st_size == 0
+
+    recuperado = SharedMemorySystem(data_dir=str(data_dir))
+    assert recuperado.retrieve_memory("oraculo", "estrategia") == "plano anual"
+    assert recuperado.retrieve_memory("scout", "temporario") is None
+
+    print("✅ Snapshot compactado e WAL zerado")
+
+
+def test_snapshot_copia_entradas_sob_lock(memory_system):
+    """Teste: Snapshot usa cópias - mutações posteriores não alteram o que será gravado"""
+    chave = memory_system.store_memory("oraculo", "decisao", "investir", share_with={"scout"})
+
+    copia = memory_system._copy_live_entries()
+    memory_system.share_memory_with_agents(chave, {"carlos"})
+
+    assert copia[chave].shared_with == {"scout"}
+    assert memory_system.memory_store[chave].shared_with == {"scout", "carlos"}
+
+    print("✅ Snapshot isolado das entradas vivas")
+
+
+def test_valor_nao_serializavel_nao_trava_compactacao(tmp_path):
+    """Teste: Lambda armazenada fica só em memória e a compactação segue rotacionando o WAL"""
+    data_dir = tmp_path / "shared"
+    memory_system = SharedMemorySystem(data_dir=str(data_dir), wal_compact_every=0)
+
+    memory_system.store_memory("oraculo", "estrategia", "plano anual")
+    memory_system.store_memory("scout", "callback", lambda: "nao serializa")
+
+    for _ in range(2):
+        memory_system._save_persistent_data()
+        assert (data_dir / SNAPSHOT_FILE).exists()
+        assert not (data_dir / (WAL_FILE + ".old")).exists()
+        assert memory_system.wal.records_written == 0
+
+    assert memory_system.retrieve_memory("scout", "callback")() == "nao serializa"
+    memory_system.shutdown()
+
+    recuperado = SharedMemorySystem(data_dir=str(data_dir))
+    assert recuperado.retrieve_memory("oraculo", "estrategia") == "plano anual"
+    assert recuperado.retrieve_memory("scout", "callback") is None
+
+    print("✅ Compactação ignora valores não serializáveis")
+
+
+def test_capacidade_remove_menor_valor_primeiro(tmp_path):
+    """Teste: Acima de max_memory_items saem as entradas comuns menos acessadas"""
+    memory_system = SharedMemorySystem(data_dir=str(tmp_path / "shared"), max_memory_items=10)
+
+    memory_system.store_memory("oraculo", "estrategia", "estrategia anual consolidada",
+                               is_high_value=True)
+    memory_system.store_memory("scout", "popular", "tendencia popular recorrente")
+    for _ in range(3):
+        memory_system.retrieve_memory("scout", "popular")
+    for i in range(20):
+        memory_system.store_memory("scout", f"k{i}", f"registro descartavel item{i}")
+
+    assert memory_system.get_system_stats()["total_memory_entries"] <= 10
+    assert memory_system.retrieve_memory("oraculo", "estrategia") == "estrategia anual consolidada"
+    assert memory_system.retrieve_memory("scout", "popular") == "tendencia popular recorrente"
+    assert memory_system.retrieve_memory("scout", "k0") is None
+
+    # Postings das entradas removidas também saem do índice de busca
+    assert memory_system.search_index.search_by_keyword("item0") == set()
+    assert "item0" not in memory_system.search_index.keyword_index
+    assert set(memory_system.search_index.doc_lengths) == set(memory_system.memory_store)
+
+    print("✅ Capacidade respeitada com remoção por valor/acesso")
+
+
+def test_expiracao_pela_heap_limpa_indices(memory_system):
+    """Teste: Entradas expiradas saem do store, do cache e do índice de busca"""
+    memory_system.store_memory("scout", "efemero", "cotacao instantanea frete", ttl_seconds=0)
+    memory_system.store_memory("scout", "duravel", "cotacao mensal frete")
+
+    assert memory_system.retrieve_memory("scout", "efemero") is None
+    assert memory_system.search_index.search_by_keyword("instantanea") == set()
+    assert [k for k, _, _ in memory_system.search_shared_memory("scout", "cotacao frete")] == ["duravel"]
+    assert memory_system.get_system_stats()["expired_entries"] == 1
+
+    print("✅ Expiração via heap com limpeza de índices")
+
+
+def test_cache_lru_mantem_mais_recentes(memory_system):
+    """Teste: Cache LRU descarta o item menos usado recentemente"""
+    memory_system.max_cache_size = 3
+    for key in ("a", "b", "c"):
+        memory_system._add_to_cache(key, key.upper())
+
+    memory_system._get_from_cache("a")
+    memory_system._add_to_cache("d", "D")
+
+    assert list(memory_system.memory_cache) == ["c", "a", "d"]
+
+    print("✅ Cache LRU O(1)")
+
+
+def test_benchmark_contencao():
+    """Teste: Benchmark de contenção roda e reporta throughput por nº de threads"""
+    resultados = run_contention_benchmark(thread_counts=(1, 4), ops_per_thread=300)
+
+    assert set(resultados) == {1, 4}
+    assert all(ops > 0 for ops in resultados.values())
+
+    print(f"✅ Benchmark de contenção: {resultados}")
@@ -0,0 +1,240 @@
+"""
+Testes da memória vetorial (memory/vector_store.py)
+Verificam a fila de ingestão em lote sem depender do ChromaDB
+"""
+
+import threading
+import time
+
+import pytest
+
+from memory.vector_store import EmbeddingIngestionQueue
+
+
+def _item(i, collection="conversations"):
+    return (collection, f"doc_{i}", f"texto {i}", {"type": "conversation"})
+
+
+def test_ingestao_agrupa_em_lotes():
+    """Teste: Documentos enfileirados juntos são gravados em poucos lotes"""
+    lotes = []
+    fila = EmbeddingIngestionQueue(lotes.append, max_batch_size=64, max_wait_ms=200)
+
+    for i in range(150):
+        fila.submit(_item(i))
+
+    assert fila.flush(timeout=5)
+    assert sum(len(lote) for lote in lotes) == 150
+    assert max(len(lote) for lote in lotes) <= 64
+    assert len(lotes) <= 4
+    assert fila.get_stats()["avg_batch_size"] > 30
+    fila.close()
+
+    print("✅ Ingestão em micro-lotes")
+
+
+def test_ingestao_respeita_prazo_do_lote():
+    """Teste: Lote incompleto é gravado quando vence max_wait_ms"""
+    gravado = threading.Event()
+    fila = EmbeddingIngestionQueue(lambda lote: gravado.set(), max_batch_size=64, max_wait_ms=50)
+
+    inicio = time.monotonic()
+    fila.submit(_item(1))
+    assert gravado.wait(timeout=2)
+    assert time.monotonic() - inicio < 1
+    fila.close()
+
+    print("✅ Lote parcial gravado no prazo")
+
+
+def test_backpressure_e_flush_no_close():
+    """Teste: Fila cheia segura o produtor e close grava tudo que falta"""
+    liberar = threading.Event()
+    gravados = []
+
+    def gravar_lento(lote):
+        # Só o worker fica preso; o fallback síncrono do produtor grava direto
+        if threading.current_thread().name == "embedding-ingestion":
+            liberar.wait(timeout=5)
+        gravados.extend(lote)
+
+    fila = EmbeddingIngestionQueue(gravar_lento, max_batch_size=2, max_wait_ms=1,
+                                   max_queue_size=2, put_timeout=0.05)
+
+    for i in range(6):
+        fila.submit(_item(i))
+
+    stats = fila.get_stats()
+    assert stats["producer_waits"] > 0
+    assert stats["sync_fallbacks"] > 0
+    assert stats["queue_depth"] <= 2
+
+    liberar.set()
+    assert fila.close(timeout=5)
+    assert sorted(doc_id for _, doc_id, _, _ in gravados) == [f"doc_{i}" for i in range(6)]
+
+    print("✅ Backpressure e flush no encerramento")
+
+
+def test_falha_de_gravacao_nao_derruba_worker():
+    """Teste: Erro num lote é contabilizado e a fila segue gravando"""
+    chamadas = []
+
+    def gravar(lote):
+        chamadas.append(lote)
+        if len(chamadas) == 1:
+            raise RuntimeError("chromadb indisponível")
+
+    fila = EmbeddingIngestionQueue(gravar, max_batch_size=1, max_wait_ms=1)
+    fila.submit(_item(1))
+    fila.flush(timeout=2)
+    fila.submit(_item(2))
+    fila.flush(timeout=2)
+
+    stats = fila.get_stats()
+    assert stats["failed"] == 1
+    assert stats["written"] == 1
+    fila.close()
+
+    print("✅ Worker resiliente a falhas")
+
+
+@pytest.mark.parametrize("async_ingestion", [True, False])
+def test_carga_em_background_nao_bloqueia(tmp_path, monkeypatch, async_ingestion):
+    """Teste: Antes do modelo carregar, recall volta vazio e gravações esperam (fila ou buffer)"""
+    np = pytest.importorskip("numpy")
+    import sys
+    import types
+    import memory.vector_store as vector_store
+    from memory.embedding_cache import EmbeddingCache
+
+    liberar_modelo = threading.Event()
+
+    class ModeloLento:
+        def __init__(self, name):
+            liberar_modelo.wait(timeout=5)
+
+        def encode(self, sentences, **kwargs):
+            textos = [sentences] if isinstance(sentences, str) else sentences
+            vetores = np.stack([
+                np.random.default_rng(abs(hash(t)) % (2 ** 32)).standard_normal(8) for t in textos
+            ]).astype(np.float32)
+            return vetores[0] if isinstance(sentences, str) else vetores
+
+    monkeypatch.setitem(sys.modules, "sentence_transformers",
+                        types.SimpleNamespace(SentenceTransformer=ModeloLento))
+    monkeypatch.setattr(vector_store, "SENTENCE_TRANSFORMERS_AVAILABLE", True)
+    monkeypatch.setattr(vector_store, "CHROMADB_AVAILABLE", False)
+    monkeypatch.setattr(vector_store, "get_embedding_cache",
+                        lambda name: EmbeddingCache(cache_dir=str(tmp_path / "emb"), model_name=name))
+
+    inicio = time.monotonic()
+    manager = vector_store.MemoryManager(persist_directory=str(tmp_path / "db"), batch_wait_ms=10,
+                                         async_ingestion=async_ingestion)
+    assert time.monotonic() - inicio < 1
+    assert manager.memory_active and not manager.is_ready()
+
+    inicio = time.monotonic()
+    assert manager.remember_conversation("como precificar?", "custo + margem") is not None
+    assert time.monotonic() - inicio < 1  # Gravação não espera a carga
+    assert manager.recall_context("precificar") == vector_store.MemoryManager.EMPTY_CONTEXT
+    assert manager.get_stats()["ready"] is False
+
+    liberar_modelo.set()
+    assert manager.wait_until_ready(timeout=5)
+    assert manager.flush(timeout=5)
+
+    stats = manager.get_stats()
+    assert stats["vector_memory"]["conversations"] == 1
+    assert stats["load_metrics"]["recalls_before_ready"] == 1
+    assert stats["load_metrics"]["first_use_waited"] is True
+    assert stats["load_metrics"]["ready_seconds"] is not None
+    manager.shutdown()
+
+    print("✅ Carga em background com fila de gravações")
+
+
+def _manager_com_modelo_fake(tmp_path, monkeypatch, np, **kwargs):
+    """MemoryManager com índice NumPy e modelo determinístico (hash de palavras)"""
+    import sys
+    import types
+    import memory.vector_store as vector_store
+    from memory.embedding_cache import EmbeddingCache
+
+    class ModeloPalavras:
+        def __init__(self, name):
+            pass
+
+        def encode(self, sentences, **kwargs):
+            textos = [sentences] if isinstance(sentences, str) else sentences
+            vetores = np.zeros((len(textos), 64), dtype=np.float32)
+            for i, texto in enumerate(textos):
+                for palavra in texto.lower().split():
+                    vetores[i, sum(map(ord, palavra)) % 64] += 1
+            return vetores[0] if isinstance(sentences, str) else vetores
+
+    monkeypatch.setitem(sys.modules, "sentence_transformers",
+                        types.SimpleNamespace(SentenceTransformer=ModeloPalavras))
+    monkeypatch.setattr(vector_store, "SENTENCE_TRANSFORMERS_AVAILABLE", True)
+    monkeypatch.setattr(vector_store, "CHROMADB_AVAILABLE", False)
+    monkeypatch.setattr(vector_store, "get_embedding_cache",
+                        lambda name: EmbeddingCache(cache_dir=str(tmp_path / "emb"), model_name=name))
+
+    manager = vector_store.MemoryManager(persist_directory=str(tmp_path / "db"), batch_wait_ms=1,
+                                         background_load=False, **kwargs)
+    assert manager.is_ready()
+    return manager
+
+
+def test_recall_particionado_com_filtros(tmp_path, monkeypatch):
+    """Teste: Filtros de sessão/agente e janela de tempo restringem o recall"""
+    np = pytest.importorskip("numpy")
+    from memory.vector_store import conversation_partition
+    from datetime import datetime
+
+    manager = _manager_com_modelo_fake(tmp_path, monkeypatch, np)
+    manager.remember_conversation("preço do patinho", "custo mais margem", "Carlos", session_id="s1")
+    manager.remember_conversation("preço do patinho", "pesquisar concorrentes", "Oraculo", session_id="s2")
+    assert manager.flush(timeout=5)
+
+    # Gravações novas vão para a partição do mês corrente
+    assert list(manager._partitions) == [conversation_partition(datetime.now())]
+
+    todas = manager.recall_context("preço do patinho", max_results=5)
+    assert "custo mais margem" in todas and "pesquisar concorrentes" in todas
+
+    sessao = manager.recall_context("preço do patinho", session_id="s1")
+    assert "custo mais margem" in sessao and "pesquisar concorrentes" not in sessao
+
+    agente = manager.recall_context("preço do patinho", agent="Oraculo", since_hours=1)
+    assert "pesquisar concorrentes" in agente and "custo mais margem" not in agente
+
+    # Janela de tempo vazia: nada antigo entra
+    futuro = manager.recall_context("preço do patinho", since_hours=-1)
+    assert "CONVERSAS ANTERIORES" not in futuro
+
+    stats = manager.get_stats()
+    assert stats["vector_memory"]["conversations"] == 2
+    assert stats["recall"]["recalls"] == 4
+    manager.shutdown()
+
+    print("✅ Recall particionado com filtros")
+
+
+def test_recall_respeita_orcamento(tmp_path, monkeypatch):
+    """Teste: Com orçamento zerado só a partição mais recente é consultada"""
+    np = pytest.importorskip("numpy")
+
+    manager = _manager_com_modelo_fake(tmp_path, monkeypatch, np)
+    for mes in ("conversations_202401", "conversations_202402", "conversations_202403"):
+        manager._collection(mes).add(documents=[f"conversa de {mes}"],
+                                     embeddings=[manager.embedding_model.encode(f"conversa de {mes}").tolist()],
+                                     metadatas=[{"session_id": "s1", "ts": 0.0}], ids=[mes])
+
+    contexto = manager.recall_context("conversa de", budget_ms=0, min_similarity=0)
+    assert "202403" in contexto and "202401" not in contexto
+    assert manager.recall_stats["partitions_searched"] == 1
+    assert manager.recall_stats["partitions_skipped_by_budget"] == 3  # inclui a coleção original
+    manager.shutdown()
+
+    print("✅ Orçamento de tempo do recall")
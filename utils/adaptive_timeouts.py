@@ -0,0 +1,200 @@
+"""
+Timeouts Adaptativos por Agente
+Timeouts derivados de histogramas de latência observada (p99 × fator), persistidos em disco
+"""
+
+import os
+import json
+import atexit
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Any
+
+# Logger
+try:
+    from utils.logger import get_logger
+except ImportError:
+    class SimpleLogger:
+        def __init__(self, name): self.name = name
+        def info(self, msg): print(f"[INFO] {msg}")
+        def warning(self, msg): print(f"[WARNING] {msg}")
+        def error(self, msg): print(f"[ERROR] {msg}")
+        def debug(self, msg): print(f"[DEBUG] {msg}")
+    def get_logger(name): return SimpleLogger(name)
+
+logger = get_logger(__name__)
+
+# Limites dos buckets do histograma: log-espaçados de 50ms a ~10min (razão 1.25)
+BUCKET_BOUNDS: List[float] = [0.05 * 1.25 ** i for i in range(43)]
+
+
+class LatencyHistogram:
+    """
+    Histograma de latências com buckets log-espaçados e decaimento exponencial
+
+    A cada observação os contadores são multiplicados por `decay`, então o
+    histograma reflete as ~1/(1-decay) execuções mais recentes e acompanha
+    mudanças de comportamento do agente.
+    """
+
+    def __init__(self, decay: float = 0.99, counts: Optional[List[float]] = None, samples: int = 0):
+        self.decay = decay
+        self.counts = list(counts) if counts and len(counts) == len(BUCKET_BOUNDS) + 1 \
+            else [0.0] * (len(BUCKET_BOUNDS) + 1)
+        self.samples = samples
+
+    def observe(self, seconds: float):
+        for i in range(len(self.counts)):
+            self.counts[i] *= self.decay
+        index = next((i for i, bound in enumerate(BUCKET_BOUNDS) if seconds <= bound), len(BUCKET_BOUNDS))
+        self.counts[index] += 1.0
+        self.samples += 1
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Limite superior do bucket onde a fração acumulada atinge q"""
+        total = sum(self.counts)
+        if total <= 0:
+            return None
+        cumulative = 0.0
+        for i, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= q * total:
+                return BUCKET_BOUNDS[i] if i < len(BUCKET_BOUNDS) else BUCKET_BOUNDS[-1] * 1.25
+        return BUCKET_BOUNDS[-1] * 1.25
+
+
+class AdaptiveTimeoutRegistry:
+    """
+    Timeouts por agente aprendidos da latência observada
+
+    timeout = clamp(p99 × factor, min_timeout, max_timeout), recalculado a
+    cada observação. Enquanto o agente tem menos de min_samples execuções
+    vale o timeout padrão informado pelo chamador (os valores fixos de
+    antes). Timeouts entram como observação no próprio valor do timeout
+    (censurada): um agente saudável mas lento vai empurrando o p99 para
+    cima em vez de continuar sendo cortado. Os histogramas são salvos em
+    JSON a cada save_every observações e no encerramento.
+    """
+
+    def __init__(self, path: str = "data/agent_timeouts.json", factor: float = 2.0,
+                 percentile: float = 0.99, min_timeout: float = 5.0, max_timeout: float = 120.0,
+                 min_samples: int = 20, decay: float = 0.99, save_every: int = 20):
+        self.path = Path(path)
+        self.factor = factor
+        self.percentile = percentile
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.min_samples = min_samples
+        self.decay = decay
+        self.save_every = save_every
+
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._timeouts: Dict[str, int] = {}
+        self._unsaved = 0
+
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            for agent_name, entry in data.get("agents", {}).items():
+                self._histograms[agent_name] = LatencyHistogram(
+                    self.decay, entry.get("counts"), entry.get("samples", 0)
+                )
+                self._timeouts[agent_name] = entry.get("timeouts", 0)
+            logger.info(f"⏱️ Timeouts adaptativos carregados: {len(self._histograms)} agentes")
+        except Exception as e:
+            logger.warning(f"⚠️ Histórico de timeouts ilegível, começando do zero: {e}")
+
+    def observe(self, agent_name: str, seconds: float, timed_out: bool = False):
+        """Registra a latência de uma execução (timed_out: cortada em `seconds`)"""
+        with self._lock:
+            histogram = self._histograms.setdefault(agent_name, LatencyHistogram(self.decay))
+            histogram.observe(seconds)
+            if timed_out:
+                self._timeouts[agent_name] = self._timeouts.get(agent_name, 0) + 1
+            self._unsaved += 1
+            should_save = self._unsaved >= self.save_every
+
+        if should_save:
+            self.save()
+
+    def timeout_for(self, agent_name: str, default: float) -> float:
+        """Timeout atual do agente (padrão até ter min_samples)"""
+        with self._lock:
+            histogram = self._histograms.get(agent_name)
+            if histogram is None or histogram.samples < self.min_samples:
+                return default
+            p = histogram.percentile(self.percentile)
+        return min(self.max_timeout, max(self.min_timeout, p * self.factor))
+
+    def snapshot(self, defaults: Optional[Dict[str, float]] = None) -> Dict[str, Dict[str, Any]]:
+        """Estado por agente para inspeção: timeout em vigor, percentis e amostras"""
+        defaults = defaults or {}
+        with self._lock:
+            names = set(self._histograms) | set(defaults)
+        result = {}
+        for agent_name in sorted(names):
+            with self._lock:
+                histogram = self._histograms.get(agent_name)
+                samples = histogram.samples if histogram else 0
+                percentiles = {
+                    f"p{int(q * 100)}": histogram.percentile(q) if histogram else None
+                    for q in (0.5, 0.95, 0.99)
+                }
+                timeouts = self._timeouts.get(agent_name, 0)
+            default = defaults.get(agent_name, self.max_timeout)
+            result[agent_name] = {
+                "timeout": self.timeout_for(agent_name, default),
+                "default": default,
+                "adaptive": samples >= self.min_samples,
+                "samples": samples,
+                "timeouts": timeouts,
+                **percentiles
+            }
+        return result
+
+    def save(self):
+        """Grava os histogramas (escrita atômica)"""
+        with self._lock:
+            data = {
+                "bucket_bounds": BUCKET_BOUNDS,
+                "agents": {
+                    agent_name: {
+                        "counts": list(histogram.counts),
+                        "samples": histogram.samples,
+                        "timeouts": self._timeouts.get(agent_name, 0)
+                    }
+                    for agent_name, histogram in self._histograms.items()
+                }
+            }
+            self._unsaved = 0
+
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(data), encoding="utf-8")
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"⚠️ Não foi possível salvar timeouts adaptativos: {e}")
+
+
+# Singleton global
+_timeout_registry = None
+_timeout_registry_lock = threading.Lock()
+
+
+def get_adaptive_timeouts() -> AdaptiveTimeoutRegistry:
+    """Retorna instância singleton do AdaptiveTimeoutRegistry"""
+    global _timeout_registry
+
+    with _timeout_registry_lock:
+        if _timeout_registry is None:
+            _timeout_registry = AdaptiveTimeoutRegistry(
+                path=os.getenv("AGENT_TIMEOUTS_FILE", "data/agent_timeouts.json")
+            )
+            atexit.register(_timeout_registry.save)
+        return _timeout_registry
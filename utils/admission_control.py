@@ -0,0 +1,240 @@
+"""
+Controle de Admissão do Orquestrador
+Limite de concorrência adaptativo, fila por prioridade e descarte de carga com degradação
+"""
+
+import os
+import math
+import heapq
+import time
+import itertools
+import threading
+from typing import Dict, Any, Optional, Tuple
+
+# Logger
+try:
+    from utils.logger import get_logger
+except ImportError:
+    class SimpleLogger:
+        def __init__(self, name): self.name = name
+        def info(self, msg): print(f"[INFO] {msg}")
+        def warning(self, msg): print(f"[WARNING] {msg}")
+        def error(self, msg): print(f"[ERROR] {msg}")
+        def debug(self, msg): print(f"[DEBUG] {msg}")
+    def get_logger(name): return SimpleLogger(name)
+
+logger = get_logger(__name__)
+
+# Ordem de atendimento: tier do usuário primeiro, depois requisições mais baratas
+TIER_PRIORITY = {"premium": 0, "pro": 1, "standard": 2, "free": 3}
+# Tier de quem chega sem informar o seu (mesma variável que o app.py usa na sessão)
+DEFAULT_TIER = os.getenv("DEFAULT_USER_TIER", "standard")
+if DEFAULT_TIER not in TIER_PRIORITY:
+    DEFAULT_TIER = "standard"
+
+COMPLEXITY_PRIORITY = {"trivial": 0, "simple": 1, "moderate": 2, "complex": 3, "critical": 4}
+
+LATENCY_EWMA_ALPHA = 0.2
+BASELINE_DRIFT = 0.01  # A latência de referência sobe 1% por amostra para acompanhar mudanças reais
+
+
+class AdmissionTicket:
+    """Vaga concedida a uma requisição; devolver com release()"""
+
+    def __init__(self, priority: Tuple[int, int], latency_class: str, degraded: bool = False):
+        self.priority = priority
+        self.latency_class = latency_class
+        self.degraded = degraded
+        self.queued_at = time.perf_counter()
+        self.admitted_at: Optional[float] = None
+        self.granted = False
+
+    @property
+    def wait_seconds(self) -> float:
+        return (self.admitted_at or time.perf_counter()) - self.queued_at
+
+
+class AdmissionController:
+    """
+    Limita o trabalho em andamento no orquestrador
+
+    O limite de concorrência é medido, não fixo: a cada requisição concluída
+    compara a latência recente com a melhor latência vista para a mesma
+    classe de complexidade (gradiente). Latência subindo indica fila nos
+    pools/LLM e o limite encolhe; latência estável deixa o limite crescer
+    devagar (+sqrt(limite)). Quem não cabe espera numa fila por prioridade
+    (tier do usuário, depois complexidade) até queue_budget segundos; depois
+    disso a requisição é descartada e o chamador serve um caminho degradado,
+    que tem um número pequeno de vagas próprias (degraded_slots).
+    """
+
+    def __init__(self, initial_limit: int = 8, min_limit: int = 2, max_limit: int = 64,
+                 queue_budget: float = 2.0, max_queue: int = 128, degraded_slots: int = 4):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.queue_budget = queue_budget
+        self.max_queue = max_queue
+        self.degraded_slots = degraded_slots
+
+        self._limit = float(max(min_limit, min(max_limit, initial_limit)))
+        self._condition = threading.Condition()
+        self._queue = []
+        self._sequence = itertools.count()
+        self._in_flight = 0
+        self._degraded_in_flight = 0
+
+        self._baseline: Dict[str, float] = {}
+        self._ewma: Dict[str, float] = {}
+
+        self.stats = {
+            "admitted": 0,
+            "queued": 0,
+            "shed": 0,
+            "degraded": 0,
+            "rejected": 0,
+            "total_wait_ms": 0.0
+        }
+
+        logger.info(f"🚦 AdmissionController inicializado: limite={initial_limit}, fila={queue_budget}s")
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @staticmethod
+    def priority_for(complexity: str, tier: Optional[str] = None) -> Tuple[int, int]:
+        """Prioridade (menor = antes) a partir do tier do usuário e da complexidade"""
+        return (TIER_PRIORITY.get(tier or DEFAULT_TIER, TIER_PRIORITY[DEFAULT_TIER]),
+                COMPLEXITY_PRIORITY.get(complexity, len(COMPLEXITY_PRIORITY)))
+
+    def acquire(self, complexity: str, tier: Optional[str] = None,
+                budget: Optional[float] = None) -> Optional[AdmissionTicket]:
+        """
+        Pede uma vaga; espera na fila até o orçamento e devolve None se a
+        requisição foi descartada (o chamador deve degradar)
+
+        Bloqueia a thread chamadora por até budget segundos. Código async
+        deve chamar por uma thread (astream_optimized, asyncio.to_thread),
+        nunca direto no event loop. Sem tier, entra como DEFAULT_TIER.
+        """
+        budget = self.queue_budget if budget is None else budget
+        ticket = AdmissionTicket(self.priority_for(complexity, tier), complexity)
+        deadline = time.monotonic() + budget
+
+        with self._condition:
+            if not self._queue and self._in_flight < self.limit:
+                return self._grant(ticket)
+
+            if len(self._queue) >= self.max_queue:
+                self.stats["shed"] += 1
+                return None
+
+            entry = (ticket.priority, next(self._sequence), ticket)
+            heapq.heappush(self._queue, entry)
+            self.stats["queued"] += 1
+
+            while not ticket.granted:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._queue.remove(entry)
+                    heapq.heapify(self._queue)
+                    self.stats["shed"] += 1
+                    self.stats["total_wait_ms"] += ticket.wait_seconds * 1000
+                    logger.warning(f"🚦 Requisição {complexity} descartada após {budget:.1f}s na fila")
+                    return None
+                self._condition.wait(remaining)
+
+            return ticket
+
+    def acquire_degraded(self, complexity: str) -> Optional[AdmissionTicket]:
+        """Vaga no caminho degradado (sem fila); None se até ele está cheio"""
+        with self._condition:
+            if self._degraded_in_flight >= self.degraded_slots:
+                self.stats["rejected"] += 1
+                return None
+            self._degraded_in_flight += 1
+            self.stats["degraded"] += 1
+            ticket = AdmissionTicket((0, 0), complexity, degraded=True)
+            ticket.granted = True
+            ticket.admitted_at = ticket.queued_at
+            return ticket
+
+    def release(self, ticket: AdmissionTicket, latency: Optional[float] = None):
+        """Devolve a vaga; a latência de execução realimenta o limite"""
+        with self._condition:
+            if ticket.degraded:
+                self._degraded_in_flight -= 1
+                return
+
+            self._in_flight -= 1
+            if latency is not None:
+                self._update_limit(ticket.latency_class, latency)
+            self._dispatch()
+
+    def _grant(self, ticket: AdmissionTicket) -> AdmissionTicket:
+        ticket.granted = True
+        ticket.admitted_at = time.perf_counter()
+        self._in_flight += 1
+        self.stats["admitted"] += 1
+        self.stats["total_wait_ms"] += ticket.wait_seconds * 1000
+        return ticket
+
+    def _dispatch(self):
+        """Concede vagas livres aos melhores da fila (chamado com o lock)"""
+        granted = False
+        while self._queue and self._in_flight < self.limit:
+            _, _, ticket = heapq.heappop(self._queue)
+            self._grant(ticket)
+            granted = True
+        if granted:
+            self._condition.notify_all()
+
+    def _update_limit(self, latency_class: str, latency: float):
+        """Limite por gradiente de latência (chamado com o lock)"""
+        latency = max(latency, 1e-3)
+        baseline = self._baseline.get(latency_class)
+        baseline = latency if baseline is None else min(baseline * (1 + BASELINE_DRIFT), latency)
+        self._baseline[latency_class] = baseline
+
+        ewma = self._ewma.get(latency_class, latency)
+        ewma = LATENCY_EWMA_ALPHA * latency + (1 - LATENCY_EWMA_ALPHA) * ewma
+        self._ewma[latency_class] = ewma
+
+        # Sem demanda perto do limite a latência não diz nada sobre a capacidade
+        if self._in_flight + 1 < self._limit / 2 and not self._queue:
+            return
+
+        gradient = max(0.5, min(1.0, baseline / ewma))
+        target = self._limit * gradient + math.sqrt(self._limit)
+        self._limit = max(self.min_limit, min(self.max_limit, 0.8 * self._limit + 0.2 * target))
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._condition:
+            waited = self.stats["admitted"] + self.stats["shed"]
+            return {
+                **self.stats,
+                "limit": self.limit,
+                "in_flight": self._in_flight,
+                "degraded_in_flight": self._degraded_in_flight,
+                "queue_depth": len(self._queue),
+                "avg_wait_ms": self.stats["total_wait_ms"] / waited if waited else 0.0,
+                "latency_ewma": dict(self._ewma)
+            }
+
+
+# Singleton global
+_admission_controller = None
+_admission_controller_lock = threading.Lock()
+
+
+def get_admission_controller() -> AdmissionController:
+    """Retorna instância singleton do AdmissionController"""
+    global _admission_controller
+
+    with _admission_controller_lock:
+        if _admission_controller is None:
+            _admission_controller = AdmissionController(
+                initial_limit=int(os.getenv("ORCHESTRATOR_MAX_CONCURRENT", "8")),
+                queue_budget=float(os.getenv("ORCHESTRATOR_QUEUE_BUDGET", "2.0"))
+            )
+        return _admission_controller
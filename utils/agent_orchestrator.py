@@ -6,19 +6,22 @@ Sistema completo de otimização seguindo especificações Gemini AI
 
 import time
 import threading
-from typing import Dict, List, Optional, Any, Tuple
-from dataclasses import dataclass
+from typing import Dict, List, Optional, Any, Tuple, Callable, AsyncIterator, Union
+from dataclasses import dataclass, replace
 from datetime import datetime
 
 # Imports dos componentes de otimização
 from utils.agent_optimizer import (
-    get_agent_optimizer, MessageAnalysis, ComplexityLevel, TaskType
+    get_agent_optimizer, MessageAnalysis, ComplexityLevel, TaskType, AgentActivationPlan
 )
 from utils.agent_wake_manager import (
     get_wake_manager, AgentWakeTask, AgentExecutionResult, AgentStatus
 )
 from utils.shared_memory_system import get_shared_memory_system
 from utils.token_monitor import get_token_monitor
+from utils.admission_control import get_admission_controller, AdmissionController, DEFAULT_TIER
+from utils.result_stream import stream_from_thread
+from utils.agent_prewarmer import AgentPrewarmer
 
 # Logger
 try:
@@ -34,6 +37,20 @@ except ImportError:
 
 logger = get_logger(__name__)
 
+# Pipeline servido quando a requisição é descartada pela fila de admissão:
+# só o Carlos, prompt básico (mesmo caminho de ComplexityLevel.SIMPLE)
+DEGRADED_PLAN = AgentActivationPlan(
+    primary_agents=["carlos"],
+    secondary_agents=[],
+    validation_agents=[],
+    wake_up_order=["carlos"],
+    max_timeout=15,
+    expected_tokens=100,
+    bypass_llm=False
+)
+
+OVERLOAD_RESPONSE = "⏳ Estou com muitas solicitações no momento. Tente novamente em alguns instantes."
+
 
 @dataclass
 class OptimizedResponse:
@@ -55,12 +72,14 @@ class AgentOrchestrator:
     Implementa fluxo completo seguindo especificações Gemini AI
     """
     
-    def __init__(self):
+    def __init__(self, admission_controller: Optional[AdmissionController] = None):
         # Componentes de otimização
         self.optimizer = get_agent_optimizer()
         self.wake_manager = get_wake_manager()
         self.shared_memory = get_shared_memory_system()
         self.token_monitor = get_token_monitor()
+        self.admission = admission_controller or get_admission_controller()
+        self.prewarmer = AgentPrewarmer(self.wake_manager)
         
         # Cache de respostas pré-definidas (consumo zero)
         self.predefined_responses = {
@@ -92,16 +111,26 @@ class AgentOrchestrator:
             "cache_hits": 0,
             "memory_reused": 0,
             "agents_bypassed": 0,
-            "total_tokens_saved": 0
+            "total_tokens_saved": 0,
+            "degraded_responses": 0,
+            "load_shed": 0
         }
         
         logger.info("🎯 AgentOrchestrator inicializado - Otimização Gemini AI ativa")
     
     def process_optimized(self, message: str, context: Dict = None, 
-                         user_id: str = None) -> OptimizedResponse:
+                         user_id: str = None,
+                         on_result: Optional[Callable[[AgentExecutionResult], None]] = None) -> OptimizedResponse:
         """
         Processa mensagem com otimização completa
         Implementa fluxo de otimização Gemini AI
+        
+        on_result, se informado, recebe cada AgentExecutionResult assim que o
+        agente termina (na thread do orquestrador), antes da consolidação.
+        
+        Bloqueia enquanto espera vaga no controle de admissão: em código
+        async use astream_optimized, que roda numa thread. O tier do
+        usuário vem de context["user_tier"] (DEFAULT_TIER se ausente).
         """
         start_time = time.time()
         context = context or {}
@@ -116,6 +145,8 @@ class AgentOrchestrator:
         analysis = self.optimizer.analyze_message(message, context)
         logger.debug(f"📊 Complexidade: {analysis.complexity.value}, Tipo: {analysis.task_type.value}")
         
+        user_id = user_id or context.get("user_id")
+        
         # ETAPA 2: Verificar respostas pré-definidas (CONSUMO ZERO)
         if analysis.complexity == ComplexityLevel.TRIVIAL:
             predefined = self._check_predefined_response(message)
@@ -175,23 +206,63 @@ class AgentOrchestrator:
                 optimization_applied=optimizations_applied
             )
         
-        # ETAPA 5: Execução otimizada com agentes (Gemini Wake Up Strategy)
-        response_content, execution_results = self._execute_optimized_agents(
-            analysis, message, context
-        )
+        # ETAPA 5: Controle de admissão - vaga no limite de concorrência ou caminho degradado
+        executed_analysis = analysis
+        ticket = None
+        if not analysis.activation_plan.bypass_llm:  # Bypass não ocupa agentes, dispensa admissão
+            # Só aqui é certo que agentes vão acordar: aquecem enquanto a admissão espera vaga
+            self.prewarmer.prewarm(analysis, user_id)
+            user_tier = context.get("user_tier") or DEFAULT_TIER
+            ticket = self.admission.acquire(analysis.complexity.value, user_tier)
+            if ticket is None:
+                executed_analysis = self._degraded_analysis(analysis)
+                ticket = self.admission.acquire_degraded(analysis.complexity.value)
+                if ticket is None:
+                    self._update_stats("load_shed")
+                    optimizations_applied.append("load_shed")
+                    
+                    return OptimizedResponse(
+                        content=OVERLOAD_RESPONSE,
+                        agents_used=[],
+                        total_execution_time=time.time() - start_time,
+                        tokens_used=0,
+                        tokens_saved=0,
+                        cache_hits=0,
+                        memory_reused=0,
+                        complexity_detected=analysis.complexity,
+                        optimization_applied=optimizations_applied
+                    )
+                
+                self._update_stats("degraded_responses")
+                optimizations_applied.append("degraded_pipeline")
+        
+        # ETAPA 6: Execução otimizada com agentes (Gemini Wake Up Strategy)
+        execution_start = time.time()
+        try:
+            response_content, execution_results = self._execute_optimized_agents(
+                executed_analysis, message, context, on_result
+            )
+        finally:
+            if ticket is not None:
+                self.admission.release(ticket, time.time() - execution_start)
+        
+        if executed_analysis is analysis:  # Pipeline degradado não diz nada sobre o usuário
+            self.prewarmer.record(analysis, user_id, [
+                name for name, result in execution_results.items() if result.status == AgentStatus.COMPLETED
+            ])
         
         # Registrar tokens no monitor
         total_tokens = sum(result.tokens_used for result in execution_results.values())
         if total_tokens > 0:
             self.token_monitor.log_tokens("orchestrator", total_tokens // 2, total_tokens // 2)
         
-        # ETAPA 6: Armazenar resultado para futuro reuso
-        if analysis.complexity in [ComplexityLevel.COMPLEX, ComplexityLevel.CRITICAL]:
+        # ETAPA 7: Armazenar resultado para futuro reuso (respostas degradadas não)
+        if executed_analysis.complexity in [ComplexityLevel.COMPLEX, ComplexityLevel.CRITICAL]:
             self._store_high_value_result(message, response_content, analysis)
             optimizations_applied.append("high_value_storage")
         
         # Calcular tokens economizados
-        tokens_saved = self._calculate_tokens_saved(analysis, execution_results)
+        tokens_saved = self._calculate_tokens_saved(executed_analysis, execution_results)
         
         return OptimizedResponse(
             content=response_content,
@@ -205,6 +276,14 @@ class AgentOrchestrator:
             optimization_applied=optimizations_applied
         )
     
+    def _degraded_analysis(self, analysis: MessageAnalysis) -> MessageAnalysis:
+        """Versão SIMPLE da análise para servir a requisição descartada pela fila"""
+        if analysis.complexity in [ComplexityLevel.TRIVIAL, ComplexityLevel.SIMPLE]:
+            return analysis
+        
+        logger.warning(f"🚦 Sobrecarga: servindo pipeline simples no lugar de {analysis.complexity.value}")
+        return replace(analysis, complexity=ComplexityLevel.SIMPLE, activation_plan=DEGRADED_PLAN)
+    
     def _check_predefined_response(self, message: str) -> Optional[str]:
         """Verifica respostas pré-definidas para consumo zero"""
         normalized = message.lower().strip()
@@ -240,8 +319,20 @@ class AgentOrchestrator:
         
         return None
     
+    async def astream_optimized(self, message: str, context: Dict = None,
+                                user_id: str = None) -> AsyncIterator[Union[AgentExecutionResult, OptimizedResponse]]:
+        """
+        Versão assíncrona de process_optimized que entrega cada
+        AgentExecutionResult conforme o agente termina; o último item é o
+        OptimizedResponse consolidado
+        """
+        async for item in stream_from_thread(self.process_optimized, message, context, user_id):
+            yield item
+    
     def _execute_optimized_agents(self, analysis: MessageAnalysis, message: str, 
-                                context: Dict) -> Tuple[str, Dict[str, AgentExecutionResult]]:
+                                context: Dict,
+                                on_result: Optional[Callable[[AgentExecutionResult], None]] = None
+                                ) -> Tuple[str, Dict[str, AgentExecutionResult]]:
         """Executa agentes seguindo estratégia otimizada"""
         
         # Preparar tarefas de wake up baseadas no plano de ativação
@@ -274,11 +365,15 @@ class AgentOrchestrator:
             )
             wake_tasks.append(task)
         
-        # Executar wake up otimizado
-        execution_results = self.wake_manager.wake_agents_sequence(
-            wake_tasks, 
-            global_timeout=plan.max_timeout
-        )
+        # Executar wake up otimizado, repassando cada resultado assim que sai
+        execution_results = {}
+        for result in self.wake_manager.stream_agents(wake_tasks, global_timeout=plan.max_timeout):
+            execution_results[result.agent_name] = result
+            if on_result:
+                try:
+                    on_result(result)
+                except Exception as e:
+                    logger.warning(f"⚠️ Callback de resultado falhou para {result.agent_name}: {e}")
         
         # Consolidar resposta
         response_parts = []
@@ -371,6 +466,7 @@ class AgentOrchestrator:
             "optimizer_component": optimizer_stats,
             "memory_component": memory_stats,
             "wake_manager_component": wake_stats,
+            "admission_component": self.admission.get_stats(),
             "total_tokens_saved": (
                 base_stats["total_tokens_saved"] + 
                 optimizer_stats.get("tokens_saved", 0) + 
@@ -387,7 +483,9 @@ class AgentOrchestrator:
                 "cache_hits": 0,
                 "memory_reused": 0,
                 "agents_bypassed": 0,
-                "total_tokens_saved": 0
+                "total_tokens_saved": 0,
+                "degraded_responses": 0,
+                "load_shed": 0
             }
         
         self.optimizer.reset_stats()
@@ -434,7 +532,7 @@ if __name__ == "__main__":
         
         # Processar com otimização
         start_time = time.time()
-        response = orchestrator.process_optimized(message)
+        response = orchestrator.process_optimized(message, context={"user_tier": DEFAULT_TIER})
         processing_time = time.time() - start_time
         
         print(f"   ⚡ Tempo: {processing_time:.3f}s")
@@ -0,0 +1,80 @@
+"""
+Pré-aquecimento Preditivo de Agentes
+Prevê os próximos agentes pelo plano de ativação e pelo histórico do usuário e os aquece em segundo plano
+"""
+
+import threading
+from collections import deque, Counter
+from typing import Dict, List, Optional, Tuple
+
+from utils.agent_optimizer import MessageAnalysis, ComplexityLevel
+
+# Logger
+try:
+    from utils.logger import get_logger
+except ImportError:
+    class SimpleLogger:
+        def __init__(self, name): self.name = name
+        def info(self, msg): print(f"[INFO] {msg}")
+        def warning(self, msg): print(f"[WARNING] {msg}")
+        def error(self, msg): print(f"[ERROR] {msg}")
+        def debug(self, msg): print(f"[DEBUG] {msg}")
+    def get_logger(name): return SimpleLogger(name)
+
+logger = get_logger(__name__)
+
+
+class AgentPrewarmer:
+    """
+    Escolhe quais agentes aquecer para uma mensagem já classificada
+
+    Primeiro os agentes do activation_plan (primários, depois secundários);
+    depois os que o mesmo usuário acabou usando em pelo menos
+    min_history_share das últimas requisições do mesmo tipo de tarefa -
+    cobre o que a matriz de decisão não prevê para aquele usuário. Planos
+    que pulam o LLM e mensagens TRIVIAL não aquecem nada.
+    """
+
+    def __init__(self, wake_manager, max_agents: int = 4, history_size: int = 10,
+                 min_history_share: float = 0.5):
+        self.wake_manager = wake_manager
+        self.max_agents = max_agents
+        self.history_size = history_size
+        self.min_history_share = min_history_share
+
+        self._lock = threading.Lock()
+        self._history: Dict[Tuple[str, str], deque] = {}
+
+    def predict(self, analysis: MessageAnalysis, user_id: Optional[str] = None) -> List[str]:
+        """Agentes prováveis, em ordem de prioridade"""
+        plan = analysis.activation_plan
+        if plan.bypass_llm or analysis.complexity == ComplexityLevel.TRIVIAL:
+            return []
+
+        predicted = list(dict.fromkeys(plan.primary_agents + plan.secondary_agents))
+
+        if user_id:
+            with self._lock:
+                history = list(self._history.get((user_id, analysis.task_type.value), ()))
+            if history:
+                counts = Counter(agent for agents in history for agent in agents)
+                for agent_name, count in counts.most_common():
+                    if count / len(history) >= self.min_history_share and agent_name not in predicted:
+                        predicted.append(agent_name)
+
+        return predicted[:self.max_agents]
+
+    def prewarm(self, analysis: MessageAnalysis, user_id: Optional[str] = None) -> List[str]:
+        """Dispara o aquecimento dos agentes previstos (não bloqueia)"""
+        predicted = self.predict(analysis, user_id)
+        if not predicted:
+            return []
+        return list(self.wake_manager.prewarm(predicted))
+
+    def record(self, analysis: MessageAnalysis, user_id: Optional[str], agents_used: List[str]):
+        """Registra os agentes que de fato atenderam o usuário"""
+        if not user_id or not agents_used:
+            return
+        key = (user_id, analysis.task_type.value)
+        with self._lock:
+            self._history.setdefault(key, deque(maxlen=self.history_size)).append(frozenset(agents_used))
@@ -5,9 +5,11 @@ Seguindo especificações Gemini AI
 """
 
 import time
+import heapq
+import queue
 import threading
 import asyncio
-from typing import Dict, List, Set, Optional, Callable, Any
+from typing import Dict, List, Set, Optional, Callable, Any, Iterator
 from dataclasses import dataclass, field
 from enum import Enum
 from datetime import datetime, timedelta
@@ -28,16 +30,31 @@ except ImportError:
 
 logger = get_logger(__name__)
 
+from utils.cancellation import AgentCancelledError, CancellationToken, cancellation_scope
+from utils.executor_service import get_executor_service, DISPATCH_POOL, IO_POOL
+from utils.adaptive_timeouts import AdaptiveTimeoutRegistry, get_adaptive_timeouts
+
+# Peso da última medição na média móvel de latência por agente
+LATENCY_EWMA_ALPHA = 0.3
+
+# Sem histórico, a latência estimada é esta fração do timeout do agente
+DEFAULT_LATENCY_TIMEOUT_FRACTION = 0.25
+
+# Resultados mantidos em execution_history
+MAX_EXECUTION_HISTORY = 1000
+
 
 class AgentStatus(Enum):
     """Status de um agente no sistema"""
     SLEEPING = "sleeping"        # Agente não ativo
     INITIALIZING = "initializing"  # Iniciando
+    WARM = "warm"                # Pré-aquecido: instância e recursos prontos
     ACTIVE = "active"            # Pronto para trabalhar
     BUSY = "busy"                # Processando tarefa
     WAITING = "waiting"          # Aguardando dependência
     TIMEOUT = "timeout"          # Timeout atingido
     ERROR = "error"              # Erro na execução
+    OVERLOADED = "overloaded"    # Recusado por pool lotado (não conta como falha)
     COMPLETED = "completed"      # Tarefa concluída
 
 
@@ -110,20 +127,133 @@ class CircuitBreaker:
             return True
 
 
+class AgentOverloadedError(Exception):
+    """Pool do agente sem vaga (workers ocupados e fila cheia)"""
+    pass
+
+
+class AgentPool:
+    """
+    Executor de longa duração para uma classe de agente
+    
+    max_workers threads fixas e no máximo max_queue chamadas aguardando;
+    além disso a chamada é recusada (AgentOverloadedError) em vez de criar
+    mais threads. Uma chamada que estoura o timeout tem o token cancelado:
+    se ainda estava na fila, sai sem rodar; se já rodava, fica "abandonada"
+    até o agente notar o cancelamento ou terminar - o tempo e os tokens
+    gastos nesse intervalo entram nas métricas.
+    """
+    
+    def __init__(self, name: str, max_workers: int = 2, max_queue: int = 4):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=f"agent-{name}"
+        )
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.stats = {
+            "submitted": 0,
+            "rejected": 0,
+            "timeouts": 0,
+            "cancelled_before_start": 0,
+            "abandoned": 0,
+            "abandoned_running": 0,
+            "abandoned_cancelled": 0,
+            "abandoned_finished": 0,
+            "abandoned_seconds": 0.0,
+            "abandoned_tokens": 0
+        }
+    
+    def submit(self, fn: Callable[[], Any], token: CancellationToken) -> concurrent.futures.Future:
+        """Agenda fn com o token como cancelamento corrente; recusa se não houver vaga"""
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                self.stats["rejected"] += 1
+                raise AgentOverloadedError(
+                    f"Pool {self.name} lotado ({self._in_flight} execuções em andamento/fila)"
+                )
+            self._in_flight += 1
+            self.stats["submitted"] += 1
+        
+        def run():
+            token.raise_if_cancelled()  # Cancelada enquanto esperava na fila
+            with cancellation_scope(token):
+                return fn()
+        
+        future = self.executor.submit(run)
+        future.add_done_callback(self._release)
+        return future
+    
+    def _release(self, future: concurrent.futures.Future):
+        with self._lock:
+            self._in_flight -= 1
+    
+    def abandon(self, future: concurrent.futures.Future, token: CancellationToken):
+        """Cancela a execução que estourou o timeout e acompanha o que sobrar rodando"""
+        token.cancel("timeout")
+        abandoned_at = time.time()
+        # cancel() roda os callbacks (_release) na hora: fora do lock
+        cancelled = future.cancel()
+        with self._lock:
+            self.stats["timeouts"] += 1
+            if cancelled:
+                self.stats["cancelled_before_start"] += 1
+                return
+            self.stats["abandoned"] += 1
+            self.stats["abandoned_running"] += 1
+        
+        def settle(done: concurrent.futures.Future):
+            with self._lock:
+                self.stats["abandoned_running"] -= 1
+                self.stats["abandoned_seconds"] += time.time() - abandoned_at
+                if isinstance(done.exception(), AgentCancelledError):
+                    self.stats["abandoned_cancelled"] += 1
+                else:
+                    self.stats["abandoned_finished"] += 1
+                    if done.exception() is None:
+                        self.stats["abandoned_tokens"] += getattr(done.result(), "tokens_used", 0) or 0
+        
+        future.add_done_callback(settle)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.stats,
+                "in_flight": self._in_flight,
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue
+            }
+    
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
 class AgentWakeManager:
     """
     Gerenciador de Wake Up de Agentes
     Implementa Strategy Pattern do Gemini com timeouts adaptativos
     """
     
-    def __init__(self, max_concurrent_agents: int = 5):
+    def __init__(self, max_concurrent_agents: int = 5, agent_pool_workers: int = 2,
+                 agent_pool_queue: int = 4, timeout_registry: Optional[AdaptiveTimeoutRegistry] = None):
         self.max_concurrent_agents = max_concurrent_agents
+        self.agent_pool_workers = agent_pool_workers
+        self.agent_pool_queue = agent_pool_queue
+        self.agent_pools: Dict[str, AgentPool] = {}  # Um executor por classe de agente
         self.active_agents: Dict[str, AgentStatus] = {}
         self.agent_registry: Dict[str, Any] = {}  # Instâncias dos agentes
+        self.agent_factories: Dict[str, Callable[[], Any]] = {}  # Construção sob demanda
+        self._build_locks: Dict[str, threading.Lock] = {}
+        self._warming: Dict[str, concurrent.futures.Future] = {}
+        self.prewarm_stats = {"requested": 0, "warmed": 0, "failed": 0, "warm_hits": 0, "cold_starts": 0}
         self.circuit_breakers: Dict[str, CircuitBreaker] = {}
         self.execution_history: List[AgentExecutionResult] = []
         
-        # Timeouts específicos por tipo de agente (Gemini specs)
+        # Timeouts iniciais por tipo de agente (Gemini specs); valem até o
+        # timeout_registry ter latências suficientes do agente
+        self.timeout_registry = timeout_registry or get_adaptive_timeouts()
         self.agent_timeouts = {
             "carlos": 15,              # Maestro central - rápido
             "supervisor": 20,          # Classificação rápida
@@ -145,6 +275,9 @@ class AgentWakeManager:
             "reflexor": {"automaster", "deepagent", "promptcrafter"}  # Reflexor audita outros
         }
         
+        # Latência observada por agente (média móvel) - ordena pelo caminho crítico
+        self.latency_estimates: Dict[str, float] = {}
+        
         self.lock = threading.Lock()
         
         logger.info("🚀 AgentWakeManager inicializado com timeouts Gemini")
@@ -158,144 +291,153 @@ class AgentWakeManager:
             
             logger.debug(f"🤖 Agente {agent_name} registrado")
     
+    def register_agent_factory(self, agent_name: str, factory: Callable[[], Any]):
+        """Registra um agente construído só quando usado (ou pré-aquecido)"""
+        with self.lock:
+            self.active_agents[agent_name] = AgentStatus.SLEEPING
+            self.agent_factories[agent_name] = factory
+            self.circuit_breakers[agent_name] = CircuitBreaker()
+            
+            logger.debug(f"🤖 Agente {agent_name} registrado (construção sob demanda)")
+    
+    def prewarm(self, agent_names: List[str]) -> Dict[str, concurrent.futures.Future]:
+        """
+        Aquece agentes em segundo plano antes de serem chamados
+        
+        Constrói a instância (se registrada por fábrica) e chama o hook
+        opcional `aquecer()` do agente, onde ficam os recursos preguiçosos
+        (cliente LLM, grafos de conhecimento, sessões de busca). Roda no pool
+        de I/O para não disputar vagas com as execuções; agentes já quentes
+        (aquecidos antes ou que já executaram), em aquecimento, ocupados ou
+        desconhecidos são ignorados.
+        """
+        started = {}
+        for agent_name in agent_names:
+            with self.lock:
+                known = agent_name in self.agent_registry or agent_name in self.agent_factories
+                if (not known or agent_name in self._warming
+                        or self.active_agents.get(agent_name) != AgentStatus.SLEEPING):
+                    continue
+                self.prewarm_stats["requested"] += 1
+                future = get_executor_service().submit(IO_POOL, self._warm_agent, agent_name)
+                self._warming[agent_name] = future
+            started[agent_name] = future
+        
+        if started:
+            logger.debug(f"🔥 Pré-aquecendo: {', '.join(started)}")
+        return started
+    
+    def _warm_agent(self, agent_name: str):
+        try:
+            agent_instance = self._get_agent_instance(agent_name)
+            if hasattr(agent_instance, 'aquecer'):
+                agent_instance.aquecer()
+            with self.lock:
+                self.prewarm_stats["warmed"] += 1
+                if self.active_agents.get(agent_name) == AgentStatus.SLEEPING:
+                    self.active_agents[agent_name] = AgentStatus.WARM
+        except Exception as e:
+            with self.lock:
+                self.prewarm_stats["failed"] += 1
+            logger.warning(f"⚠️ Pré-aquecimento de {agent_name} falhou: {e}")
+        finally:
+            with self.lock:
+                self._warming.pop(agent_name, None)
+    
+    def _get_agent_instance(self, agent_name: str) -> Any:
+        """Instância registrada ou construída pela fábrica (uma vez, mesmo com chamadas concorrentes)"""
+        with self.lock:
+            agent_instance = self.agent_registry.get(agent_name)
+            factory = self.agent_factories.get(agent_name)
+            build_lock = self._build_locks.setdefault(agent_name, threading.Lock())
+        if agent_instance is not None or factory is None:
+            return agent_instance
+        
+        with build_lock:
+            with self.lock:
+                agent_instance = self.agent_registry.get(agent_name)
+            if agent_instance is None:
+                build_start = time.time()
+                agent_instance = factory()
+                with self.lock:
+                    self.agent_registry[agent_name] = agent_instance
+                logger.debug(f"🏗️ Agente {agent_name} construído em {time.time() - build_start:.2f}s")
+            return agent_instance
+    
     def wake_agents_sequence(self, wake_tasks: List[AgentWakeTask], 
                            global_timeout: int = 120) -> Dict[str, AgentExecutionResult]:
         """
         Ativa agentes em sequência inteligente respeitando dependências
         Implementa Strategy Pattern do Gemini
         """
+        return {result.agent_name: result for result in self.stream_agents(wake_tasks, global_timeout)}
+    
+    def stream_agents(self, wake_tasks: List[AgentWakeTask],
+                      global_timeout: int = 120) -> Iterator[AgentExecutionResult]:
+        """
+        Executa o DAG de tarefas e entrega cada resultado assim que o agente termina
+        
+        Dependentes são liberados pelo callback de conclusão das dependências
+        (sem polling). Entre tarefas prontas, sai primeiro a de maior caminho
+        crítico estimado pela latência observada de cada agente. Dependência
+        que não conclui derruba os dependentes; ao fim do global_timeout as
+        tarefas restantes saem como TIMEOUT.
+        """
         start_time = time.time()
-        results: Dict[str, AgentExecutionResult] = {}
         
         logger.info(f"🎯 Iniciando wake up de {len(wake_tasks)} agentes")
         
-        # Ordenar tarefas por prioridade e dependências
-        sorted_tasks = self._sort_tasks_by_dependencies(wake_tasks)
+        # Pool de despacho compartilhado pelo processo (as threads só esperam os AgentPool,
+        # então não podem ocupar o pool LLM); o limite por execução vem de max_concurrent_agents
+        run = _WakeRun(self, wake_tasks, get_executor_service().get_pool(DISPATCH_POOL))
+        emitted = 0
         
-        # Executor para paralelismo controlado
-        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_concurrent_agents) as executor:
-            futures: Dict[concurrent.futures.Future, AgentWakeTask] = {}
-            
-            for task in sorted_tasks:
-                # Verificar timeout global
-                if time.time() - start_time > global_timeout:
+        try:
+            run.start()
+            while emitted < len(run.tasks):
+                remaining = global_timeout - (time.time() - start_time)
+                try:
+                    result = run.results.get(timeout=max(0.0, remaining))
+                except queue.Empty:
                     logger.warning(f"⏰ Timeout global atingido ({global_timeout}s)")
+                    for result in run.expire():
+                        yield result
                     break
-                
-                # Aguardar dependências
-                if not self._wait_for_dependencies(task, results):
-                    logger.warning(f"⚠️ Dependências não satisfeitas para {task.agent_name}")
-                    continue
-                
-                # Verificar circuit breaker
-                circuit_breaker = self.circuit_breakers.get(task.agent_name)
-                if circuit_breaker and not circuit_breaker.can_execute():
-                    logger.warning(f"🔴 Circuit breaker aberto para {task.agent_name}")
-                    results[task.agent_name] = AgentExecutionResult(
-                        agent_name=task.agent_name,
-                        status=AgentStatus.ERROR,
-                        error="Circuit breaker open"
-                    )
-                    continue
-                
-                # Submeter execução
-                future = executor.submit(self._execute_agent_task, task)
-                futures[future] = task
-                
-                logger.debug(f"🚀 {task.agent_name} submetido para execução")
-            
-            # Coletar resultados
-            for future in concurrent.futures.as_completed(futures, timeout=global_timeout):
-                task = futures[future]
-                try:
-                    result = future.result()
-                    results[task.agent_name] = result
-                    
-                    # Atualizar circuit breaker
-                    circuit_breaker = self.circuit_breakers.get(task.agent_name)
-                    if circuit_breaker:
-                        if result.status == AgentStatus.COMPLETED:
-                            circuit_breaker.record_success()
-                        else:
-                            circuit_breaker.record_failure()
-                    
-                    logger.debug(f"✅ {task.agent_name} concluído: {result.status.value}")
-                    
-                except Exception as e:
-                    logger.error(f"❌ Erro na execução de {task.agent_name}: {e}")
-                    results[task.agent_name] = AgentExecutionResult(
-                        agent_name=task.agent_name,
-                        status=AgentStatus.ERROR,
-                        error=str(e)
-                    )
+                emitted += 1
+                yield result
+        finally:
+            run.close()
         
         total_time = time.time() - start_time
-        logger.info(f"🏁 Wake up concluído em {total_time:.2f}s - {len(results)} agentes")
-        
-        return results
-    
-    def _sort_tasks_by_dependencies(self, tasks: List[AgentWakeTask]) -> List[AgentWakeTask]:
-        """Ordena tarefas respeitando dependências e prioridades"""
-        # Criar grafo de dependências
-        task_map = {task.agent_name: task for task in tasks}
-        sorted_tasks = []
-        completed = set()
-        
-        def can_execute(task: AgentWakeTask) -> bool:
-            """Verifica se todas as dependências foram satisfeitas"""
-            return task.dependencies.issubset(completed)
-        
-        # Algoritmo de ordenação topológica com prioridades
-        while len(sorted_tasks) < len(tasks):
-            # Encontrar tarefas executáveis
-            executable = [
-                task for task in tasks 
-                if task.agent_name not in completed and can_execute(task)
-            ]
-            
-            if not executable:
-                # Deadlock ou dependência circular
-                remaining = [task for task in tasks if task.agent_name not in completed]
-                logger.warning(f"⚠️ Possível deadlock detectado: {[t.agent_name for t in remaining]}")
-                # Adicionar pelo menos uma tarefa para evitar loop infinito
-                if remaining:
-                    sorted_tasks.append(remaining[0])
-                    completed.add(remaining[0].agent_name)
-                continue
-            
-            # Ordenar por prioridade (menor número = maior prioridade)
-            executable.sort(key=lambda t: t.priority)
-            
-            # Executar a de maior prioridade
-            next_task = executable[0]
-            sorted_tasks.append(next_task)
-            completed.add(next_task.agent_name)
-        
-        return sorted_tasks
+        logger.info(f"🏁 Wake up concluído em {total_time:.2f}s - {len(run.tasks)} agentes")
     
-    def _wait_for_dependencies(self, task: AgentWakeTask, 
-                              results: Dict[str, AgentExecutionResult],
-                              max_wait: int = 30) -> bool:
-        """Aguarda dependências serem satisfeitas"""
-        if not task.dependencies:
-            return True
-        
-        start_wait = time.time()
-        
-        while time.time() - start_wait < max_wait:
-            satisfied = True
-            for dep in task.dependencies:
-                if dep not in results or results[dep].status != AgentStatus.COMPLETED:
-                    satisfied = False
-                    break
+    def estimated_latency(self, agent_name: str, default_timeout: float) -> float:
+        """Latência esperada do agente (média móvel; sem histórico, fração do timeout)"""
+        with self.lock:
+            if agent_name in self.latency_estimates:
+                return self.latency_estimates[agent_name]
+        return self.agent_timeouts.get(agent_name, default_timeout) * DEFAULT_LATENCY_TIMEOUT_FRACTION
+    
+    def _record_result(self, result: AgentExecutionResult, count_failure: bool = True):
+        """Atualiza circuit breaker, histórico e latência observada"""
+        with self.lock:
+            circuit_breaker = self.circuit_breakers.get(result.agent_name)
+            if circuit_breaker:
+                if result.status == AgentStatus.COMPLETED:
+                    circuit_breaker.record_success()
+                elif count_failure:
+                    circuit_breaker.record_failure()
             
-            if satisfied:
-                return True
+            if result.status == AgentStatus.COMPLETED:
+                previous = self.latency_estimates.get(result.agent_name)
+                self.latency_estimates[result.agent_name] = (
+                    result.execution_time if previous is None
+                    else LATENCY_EWMA_ALPHA * result.execution_time + (1 - LATENCY_EWMA_ALPHA) * previous
+                )
             
-            time.sleep(0.5)  # Aguardar um pouco
-        
-        logger.warning(f"⏰ Timeout aguardando dependências para {task.agent_name}")
-        return False
+            self.execution_history.append(result)
+            if len(self.execution_history) > MAX_EXECUTION_HISTORY:
+                del self.execution_history[:-MAX_EXECUTION_HISTORY]
     
     def _execute_agent_task(self, task: AgentWakeTask) -> AgentExecutionResult:
         """Executa uma tarefa de agente com timeout"""
@@ -304,11 +446,15 @@ class AgentWakeManager:
         
         # Atualizar status
         with self.lock:
+            if self.active_agents.get(agent_name) == AgentStatus.WARM:
+                self.prewarm_stats["warm_hits"] += 1
+            elif agent_name in self.agent_factories and agent_name not in self.agent_registry:
+                self.prewarm_stats["cold_starts"] += 1
             self.active_agents[agent_name] = AgentStatus.INITIALIZING
         
         try:
-            # Obter instância do agente
-            agent_instance = self.agent_registry.get(agent_name)
+            # Obter instância do agente (construída agora se ainda não existe)
+            agent_instance = self._get_agent_instance(agent_name)
             if not agent_instance:
                 raise ValueError(f"Agente {agent_name} não registrado")
             
@@ -316,8 +462,8 @@ class AgentWakeManager:
             with self.lock:
                 self.active_agents[agent_name] = AgentStatus.ACTIVE
             
-            # Executar com timeout
-            timeout = self.agent_timeouts.get(agent_name, task.timeout)
+            # Executar com timeout (adaptativo pela latência observada)
+            timeout = self.get_agent_timeout(agent_name, task.timeout)
             
             result = self._execute_with_timeout(
                 agent_instance, 
@@ -326,6 +472,7 @@ class AgentWakeManager:
             )
             
             execution_time = time.time() - start_time
+            self.timeout_registry.observe(agent_name, execution_time)
             
             # Criar resultado de sucesso
             agent_result = AgentExecutionResult(
@@ -345,12 +492,23 @@ class AgentWakeManager:
             
             return agent_result
             
+        except AgentOverloadedError as e:
+            # Falta de vaga não é defeito do agente: não alimenta o circuit breaker
+            logger.warning(f"🚧 {agent_name} recusado: {e}")
+            return AgentExecutionResult(
+                agent_name=agent_name,
+                status=AgentStatus.OVERLOADED,
+                error=str(e),
+                execution_time=time.time() - start_time
+            )
+        
         except TimeoutError:
-            logger.warning(f"⏰ Timeout de {agent_name} ({timeout}s)")
+            self.timeout_registry.observe(agent_name, timeout, timed_out=True)
+            logger.warning(f"⏰ Timeout de {agent_name} ({timeout:.1f}s)")
             return AgentExecutionResult(
                 agent_name=agent_name,
                 status=AgentStatus.TIMEOUT,
-                error=f"Timeout após {timeout}s",
+                error=f"Timeout após {timeout:.1f}s",
                 execution_time=time.time() - start_time
             )
             
@@ -364,41 +522,60 @@ class AgentWakeManager:
             )
         
         finally:
-            # Voltar para sleeping
+            # Instância construída segue com recursos carregados: fica quente para a próxima
             with self.lock:
-                self.active_agents[agent_name] = AgentStatus.SLEEPING
+                built = self.agent_registry.get(agent_name) is not None
+                self.active_agents[agent_name] = AgentStatus.WARM if built else AgentStatus.SLEEPING
+    
+    def get_agent_timeout(self, agent_name: str, default: float) -> float:
+        """Timeout em vigor para o agente (p99 observado × fator, ou o valor fixo inicial)"""
+        return self.timeout_registry.timeout_for(agent_name, self.agent_timeouts.get(agent_name, default))
+    
+    def get_timeouts_snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Timeouts em vigor com percentis e amostras por agente (inspeção)"""
+        return self.timeout_registry.snapshot(self.agent_timeouts)
+    
+    def _get_agent_pool(self, agent_instance: Any) -> AgentPool:
+        """Pool compartilhado por todas as instâncias da mesma classe de agente"""
+        class_name = agent_instance.__class__.__name__
+        with self.lock:
+            if class_name not in self.agent_pools:
+                self.agent_pools[class_name] = AgentPool(
+                    class_name, self.agent_pool_workers, self.agent_pool_queue
+                )
+            return self.agent_pools[class_name]
     
     def _execute_with_timeout(self, agent_instance: Any, context: Dict, timeout: int) -> Any:
-        """Executa agente com timeout usando threads"""
-        result = [None]
-        exception = [None]
-        
+        """Executa agente no pool da sua classe; no timeout cancela de forma cooperativa"""
         def target():
-            try:
-                # Assumir que agente tem método 'processar'
-                if hasattr(agent_instance, 'processar'):
-                    result[0] = agent_instance.processar(
-                        context.get('message', ''), 
-                        context.get('context', {})
-                    )
-                else:
-                    result[0] = f"Agente {agent_instance.__class__.__name__} ativado"
-            except Exception as e:
-                exception[0] = e
+            # Assumir que agente tem método 'processar'
+            if hasattr(agent_instance, 'processar'):
+                return agent_instance.processar(
+                    context.get('message', ''), 
+                    context.get('context', {})
+                )
+            return f"Agente {agent_instance.__class__.__name__} ativado"
         
-        thread = threading.Thread(target=target)
-        thread.daemon = True
-        thread.start()
-        thread.join(timeout)
+        pool = self._get_agent_pool(agent_instance)
+        token = CancellationToken()
+        future = pool.submit(target, token)
         
-        if thread.is_alive():
-            # Thread ainda executando - timeout
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            if future.done():
+                # Terminou no limite (ou o próprio agente levantou TimeoutError)
+                return future.result()
+            # Thread segue até o agente checar o token: contabilizada como abandonada
+            pool.abandon(future, token)
             raise TimeoutError(f"Execução excedeu {timeout}s")
-        
-        if exception[0]:
-            raise exception[0]
-        
-        return result[0]
+    
+    def shutdown(self):
+        """Encerra os pools de agentes (execuções em fila são canceladas)"""
+        with self.lock:
+            pools, self.agent_pools = list(self.agent_pools.values()), {}
+        for pool in pools:
+            pool.shutdown()
     
     def get_agent_status(self, agent_name: str) -> AgentStatus:
         """Retorna status atual de um agente"""
@@ -445,10 +622,170 @@ class AgentWakeManager:
             "timeouts": len(timeouts),
             "success_rate": len(successful) / len(self.execution_history) if self.execution_history else 0,
             "avg_execution_time": avg_execution_time,
-            "total_tokens_used": sum(r.tokens_used for r in self.execution_history)
+            "total_tokens_used": sum(r.tokens_used for r in self.execution_history),
+            "latency_estimates": dict(self.latency_estimates),
+            "agent_pools": {name: pool.get_stats() for name, pool in self.agent_pools.items()},
+            "executor_pools": get_executor_service().get_stats(),
+            "agent_timeouts": self.get_timeouts_snapshot(),
+            "prewarm": dict(self.prewarm_stats)
         }
 
 
+class _WakeRun:
+    """
+    Estado de uma execução do DAG de wake up
+    
+    Cada tarefa espera num contador de dependências pendentes; o callback de
+    conclusão de uma tarefa libera os dependentes (ou os derruba, se ela não
+    concluiu) e despacha as prontas, até max_concurrent_agents em execução.
+    Resultados vão para a fila `results` na ordem em que terminam.
+    """
+    
+    def __init__(self, manager: AgentWakeManager, tasks: List[AgentWakeTask], executor: Any):
+        self.manager = manager
+        self.executor = executor
+        self.tasks = {task.agent_name: task for task in tasks}
+        self.results: "queue.Queue[AgentExecutionResult]" = queue.Queue()
+        
+        self._lock = threading.RLock()  # add_done_callback pode rodar na mesma thread
+        self._pending: Dict[str, Set[str]] = {}
+        self._dependents: Dict[str, List[str]] = {name: [] for name in self.tasks}
+        self._critical_path: Dict[str, float] = {}
+        self._ready: List[tuple] = []
+        self._running: Dict[str, concurrent.futures.Future] = {}
+        self._finished: Set[str] = set()
+        self._closed = False
+        self._sequence = 0
+    
+    def start(self):
+        """Resolve o grafo e despacha as tarefas sem dependências"""
+        with self._lock:
+            missing: Dict[str, Set[str]] = {}
+            for name, task in self.tasks.items():
+                self._pending[name] = {dep for dep in task.dependencies if dep in self.tasks}
+                missing[name] = set(task.dependencies) - set(self.tasks)
+                for dep in self._pending[name]:
+                    self._dependents[dep].append(name)
+            
+            ordered = self._topological_order()
+            for name in reversed(ordered):
+                task = self.tasks[name]
+                downstream = max((self._critical_path[d] for d in self._dependents[name]), default=0.0)
+                self._critical_path[name] = self.manager.estimated_latency(name, task.timeout) + downstream
+            
+            for name in self.tasks:
+                if name not in self._critical_path:
+                    logger.warning(f"⚠️ Dependência circular envolvendo {name}")
+                    self._fail(name, "Dependência circular")
+                elif missing[name]:
+                    logger.warning(f"⚠️ Dependências não satisfeitas para {name}: {sorted(missing[name])}")
+                    self._fail(name, f"Dependências fora da execução: {sorted(missing[name])}")
+                elif not self._pending[name]:
+                    self._push_ready(name)
+            
+            self._dispatch()
+    
+    def _topological_order(self) -> List[str]:
+        """Ordem topológica (Kahn); tarefas em ciclos ficam de fora"""
+        indegree = {name: len(deps) for name, deps in self._pending.items()}
+        frontier = [name for name, degree in indegree.items() if degree == 0]
+        ordered = []
+        while frontier:
+            name = frontier.pop()
+            ordered.append(name)
+            for dependent in self._dependents[name]:
+                indegree[dependent] -= 1
+                if indegree[dependent] == 0:
+                    frontier.append(dependent)
+        return ordered
+    
+    def _push_ready(self, name: str):
+        # Maior caminho crítico primeiro; empate pela prioridade da tarefa
+        self._sequence += 1
+        heapq.heappush(self._ready, (-self._critical_path[name], self.tasks[name].priority,
+                                     self._sequence, name))
+    
+    def _dispatch(self):
+        while self._ready and not self._closed and len(self._running) < self.manager.max_concurrent_agents:
+            name = heapq.heappop(self._ready)[3]
+            
+            circuit_breaker = self.manager.circuit_breakers.get(name)
+            if circuit_breaker and not circuit_breaker.can_execute():
+                logger.warning(f"🔴 Circuit breaker aberto para {name}")
+                self._finish(AgentExecutionResult(agent_name=name, status=AgentStatus.ERROR,
+                                                  error="Circuit breaker open"), record=False)
+                continue
+            
+            future = self.executor.submit(self.manager._execute_agent_task, self.tasks[name])
+            self._running[name] = future
+            logger.debug(f"🚀 {name} submetido para execução")
+            future.add_done_callback(lambda f, name=name: self._on_done(name, f))
+    
+    def _on_done(self, name: str, future: concurrent.futures.Future):
+        if future.cancelled():
+            return
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.error(f"❌ Erro na execução de {name}: {e}")
+            result = AgentExecutionResult(agent_name=name, status=AgentStatus.ERROR, error=str(e))
+        
+        with self._lock:
+            self._running.pop(name, None)
+            if self._closed:
+                return  # Terminou depois do timeout global: resultado já foi emitido
+            logger.debug(f"✅ {name} concluído: {result.status.value}")
+            self._finish(result)
+            self._dispatch()
+    
+    def _finish(self, result: AgentExecutionResult, record: bool = True):
+        """Emite o resultado e libera (ou derruba) os dependentes"""
+        name = result.agent_name
+        if name in self._finished:
+            return
+        self._finished.add(name)
+        if record:
+            self.manager._record_result(result, count_failure=result.status != AgentStatus.OVERLOADED)
+        self.results.put(result)
+        
+        for dependent in self._dependents[name]:
+            if result.status != AgentStatus.COMPLETED:
+                self._fail(dependent, f"Dependência {name} não concluída ({result.status.value})")
+                continue
+            self._pending[dependent].discard(name)
+            if not self._pending[dependent] and dependent not in self._finished:
+                self._push_ready(dependent)
+    
+    def _fail(self, name: str, error: str):
+        self._finish(AgentExecutionResult(agent_name=name, status=AgentStatus.ERROR, error=error),
+                     record=False)
+    
+    def expire(self) -> List[AgentExecutionResult]:
+        """Encerra a execução no timeout global: tarefas restantes viram TIMEOUT"""
+        with self._lock:
+            self._closed = True
+            expired = []
+            for name in self.tasks:
+                if name in self._finished:
+                    continue
+                self._finished.add(name)
+                future = self._running.get(name)
+                if future is not None:
+                    future.cancel()
+                expired.append(AgentExecutionResult(
+                    agent_name=name,
+                    status=AgentStatus.TIMEOUT,
+                    error="Timeout global" if future is not None else "Não iniciado antes do timeout global"
+                ))
+            return expired
+    
+    def close(self):
+        with self._lock:
+            self._closed = True
+            for future in self._running.values():
+                future.cancel()
+
+
 # Singleton global
 _wake_manager_instance = None
 _wake_manager_lock = threading.Lock()
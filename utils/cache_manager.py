@@ -5,14 +5,17 @@ Implementa cache hierárquico com similaridade semântica
 
 import sqlite3
 import json
+import gzip
 import hashlib
+import sys
 import time
+import zlib
 from datetime import datetime, timedelta
-from typing import Dict, Tuple, Optional, List, Set
+from typing import Dict, Tuple, Optional, List, Set, FrozenSet, Iterable
 from collections import OrderedDict
 from pathlib import Path
 import re
-from threading import Lock
+from threading import Lock, Thread, Event
 
 # Logger
 try:
@@ -28,6 +31,47 @@ except ImportError:
 
 logger = get_logger(__name__)
 
+# zstd é opcional - sem ele, respostas grandes usam zlib no nível máximo
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+# Faixas de tamanho (bytes UTF-8) para compressão das respostas no SQLite
+COMPRESSION_MIN_BYTES = 512          # Abaixo disso: texto puro (overhead não compensa)
+COMPRESSION_LARGE_BYTES = 64 * 1024  # Acima disso: zstd (ou zlib nível 9)
+
+# Hits servidos pela memória acumulados antes de gravar access_count no SQLite
+ACCESS_FLUSH_BATCH = 64
+
+# Máximo de parâmetros por consulta "IN (...)" (limite antigo do SQLite é 999)
+SQLITE_MAX_PARAMS = 500
+
+# Formato do snapshot portátil (export_snapshot/import_snapshot)
+SNAPSHOT_FORMAT = "gptma-cache-snapshot"
+SNAPSHOT_VERSION = 1
+
+# Namespace usado quando o chamador não informa um (compatível com caches antigos)
+DEFAULT_NAMESPACE = "default"
+
+
+def build_namespace(agent: Optional[str] = None, provider: Optional[str] = None,
+                    model: Optional[str] = None, prompt_version: Optional[str] = None,
+                    user_tier: Optional[str] = None) -> str:
+    """
+    Monta um namespace canônico para o cache (ex: "agent=carlos|model=gemini")
+    
+    Cada parte informada vira também uma tag da entrada ("agent:carlos",
+    "model:gemini"), permitindo invalidar uma fatia entre namespaces.
+    """
+    parts = [
+        ("agent", agent), ("provider", provider), ("model", model),
+        ("prompt", prompt_version), ("tier", user_tier)
+    ]
+    namespace = "|".join(f"{name}={value}" for name, value in parts if value)
+    return namespace or DEFAULT_NAMESPACE
+
 
 class CacheManager:
     """
@@ -40,23 +84,31 @@ class CacheManager:
     def __init__(self, 
                  cache_dir: str = "data",
                  max_memory_items: int = 1000,
+                 max_memory_bytes: int = 64 * 1024 * 1024,
                  ttl_seconds: int = 3600,
-                 similarity_threshold: float = 0.8):
+                 similarity_threshold: float = 0.8,
+                 async_warmup: bool = True,
+                 warmup_batch_size: int = 100):
         """
         Inicializa o gerenciador de cache
         
         Args:
             cache_dir: Diretório para armazenar o cache persistente
             max_memory_items: Número máximo de itens em memória (LRU)
+            max_memory_bytes: Orçamento em bytes das respostas mantidas em memória
             ttl_seconds: Time-to-live padrão em segundos
             similarity_threshold: Threshold para similaridade Jaccard
+            async_warmup: Carrega o cache do disco em background (não bloqueia)
+            warmup_batch_size: Itens carregados por lote durante o warm-up
         """
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(exist_ok=True)
         
         self.max_memory_items = max_memory_items
+        self.max_memory_bytes = max_memory_bytes
         self.ttl_seconds = ttl_seconds
         self.similarity_threshold = similarity_threshold
+        self.warmup_batch_size = max(1, warmup_batch_size)
         
         # Cache em memória (Nível 1) - OrderedDict para LRU
         self.memory_cache: OrderedDict[str, Dict] = OrderedDict()
@@ -65,6 +117,19 @@ class CacheManager:
         self.similarity_index: Dict[str, Set[str]] = {}
         self.similarity_cache: Dict[str, Dict] = {}
         
+        # Respostas internadas: os dois níveis referenciam a mesma string
+        # digest -> [resposta, referências, bytes]
+        self._response_pool: Dict[bytes, List] = {}
+        self._memory_bytes = 0
+        
+        # Índices para invalidação em massa (valem para os dois níveis)
+        self._entry_meta: Dict[str, Tuple[str, FrozenSet[str]]] = {}  # hash -> (namespace, tags)
+        self._namespace_index: Dict[str, Set[str]] = {}               # namespace -> hashes
+        self._tag_index: Dict[str, Set[str]] = {}                     # tag -> hashes
+        
+        # Acessos servidos pela memória ainda não gravados: hash -> (hits, último acesso)
+        self._pending_access: Dict[str, Tuple[int, float]] = {}
+        
         # Lock para thread safety
         self._lock = Lock()
         
@@ -74,14 +139,30 @@ class CacheManager:
             'hits_similarity': 0,
             'misses': 0,
             'tokens_saved': 0,
-            'invalidations': 0
+            'invalidations': 0,
+            'warmup_loaded': 0
         }
         
         # Inicializar banco de dados
         self._init_db()
         
-        # Carregar cache do disco
-        self._load_from_disk()
+        # Carregar cache do disco (warm-up incremental)
+        # Enquanto o warm-up roda, hits exatos continuam sendo servidos pelo SQLite
+        self._warmup_done = Event()
+        self._generation = 0  # Incrementado a cada invalidação total
+        # Fatias (namespace, tags) invalidadas durante o warm-up: só elas saem dos lotes
+        self._warmup_invalidations: List[Tuple[Optional[str], FrozenSet[str]]] = []
+        self._warmup_thread: Optional[Thread] = None
+        
+        if async_warmup:
+            self._warmup_thread = Thread(
+                target=self._load_from_disk,
+                name="CacheManagerWarmup",
+                daemon=True
+            )
+            self._warmup_thread.start()
+        else:
+            self._load_from_disk()
         
         logger.info("🚀 CacheManager inicializado")
         
@@ -90,7 +171,7 @@ class CacheManager:
         db_path = self.cache_dir / "cache.db"
         
         with sqlite3.connect(str(db_path)) as conn:
-            conn.execute("""
+            conn.execute(f"""
                 CREATE TABLE IF NOT EXISTS cache (
                     query_hash TEXT PRIMARY KEY,
                     query_normalized TEXT,
@@ -98,10 +179,40 @@ class CacheManager:
                     tokens_used INTEGER,
                     timestamp REAL,
                     access_count INTEGER DEFAULT 1,
-                    last_accessed REAL
+                    last_accessed REAL,
+                    query_tokens TEXT,
+                    compression TEXT,
+                    namespace TEXT DEFAULT '{DEFAULT_NAMESPACE}'
+                )
+            """)
+            
+            # Migração: bancos antigos não têm as colunas mais novas
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(cache)")}
+            new_columns = {
+                'query_tokens': "TEXT",
+                'compression': "TEXT",
+                'namespace': f"TEXT DEFAULT '{DEFAULT_NAMESPACE}'"
+            }
+            for column, ddl in new_columns.items():
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE cache ADD COLUMN {column} {ddl}")
+            
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache_tags (
+                    tag TEXT,
+                    query_hash TEXT,
+                    PRIMARY KEY (tag, query_hash)
                 )
             """)
             
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_cache_tags_hash ON cache_tags(query_hash)
+            """)
+            
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_namespace ON cache(namespace)
+            """)
+            
             conn.execute("""
                 CREATE INDEX IF NOT EXISTS idx_timestamp ON cache(timestamp)
             """)
@@ -127,11 +238,20 @@ class CacheManager:
         
         return normalized
     
-    def _hash_query(self, query: str) -> str:
-        """Gera hash SHA256 da query normalizada"""
+    def _hash_query(self, query: str, namespace: str = DEFAULT_NAMESPACE) -> str:
+        """Gera hash SHA256 da query normalizada dentro do namespace"""
         normalized = self._normalize_query(query)
+        if namespace != DEFAULT_NAMESPACE:
+            normalized = f"{namespace}\n{normalized}"
         return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
     
+    def _namespace_tags(self, namespace: str) -> Set[str]:
+        """Deriva tags das partes do namespace ("agent=carlos" -> "agent:carlos")"""
+        return {
+            part.replace("=", ":", 1)
+            for part in namespace.split("|") if "=" in part
+        }
+    
     def _tokenize_query(self, query: str) -> Set[str]:
         """Tokeniza a query para cálculo de similaridade"""
         normalized = self._normalize_query(query)
@@ -170,20 +290,200 @@ class CacheManager:
         
         return len(intersection) / len(union)
     
+    def _compress_response(self, response: str) -> Tuple[object, Optional[str]]:
+        """
+        Comprime a resposta para o SQLite com nível escolhido pelo tamanho
+        
+        Returns:
+            Tuple[payload, codec] - codec None indica texto puro
+        """
+        raw = response.encode('utf-8')
+        
+        if len(raw) < COMPRESSION_MIN_BYTES:
+            return response, None
+        
+        if len(raw) < COMPRESSION_LARGE_BYTES:
+            return zlib.compress(raw, 6), 'zlib'
+        
+        if ZSTD_AVAILABLE:
+            return zstandard.ZstdCompressor(level=10).compress(raw), 'zstd'
+        
+        return zlib.compress(raw, 9), 'zlib'
+    
+    def _decompress_response(self, payload, codec: Optional[str]) -> str:
+        """Restaura a resposta persistida (linhas antigas são texto puro)"""
+        if not codec:
+            return payload
+        
+        if codec == 'zlib':
+            return zlib.decompress(payload).decode('utf-8')
+        
+        if codec == 'zstd':
+            if not ZSTD_AVAILABLE:
+                raise RuntimeError("Resposta comprimida com zstd, mas zstandard não está instalado")
+            return zstandard.ZstdDecompressor().decompress(payload).decode('utf-8')
+        
+        raise ValueError(f"Codec de compressão desconhecido: {codec}")
+    
+    def _intern_response(self, response: str) -> Tuple[str, bytes]:
+        """Retorna a instância compartilhada da resposta e sua chave no pool"""
+        key = hashlib.blake2b(response.encode('utf-8'), digest_size=16).digest()
+        slot = self._response_pool.get(key)
+        
+        if slot is None:
+            size = sys.getsizeof(response)
+            slot = self._response_pool[key] = [response, 0, size]
+            self._memory_bytes += size
+        
+        slot[1] += 1
+        return slot[0], key
+    
+    def _release_response(self, key: bytes):
+        """Libera uma referência; a resposta sai do pool quando ninguém mais a usa"""
+        slot = self._response_pool.get(key)
+        if slot is None:
+            return
+        
+        slot[1] -= 1
+        if slot[1] <= 0:
+            del self._response_pool[key]
+            self._memory_bytes -= slot[2]
+    
+    def _index_entry(self, query_hash: str, namespace: str, tags: Iterable[str]):
+        """Registra a entrada nos índices de namespace e tags"""
+        if query_hash in self._entry_meta:
+            return
+        
+        tags = frozenset(tags)
+        self._entry_meta[query_hash] = (namespace, tags)
+        self._namespace_index.setdefault(namespace, set()).add(query_hash)
+        for tag in tags:
+            self._tag_index.setdefault(tag, set()).add(query_hash)
+    
+    def _unindex_entry(self, query_hash: str):
+        """Remove a entrada dos índices quando nenhum nível a referencia mais"""
+        if query_hash in self.memory_cache or query_hash in self.similarity_cache:
+            return
+        
+        meta = self._entry_meta.pop(query_hash, None)
+        if meta is None:
+            return
+        
+        namespace, tags = meta
+        for index, key in [(self._namespace_index, namespace)] + [(self._tag_index, t) for t in tags]:
+            hashes = index.get(key)
+            if hashes is not None:
+                hashes.discard(query_hash)
+                if not hashes:
+                    del index[key]
+    
+    def _drop_memory_item(self, query_hash: str) -> Optional[Dict]:
+        """Remove item do cache em memória liberando a resposta internada"""
+        item = self.memory_cache.pop(query_hash, None)
+        if item is not None:
+            self._release_response(item['response_key'])
+            self._unindex_entry(query_hash)
+        return item
+    
+    def _drop_similarity_item(self, query_hash: str):
+        """Remove item do índice de similaridade liberando a resposta internada"""
+        self.similarity_index.pop(query_hash, None)
+        item = self.similarity_cache.pop(query_hash, None)
+        if item is not None:
+            self._release_response(item['response_key'])
+            self._unindex_entry(query_hash)
+    
+    def _drop_entry(self, query_hash: str):
+        """Remove a entrada dos dois níveis em memória"""
+        self._drop_memory_item(query_hash)
+        self._drop_similarity_item(query_hash)
+        self._pending_access.pop(query_hash, None)
+    
+    def _record_access(self, query_hash: str):
+        """Conta um hit servido pela memória (gravado em lote no SQLite). Chamador segura o lock"""
+        hits, _ = self._pending_access.get(query_hash, (0, 0.0))
+        self._pending_access[query_hash] = (hits + 1, time.time())
+        if len(self._pending_access) >= ACCESS_FLUSH_BATCH:
+            self._flush_access_counts()
+    
+    def _flush_access_counts(self):
+        """Grava access_count/last_accessed acumulados dos hits em memória. Chamador segura o lock"""
+        if not self._pending_access:
+            return
+        
+        rows = [(last_accessed, hits, query_hash)
+                for query_hash, (hits, last_accessed) in self._pending_access.items()]
+        self._pending_access.clear()
+        
+        db_path = self.cache_dir / "cache.db"
+        try:
+            with sqlite3.connect(str(db_path)) as conn:
+                conn.executemany("""
+                    UPDATE cache
+                    SET last_accessed = MAX(last_accessed, ?), access_count = access_count + ?
+                    WHERE query_hash = ?
+                """, rows)
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Erro ao gravar contagem de acessos: {e}")
+    
+    def _set_similarity_item(self, query_hash: str, normalized_query: str,
+                             query_tokens: Set[str], response: str,
+                             tokens_used: int, timestamp: float):
+        """Adiciona ou substitui item no índice de similaridade"""
+        self.similarity_index.pop(query_hash, None)
+        previous = self.similarity_cache.pop(query_hash, None)
+        if previous is not None:
+            self._release_response(previous['response_key'])
+        
+        response, response_key = self._intern_response(response)
+        self.similarity_index[query_hash] = query_tokens
+        self.similarity_cache[query_hash] = {
+            'response': response,
+            'response_key': response_key,
+            'tokens_used': tokens_used,
+            'timestamp': timestamp,
+            'normalized_query': normalized_query
+        }
+    
+    def _is_over_budget(self) -> bool:
+        """Verifica se a memória excedeu o orçamento de bytes ou de itens"""
+        return (self._memory_bytes > self.max_memory_bytes or
+                len(self.memory_cache) > self.max_memory_items)
+    
+    def _enforce_memory_budget(self):
+        """Remove itens menos recentes até caber no orçamento de memória"""
+        while self._is_over_budget():
+            if self.memory_cache:
+                self._drop_entry(next(iter(self.memory_cache)))
+            elif self.similarity_cache:
+                self._drop_similarity_item(next(iter(self.similarity_cache)))
+            else:
+                break
+            logger.debug(f"LRU: Removido item mais antigo do cache")
+    
     def _is_expired(self, timestamp: float) -> bool:
         """Verifica se um item está expirado"""
         return (time.time() - timestamp) > self.ttl_seconds
     
-    def get(self, query: str) -> Tuple[Optional[str], int]:
+    def get(self, query: str, namespace: str = DEFAULT_NAMESPACE,
+            fallback_namespace: Optional[str] = None) -> Tuple[Optional[str], int]:
         """
         Busca resposta no cache
         
+        Args:
+            query: Pergunta do usuário
+            namespace: Fatia do cache (ver build_namespace); só ela é consultada
+            fallback_namespace: Namespace antigo lido só por hit exato quando o
+                                atual falha; a entrada achada é migrada para
+                                namespace (leitura com migração preguiçosa)
+        
         Returns:
             Tuple[resposta, tokens_economizados] ou (None, 0) se não encontrar
         """
         with self._lock:
             # Nível 1: Cache Exato
-            query_hash = self._hash_query(query)
+            query_hash = self._hash_query(query, namespace)
             
             # Verificar memória primeiro
             if query_hash in self.memory_cache:
@@ -192,6 +492,7 @@ class CacheManager:
                 if not self._is_expired(item['timestamp']):
                     # Atualizar LRU (mover para o final)
                     self.memory_cache.move_to_end(query_hash)
+                    self._record_access(query_hash)
                     
                     # Atualizar estatísticas
                     self.stats['hits_exact'] += 1
@@ -201,17 +502,17 @@ class CacheManager:
                     return item['response'], item['tokens_used']
                 else:
                     # Expirado - remover
-                    del self.memory_cache[query_hash]
+                    self._drop_memory_item(query_hash)
                     self._remove_from_disk(query_hash)
             
             # Verificar disco se não está na memória
             disk_result = self._get_from_disk(query_hash)
             if disk_result:
-                response, tokens_used = disk_result
+                response, tokens_used, tags = disk_result
                 
                 # Adicionar à memória (LRU cuidará do limite)
                 self._add_to_memory(query_hash, self._normalize_query(query), 
-                                  response, tokens_used)
+                                  response, tokens_used, namespace, tags)
                 
                 self.stats['hits_exact'] += 1
                 self.stats['tokens_saved'] += tokens_used
@@ -219,22 +520,37 @@ class CacheManager:
                 logger.info(f"✅ Cache hit (disco): {tokens_used} tokens economizados")
                 return response, tokens_used
             
+            if fallback_namespace is not None and fallback_namespace != namespace:
+                migrated = self._migrate_entry(query, fallback_namespace, namespace)
+                if migrated:
+                    response, tokens_used = migrated
+                    self.stats['hits_exact'] += 1
+                    self.stats['tokens_saved'] += tokens_used
+                    
+                    logger.info(f"✅ Cache hit (namespace antigo, migrado): {tokens_used} tokens economizados")
+                    return response, tokens_used
+            
             # Nível 2: Cache por Similaridade
             query_tokens = self._tokenize_query(query)
             best_match = None
             best_similarity = 0.0
             
-            for cached_query, cached_tokens in self.similarity_index.items():
+            for cached_hash in self._namespace_index.get(namespace, ()):
+                cached_tokens = self.similarity_index.get(cached_hash)
+                if cached_tokens is None:
+                    continue
+                
                 similarity = self._calculate_jaccard_similarity(query_tokens, cached_tokens)
                 
                 if similarity > best_similarity and similarity >= self.similarity_threshold:
                     best_similarity = similarity
-                    best_match = cached_query
+                    best_match = cached_hash
             
             if best_match and best_match in self.similarity_cache:
                 item = self.similarity_cache[best_match]
                 
                 if not self._is_expired(item['timestamp']):
+                    self._record_access(best_match)
                     self.stats['hits_similarity'] += 1
                     self.stats['tokens_saved'] += item['tokens_used']
                     
@@ -247,79 +563,135 @@ class CacheManager:
             logger.debug("❌ Cache miss")
             return None, 0
     
-    def put(self, query: str, response: str, tokens_used: int):
-        """Adiciona ou atualiza item no cache"""
+    def put(self, query: str, response: str, tokens_used: int,
+            namespace: str = DEFAULT_NAMESPACE, tags: Optional[Set[str]] = None):
+        """
+        Adiciona ou atualiza item no cache
+        
+        Args:
+            namespace: Fatia do cache (agente, provider/modelo, tier do usuário)
+            tags: Tags extras para invalidação em massa (somadas às do namespace)
+        """
         with self._lock:
-            query_hash = self._hash_query(query)
-            normalized_query = self._normalize_query(query)
-            
-            # Adicionar ao cache em memória
-            self._add_to_memory(query_hash, normalized_query, response, tokens_used)
-            
-            # Adicionar ao índice de similaridade
-            query_tokens = self._tokenize_query(query)
-            self.similarity_index[normalized_query] = query_tokens
-            self.similarity_cache[normalized_query] = {
-                'response': response,
-                'tokens_used': tokens_used,
-                'timestamp': time.time()
-            }
-            
-            # Persistir no disco
-            self._save_to_disk(query_hash, normalized_query, response, tokens_used)
-            
-            logger.info(f"💾 Cache atualizado: {tokens_used} tokens")
+            self._put_locked(query, response, tokens_used, namespace, tags)
+    
+    def _put_locked(self, query: str, response: str, tokens_used: int,
+                    namespace: str, tags: Optional[Iterable[str]] = None):
+        """Corpo de put (chamador segura o lock)"""
+        query_hash = self._hash_query(query, namespace)
+        normalized_query = self._normalize_query(query)
+        entry_tags = set(tags or ()) | self._namespace_tags(namespace)
+        
+        # Substituir entrada anterior (tags podem ter mudado)
+        self._drop_entry(query_hash)
+        self._index_entry(query_hash, namespace, entry_tags)
+        
+        # Adicionar ao índice de similaridade
+        query_tokens = self._tokenize_query(query)
+        self._set_similarity_item(query_hash, normalized_query, query_tokens,
+                                  response, tokens_used, time.time())
+        
+        # Adicionar ao cache em memória (mesma resposta internada)
+        self._add_to_memory(query_hash, normalized_query, response, tokens_used,
+                            namespace, entry_tags)
+        
+        # Persistir no disco (com tokens pré-calculados para o warm-up)
+        self._save_to_disk(query_hash, normalized_query, response, tokens_used,
+                           query_tokens, namespace, entry_tags)
+        
+        logger.info(f"💾 Cache atualizado: {tokens_used} tokens")
+    
+    def _migrate_entry(self, query: str, source_namespace: str,
+                       target_namespace: str) -> Optional[Tuple[str, int]]:
+        """Move a entrada exata de query de source para target (chamador segura o lock)"""
+        source_hash = self._hash_query(query, source_namespace)
+        item = self.memory_cache.get(source_hash)
+        if item is not None and not self._is_expired(item['timestamp']):
+            found = (item['response'], item['tokens_used'])
+        else:
+            disk_result = self._get_from_disk(source_hash)
+            found = disk_result[:2] if disk_result else None
+        if found is None:
+            return None
+        
+        response, tokens_used = found
+        self._drop_entry(source_hash)
+        self._remove_from_disk(source_hash)
+        self._put_locked(query, response, tokens_used, target_namespace)
+        return response, tokens_used
     
     def _add_to_memory(self, query_hash: str, normalized_query: str, 
-                      response: str, tokens_used: int):
-        """Adiciona item ao cache em memória com política LRU"""
-        # Remover itens mais antigos se necessário (LRU)
-        while len(self.memory_cache) >= self.max_memory_items:
-            oldest = next(iter(self.memory_cache))
-            del self.memory_cache[oldest]
-            logger.debug(f"LRU: Removido item mais antigo do cache")
+                      response: str, tokens_used: int,
+                      namespace: str = DEFAULT_NAMESPACE,
+                      tags: Iterable[str] = (),
+                      timestamp: Optional[float] = None):
+        """Adiciona item ao cache em memória com política LRU por bytes"""
+        previous = self.memory_cache.pop(query_hash, None)
+        if previous is not None:
+            self._release_response(previous['response_key'])
+        
+        self._index_entry(query_hash, namespace, tags)
         
         # Adicionar novo item
+        response, response_key = self._intern_response(response)
         self.memory_cache[query_hash] = {
             'response': response,
+            'response_key': response_key,
             'tokens_used': tokens_used,
-            'timestamp': time.time(),
+            'timestamp': timestamp if timestamp is not None else time.time(),
             'normalized_query': normalized_query
         }
+        
+        # Remover itens mais antigos se necessário (LRU)
+        self._enforce_memory_budget()
     
     def _save_to_disk(self, query_hash: str, normalized_query: str, 
-                     response: str, tokens_used: int):
+                     response: str, tokens_used: int,
+                     query_tokens: Optional[Set[str]] = None,
+                     namespace: str = DEFAULT_NAMESPACE,
+                     tags: Iterable[str] = ()):
         """Salva item no banco de dados"""
         db_path = self.cache_dir / "cache.db"
         
+        if query_tokens is None:
+            query_tokens = self._tokenize_query(normalized_query)
+        
+        payload, codec = self._compress_response(response)
+        
         try:
             with sqlite3.connect(str(db_path)) as conn:
                 conn.execute("""
                     INSERT OR REPLACE INTO cache 
                     (query_hash, query_normalized, response, tokens_used, 
-                     timestamp, last_accessed)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (query_hash, normalized_query, response, tokens_used, 
-                     time.time(), time.time()))
+                     timestamp, last_accessed, query_tokens, compression, namespace)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (query_hash, normalized_query, payload, tokens_used, 
+                     time.time(), time.time(),
+                     self._serialize_tokens(query_tokens), codec, namespace))
+                conn.execute("DELETE FROM cache_tags WHERE query_hash = ?", (query_hash,))
+                conn.executemany(
+                    "INSERT OR IGNORE INTO cache_tags (tag, query_hash) VALUES (?, ?)",
+                    [(tag, query_hash) for tag in tags]
+                )
                 conn.commit()
         except Exception as e:
             logger.error(f"Erro ao salvar no disco: {e}")
     
-    def _get_from_disk(self, query_hash: str) -> Optional[Tuple[str, int]]:
-        """Busca item no banco de dados"""
+    def _get_from_disk(self, query_hash: str) -> Optional[Tuple[str, int, Set[str]]]:
+        """Busca item no banco de dados (resposta, tokens e tags)"""
         db_path = self.cache_dir / "cache.db"
         
         try:
             with sqlite3.connect(str(db_path)) as conn:
                 cursor = conn.execute("""
-                    SELECT response, tokens_used, timestamp 
+                    SELECT response, tokens_used, timestamp, compression
                     FROM cache 
                     WHERE query_hash = ?
                 """, (query_hash,))
                 
                 row = cursor.fetchone()
                 if row:
-                    response, tokens_used, timestamp = row
+                    payload, tokens_used, timestamp, codec = row
                     
                     # Verificar expiração
                     if not self._is_expired(timestamp):
@@ -331,7 +703,14 @@ class CacheManager:
                         """, (time.time(), query_hash))
                         conn.commit()
                         
-                        return response, tokens_used
+                        tags = {
+                            tag for (tag,) in conn.execute(
+                                "SELECT tag FROM cache_tags WHERE query_hash = ?",
+                                (query_hash,)
+                            )
+                        }
+                        
+                        return self._decompress_response(payload, codec), tokens_used, tags
                     else:
                         # Expirado - remover
                         self._remove_from_disk(query_hash)
@@ -348,90 +727,470 @@ class CacheManager:
         try:
             with sqlite3.connect(str(db_path)) as conn:
                 conn.execute("DELETE FROM cache WHERE query_hash = ?", (query_hash,))
+                conn.execute("DELETE FROM cache_tags WHERE query_hash = ?", (query_hash,))
                 conn.commit()
         except Exception as e:
             logger.error(f"Erro ao remover do disco: {e}")
     
+    def _serialize_tokens(self, tokens: Set[str]) -> str:
+        """Serializa tokens de similaridade para persistência"""
+        return json.dumps(sorted(tokens), ensure_ascii=False)
+    
+    def _deserialize_tokens(self, raw: Optional[str]) -> Optional[Set[str]]:
+        """Restaura tokens persistidos (None se ausentes ou inválidos)"""
+        if not raw:
+            return None
+        try:
+            return set(json.loads(raw))
+        except (ValueError, TypeError):
+            return None
+    
     def _load_from_disk(self):
-        """Carrega cache recente do disco para memória"""
+        """
+        Carrega cache recente do disco para memória em lotes
+        
+        Executado em background por padrão: cada lote é inserido sob o lock,
+        sem sobrescrever itens gravados pelo tráfego real enquanto o warm-up
+        roda. Tokens de similaridade persistidos são reaproveitados; linhas
+        antigas sem tokens são tokenizadas uma única vez e atualizadas no disco.
+        """
         db_path = self.cache_dir / "cache.db"
+        generation = self._generation
+        invalidations_seen = len(self._warmup_invalidations)
+        loaded = 0
         
         try:
+            # Ordem de carga: só as chaves, para não segurar uma transação de
+            # leitura aberta (que bloquearia escritas do tráfego real)
             with sqlite3.connect(str(db_path)) as conn:
-                # Carregar itens mais recentes e não expirados
-                cursor = conn.execute("""
-                    SELECT query_hash, query_normalized, response, tokens_used, timestamp
+                hashes = [row[0] for row in conn.execute("""
+                    SELECT query_hash
                     FROM cache
                     WHERE timestamp > ?
                     ORDER BY last_accessed DESC
                     LIMIT ?
-                """, (time.time() - self.ttl_seconds, self.max_memory_items))
+                """, (time.time() - self.ttl_seconds, self.max_memory_items))]
+            
+            for start in range(0, len(hashes), self.warmup_batch_size):
+                batch_hashes = hashes[start:start + self.warmup_batch_size]
+                placeholders = ",".join("?" * len(batch_hashes))
                 
-                for row in cursor:
-                    query_hash, normalized_query, response, tokens_used, timestamp = row
-                    
-                    self.memory_cache[query_hash] = {
-                        'response': response,
-                        'tokens_used': tokens_used,
-                        'timestamp': timestamp,
-                        'normalized_query': normalized_query
+                with sqlite3.connect(str(db_path)) as conn:
+                    fetched = {
+                        row[0]: row for row in conn.execute(f"""
+                            SELECT query_hash, query_normalized, response, tokens_used,
+                                   timestamp, query_tokens, compression, namespace
+                            FROM cache
+                            WHERE query_hash IN ({placeholders})
+                        """, batch_hashes)
                     }
+                    batch_tags: Dict[str, Set[str]] = {}
+                    for tag_hash, tag in conn.execute(f"""
+                        SELECT query_hash, tag FROM cache_tags
+                        WHERE query_hash IN ({placeholders})
+                    """, batch_hashes):
+                        batch_tags.setdefault(tag_hash, set()).add(tag)
+                rows = [fetched[h] for h in batch_hashes if h in fetched]
+                
+                missing_tokens = []
+                batch = []
+                for row in rows:
+                    (query_hash, normalized_query, payload, tokens_used,
+                     timestamp, raw_tokens, codec, namespace) = row
+                    namespace = namespace or DEFAULT_NAMESPACE
+                    response = self._decompress_response(payload, codec)
                     
-                    # Reconstruir índice de similaridade
-                    query_tokens = self._tokenize_query(normalized_query)
-                    self.similarity_index[normalized_query] = query_tokens
-                    self.similarity_cache[normalized_query] = {
-                        'response': response,
-                        'tokens_used': tokens_used,
-                        'timestamp': timestamp
-                    }
+                    query_tokens = self._deserialize_tokens(raw_tokens)
+                    if query_tokens is None:
+                        query_tokens = self._tokenize_query(normalized_query)
+                        missing_tokens.append(
+                            (self._serialize_tokens(query_tokens), query_hash)
+                        )
+                    
+                    batch.append((query_hash, normalized_query, response,
+                                  tokens_used, timestamp, query_tokens, namespace,
+                                  batch_tags.get(query_hash, set())))
                 
-                logger.info(f"📂 Carregados {len(self.memory_cache)} itens do cache")
+                with self._lock:
+                    if generation != self._generation:
+                        # Cache invalidado durante o warm-up - descartar o restante
+                        break
+                    
+                    # Fatia invalidada durante o warm-up: o lote foi lido antes da remoção
+                    invalidated = self._warmup_invalidations[invalidations_seen:]
+                    if invalidated:
+                        batch = [row for row in batch
+                                 if not self._in_slices(row[6], row[7], invalidated)]
+                    
+                    loaded += self._populate_memory(batch)
+                    self.stats['warmup_loaded'] = loaded
                 
+                if missing_tokens:
+                    self._backfill_tokens(missing_tokens)
+            
+            logger.info(f"📂 Carregados {loaded} itens do cache")
+            
         except Exception as e:
             logger.error(f"Erro ao carregar cache do disco: {e}")
+        finally:
+            with self._lock:
+                self._warmup_done.set()
+                self._warmup_invalidations.clear()
+    
+    @staticmethod
+    def _in_slices(namespace: str, tags: Set[str],
+                   slices: List[Tuple[Optional[str], FrozenSet[str]]]) -> bool:
+        """A entrada pertence a alguma das fatias (namespace e/ou tags) invalidadas"""
+        return any((slice_namespace is None or namespace == slice_namespace) and
+                   (not slice_tags or not slice_tags.isdisjoint(tags))
+                   for slice_namespace, slice_tags in slices)
+    
+    def _populate_memory(self, batch: List[Tuple]) -> int:
+        """
+        Insere entradas vindas do disco/snapshot nos dois níveis em memória
+        
+        O lote deve vir do mais quente para o mais frio. Entradas já presentes
+        (gravadas pelo tráfego real) são preservadas. Chamador segura o lock.
+        
+        Returns:
+            Número de entradas adicionadas ao cache em memória
+        """
+        loaded = 0
+        
+        for (query_hash, normalized_query, response, tokens_used,
+             timestamp, query_tokens, namespace, tags) in batch:
+            if (len(self.memory_cache) >= self.max_memory_items or
+                    self._memory_bytes >= self.max_memory_bytes):
+                break
+            
+            self._index_entry(query_hash, namespace, tags)
+            
+            if query_hash not in self.similarity_cache:
+                self._set_similarity_item(query_hash, normalized_query,
+                                          query_tokens, response,
+                                          tokens_used, timestamp)
+            
+            if query_hash not in self.memory_cache:
+                response, response_key = self._intern_response(response)
+                self.memory_cache[query_hash] = {
+                    'response': response,
+                    'response_key': response_key,
+                    'tokens_used': tokens_used,
+                    'timestamp': timestamp,
+                    'normalized_query': normalized_query
+                }
+                # Itens carregados são mais frios que o tráfego atual
+                self.memory_cache.move_to_end(query_hash, last=False)
+                loaded += 1
+        
+        self._enforce_memory_budget()
+        return loaded
+    
+    def _backfill_tokens(self, rows: List[Tuple[str, str]]):
+        """Persiste tokens calculados para linhas gravadas antes da coluna existir"""
+        db_path = self.cache_dir / "cache.db"
+        
+        try:
+            with sqlite3.connect(str(db_path)) as conn:
+                conn.executemany(
+                    "UPDATE cache SET query_tokens = ? WHERE query_hash = ?", rows
+                )
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Erro ao persistir tokens de similaridade: {e}")
+    
+    def is_warm(self) -> bool:
+        """Indica se o warm-up do cache em memória terminou"""
+        return self._warmup_done.is_set()
     
-    def invalidate(self, query: Optional[str] = None):
-        """Invalida um item específico ou todo o cache"""
+    def wait_until_warm(self, timeout: Optional[float] = None) -> bool:
+        """Aguarda o término do warm-up (True se concluído dentro do timeout)"""
+        return self._warmup_done.wait(timeout)
+    
+    def export_snapshot(self, path: str, max_entries: int = 1000) -> int:
+        """
+        Exporta as entradas mais quentes para um snapshot portátil (warm deploy)
+        
+        O "calor" é access_count × tokens_used: entradas muito acessadas e caras
+        de regenerar vêm primeiro (hits servidos pela memória são gravados
+        antes da consulta). O arquivo é JSON comprimido com gzip e inclui os
+        tokens de similaridade pré-calculados, namespace e tags.
+        
+        Args:
+            path: Arquivo de destino
+            max_entries: Número máximo de entradas exportadas
+        
+        Returns:
+            Número de entradas exportadas
+        """
+        db_path = self.cache_dir / "cache.db"
+        entries = []
+        
         with self._lock:
-            if query:
-                # Invalidar item específico
-                query_hash = self._hash_query(query)
+            self._flush_access_counts()
+        
+        with sqlite3.connect(str(db_path)) as conn:
+            rows = conn.execute("""
+                SELECT query_hash, query_normalized, response, tokens_used, timestamp,
+                       access_count, query_tokens, compression, namespace
+                FROM cache
+                WHERE timestamp > ?
+                ORDER BY access_count * tokens_used DESC, last_accessed DESC
+                LIMIT ?
+            """, (time.time() - self.ttl_seconds, max_entries)).fetchall()
+            
+            # Tags só das entradas exportadas
+            tags_by_hash: Dict[str, List[str]] = {}
+            hashes = [row[0] for row in rows]
+            for start in range(0, len(hashes), SQLITE_MAX_PARAMS):
+                chunk = hashes[start:start + SQLITE_MAX_PARAMS]
+                for tag_hash, tag in conn.execute(f"""
+                    SELECT query_hash, tag FROM cache_tags
+                    WHERE query_hash IN ({','.join('?' * len(chunk))})
+                """, chunk):
+                    tags_by_hash.setdefault(tag_hash, []).append(tag)
+        
+        for (query_hash, normalized_query, payload, tokens_used, timestamp,
+             access_count, raw_tokens, codec, namespace) in rows:
+            query_tokens = self._deserialize_tokens(raw_tokens)
+            if query_tokens is None:
+                query_tokens = self._tokenize_query(normalized_query)
+            
+            entries.append({
+                'query_hash': query_hash,
+                'query': normalized_query,
+                'response': self._decompress_response(payload, codec),
+                'tokens_used': tokens_used,
+                'timestamp': timestamp,
+                'access_count': access_count,
+                'query_tokens': sorted(query_tokens),
+                'namespace': namespace or DEFAULT_NAMESPACE,
+                'tags': sorted(tags_by_hash.get(query_hash, []))
+            })
+        
+        snapshot = {
+            'format': SNAPSHOT_FORMAT,
+            'version': SNAPSHOT_VERSION,
+            'created_at': datetime.now().isoformat(),
+            'entries': entries
+        }
+        
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False, separators=(',', ':'))
+        
+        logger.info(f"📦 Snapshot exportado: {len(entries)} itens -> {path}")
+        return len(entries)
+    
+    def import_snapshot(self, path: str, refresh_timestamps: bool = True) -> int:
+        """
+        Importa um snapshot gerado por export_snapshot para disco e memória
+        
+        Entradas que já existem no cache local (tráfego real) têm precedência:
+        são ignoradas por inteiro - nem a resposta nem as tags do snapshot
+        substituem ou se somam às locais.
+        
+        Args:
+            path: Arquivo do snapshot
+            refresh_timestamps: Reinicia o TTL das entradas (o snapshot pode ser
+                                mais antigo que ttl_seconds)
+        
+        Returns:
+            Número de entradas importadas (novas)
+        """
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            snapshot = json.load(f)
+        
+        if snapshot.get('format') != SNAPSHOT_FORMAT:
+            raise ValueError(f"Arquivo não é um snapshot de cache: {path}")
+        if snapshot.get('version', 0) > SNAPSHOT_VERSION:
+            raise ValueError(f"Versão de snapshot não suportada: {snapshot.get('version')}")
+        
+        now = time.time()
+        candidates = []
+        
+        for entry in snapshot['entries']:
+            timestamp = now if refresh_timestamps else entry['timestamp']
+            if self._is_expired(timestamp):
+                continue
+            
+            query_hash = entry['query_hash']
+            query_tokens = set(entry['query_tokens'])
+            tags = set(entry['tags'])
+            payload, codec = self._compress_response(entry['response'])
+            
+            candidates.append((
+                (query_hash, entry['query'], payload, entry['tokens_used'], timestamp,
+                 entry['access_count'], now, self._serialize_tokens(query_tokens),
+                 codec, entry['namespace']),
+                [(tag, query_hash) for tag in tags],
+                (query_hash, entry['query'], entry['response'],
+                 entry['tokens_used'], timestamp, query_tokens,
+                 entry['namespace'], tags)
+            ))
+        
+        db_path = self.cache_dir / "cache.db"
+        batch = []
+        with self._lock:
+            with sqlite3.connect(str(db_path)) as conn:
+                # Linhas locais ainda válidas; as expiradas são substituídas
+                existing = set(self.memory_cache) | set(self.similarity_cache)
+                snapshot_hashes = [db_row[0] for db_row, _, _ in candidates]
+                for start in range(0, len(snapshot_hashes), SQLITE_MAX_PARAMS):
+                    chunk = snapshot_hashes[start:start + SQLITE_MAX_PARAMS]
+                    existing.update(row[0] for row in conn.execute(f"""
+                        SELECT query_hash FROM cache
+                        WHERE query_hash IN ({','.join('?' * len(chunk))}) AND timestamp > ?
+                    """, chunk + [now - self.ttl_seconds]))
                 
-                if query_hash in self.memory_cache:
-                    del self.memory_cache[query_hash]
+                db_rows = []
+                tag_rows = []
+                for db_row, entry_tags, memory_row in candidates:
+                    if db_row[0] in existing:
+                        continue
+                    existing.add(db_row[0])
+                    db_rows.append(db_row)
+                    tag_rows.extend(entry_tags)
+                    batch.append(memory_row)
                 
-                normalized = self._normalize_query(query)
-                if normalized in self.similarity_index:
-                    del self.similarity_index[normalized]
-                if normalized in self.similarity_cache:
-                    del self.similarity_cache[normalized]
+                conn.executemany(
+                    "DELETE FROM cache_tags WHERE query_hash = ?", [(row[0],) for row in db_rows]
+                )
+                conn.executemany("""
+                    INSERT OR REPLACE INTO cache
+                    (query_hash, query_normalized, response, tokens_used, timestamp,
+                     access_count, last_accessed, query_tokens, compression, namespace)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, db_rows)
+                conn.executemany(
+                    "INSERT OR IGNORE INTO cache_tags (tag, query_hash) VALUES (?, ?)",
+                    tag_rows
+                )
+                conn.commit()
+            
+            loaded = self._populate_memory(batch)
+        
+        logger.info(f"📦 Snapshot importado: {len(batch)} itens ({loaded} em memória)")
+        return len(batch)
+    
+    def invalidate(self, query: Optional[str] = None,
+                   namespace: Optional[str] = None,
+                   tags: Optional[Set[str]] = None) -> int:
+        """
+        Invalida um item, uma fatia do cache ou todo o cache
+        
+        Args:
+            query: Invalida só esta pergunta (no namespace informado ou no padrão)
+            namespace: Sem query, invalida todas as entradas do namespace
+            tags: Sem query, invalida entradas com qualquer uma das tags
+                  (combinado com namespace, se ambos forem informados)
+        
+        Returns:
+            Número de entradas invalidadas
+        """
+        with self._lock:
+            if query:
+                # Invalidar item específico
+                query_hash = self._hash_query(query, namespace or DEFAULT_NAMESPACE)
                 
+                self._drop_entry(query_hash)
                 self._remove_from_disk(query_hash)
                 
                 self.stats['invalidations'] += 1
                 logger.info(f"🗑️ Item invalidado: {query[:50]}...")
-            else:
-                # Invalidar todo o cache
-                self.memory_cache.clear()
-                self.similarity_index.clear()
-                self.similarity_cache.clear()
-                
-                # Limpar banco de dados
-                db_path = self.cache_dir / "cache.db"
-                try:
-                    with sqlite3.connect(str(db_path)) as conn:
-                        conn.execute("DELETE FROM cache")
-                        conn.commit()
-                except Exception as e:
-                    logger.error(f"Erro ao limpar banco de dados: {e}")
-                
-                self.stats['invalidations'] += len(self.memory_cache)
-                logger.info("🗑️ Cache completamente invalidado")
+                return 1
+            
+            if namespace or tags:
+                invalidated = self._invalidate_slice(namespace, tags)
+                self.stats['invalidations'] += invalidated
+                logger.info(f"🗑️ Fatia invalidada (namespace={namespace}, tags={tags}): "
+                          f"{invalidated} itens")
+                return invalidated
+            
+            # Invalidar todo o cache
+            self._generation += 1
+            invalidated = len(self.memory_cache)
+            self.memory_cache.clear()
+            self.similarity_index.clear()
+            self.similarity_cache.clear()
+            self._response_pool.clear()
+            self._memory_bytes = 0
+            self._entry_meta.clear()
+            self._namespace_index.clear()
+            self._tag_index.clear()
+            self._pending_access.clear()
+            
+            # Limpar banco de dados
+            db_path = self.cache_dir / "cache.db"
+            try:
+                with sqlite3.connect(str(db_path)) as conn:
+                    conn.execute("DELETE FROM cache")
+                    conn.execute("DELETE FROM cache_tags")
+                    conn.commit()
+            except Exception as e:
+                logger.error(f"Erro ao limpar banco de dados: {e}")
+            
+            self.stats['invalidations'] += invalidated
+            logger.info("🗑️ Cache completamente invalidado")
+            return invalidated
+    
+    def _invalidate_slice(self, namespace: Optional[str], tags: Optional[Set[str]]) -> int:
+        """Remove das duas camadas as entradas do namespace e/ou com as tags"""
+        # Warm-up em andamento não deve reintroduzir a fatia removida (o resto segue carregando)
+        if not self._warmup_done.is_set():
+            self._warmup_invalidations.append((namespace, frozenset(tags or ())))
+        
+        # Memória: resolver pelos índices
+        selected: Optional[Set[str]] = None
+        if namespace:
+            selected = set(self._namespace_index.get(namespace, ()))
+        if tags:
+            tagged = set()
+            for tag in tags:
+                tagged.update(self._tag_index.get(tag, ()))
+            selected = tagged if selected is None else selected & tagged
+        
+        for query_hash in selected:
+            self._drop_entry(query_hash)
+        
+        # Disco: consulta indexada por namespace/tag
+        conditions = []
+        params: List[str] = []
+        if namespace:
+            conditions.append("namespace = ?")
+            params.append(namespace)
+        if tags:
+            tag_list = sorted(tags)
+            conditions.append(
+                f"query_hash IN (SELECT query_hash FROM cache_tags "
+                f"WHERE tag IN ({','.join('?' * len(tag_list))}))"
+            )
+            params.extend(tag_list)
+        
+        db_path = self.cache_dir / "cache.db"
+        disk_hashes: Set[str] = set()
+        try:
+            with sqlite3.connect(str(db_path)) as conn:
+                disk_hashes = {
+                    row[0] for row in conn.execute(
+                        f"SELECT query_hash FROM cache WHERE {' AND '.join(conditions)}",
+                        params
+                    )
+                }
+                rows = [(query_hash,) for query_hash in disk_hashes]
+                conn.executemany("DELETE FROM cache WHERE query_hash = ?", rows)
+                conn.executemany("DELETE FROM cache_tags WHERE query_hash = ?", rows)
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Erro ao invalidar fatia no disco: {e}")
+        
+        return len(selected | disk_hashes)
     
     def cleanup(self):
-        """Remove itens expirados"""
+        """Remove itens expirados (e grava os acessos pendentes)"""
         with self._lock:
+            self._flush_access_counts()
+            
             # Limpar memória
             expired_keys = []
             for key, item in self.memory_cache.items():
@@ -439,7 +1198,7 @@ class CacheManager:
                     expired_keys.append(key)
             
             for key in expired_keys:
-                del self.memory_cache[key]
+                self._drop_memory_item(key)
             
             # Limpar índice de similaridade
             expired_queries = []
@@ -447,10 +1206,8 @@ class CacheManager:
                 if self._is_expired(item['timestamp']):
                     expired_queries.append(query)
             
-            for query in expired_queries:
-                if query in self.similarity_index:
-                    del self.similarity_index[query]
-                del self.similarity_cache[query]
+            for query_hash in expired_queries:
+                self._drop_similarity_item(query_hash)
             
             # Limpar disco
             db_path = self.cache_dir / "cache.db"
@@ -460,6 +1217,10 @@ class CacheManager:
                         DELETE FROM cache 
                         WHERE timestamp < ?
                     """, (time.time() - self.ttl_seconds,))
+                    conn.execute("""
+                        DELETE FROM cache_tags
+                        WHERE query_hash NOT IN (SELECT query_hash FROM cache)
+                    """)
                     conn.commit()
             except Exception as e:
                 logger.error(f"Erro ao limpar disco: {e}")
@@ -480,7 +1241,11 @@ class CacheManager:
             'total_requests': total_requests,
             'hit_rate': round(hit_rate, 2),
             'memory_items': len(self.memory_cache),
-            'similarity_items': len(self.similarity_index)
+            'similarity_items': len(self.similarity_index),
+            'memory_bytes': self._memory_bytes,
+            'interned_responses': len(self._response_pool),
+            'namespaces': len(self._namespace_index),
+            'warmup_complete': self.is_warm()
         }
     
     def __del__(self):
@@ -0,0 +1,62 @@
+"""
+Cancelamento Cooperativo de Agentes
+Token de cancelamento por execução, visível para o código do agente via thread atual
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+
+class AgentCancelledError(Exception):
+    """Execução do agente cancelada (timeout ou abandono pelo chamador)"""
+    pass
+
+
+class CancellationToken:
+    """Sinal de cancelamento de uma execução; o agente consulta nos pontos seguros"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.reason: Optional[str] = None
+
+    def cancel(self, reason: str = "cancelado"):
+        self.reason = reason
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise AgentCancelledError(self.reason)
+
+
+_local = threading.local()
+
+
+@contextmanager
+def cancellation_scope(token: CancellationToken):
+    """Torna o token o cancelamento corrente da thread durante o bloco"""
+    previous = getattr(_local, "token", None)
+    _local.token = token
+    try:
+        yield token
+    finally:
+        _local.token = previous
+
+
+def current_token() -> Optional[CancellationToken]:
+    """Token da execução em andamento na thread (None fora de um agente gerenciado)"""
+    return getattr(_local, "token", None)
+
+
+def raise_if_cancelled():
+    """
+    Ponto de checagem cooperativo: levanta AgentCancelledError se a execução
+    corrente foi cancelada. Chamar antes de cada chamada ao LLM ou espera longa.
+    """
+    token = getattr(_local, "token", None)
+    if token is not None:
+        token.raise_if_cancelled()
@@ -0,0 +1,187 @@
+"""
+Serviço de Executores Compartilhados
+Pools de threads nomeados, limitados e de longa duração para todo o processo
+"""
+
+import os
+import time
+import atexit
+import threading
+import concurrent.futures
+from typing import Dict, Any, Callable, Optional
+
+# Logger
+try:
+    from utils.logger import get_logger
+except ImportError:
+    class SimpleLogger:
+        def __init__(self, name): self.name = name
+        def info(self, msg): print(f"[INFO] {msg}")
+        def warning(self, msg): print(f"[WARNING] {msg}")
+        def error(self, msg): print(f"[ERROR] {msg}")
+        def debug(self, msg): print(f"[DEBUG] {msg}")
+    def get_logger(name): return SimpleLogger(name)
+
+logger = get_logger(__name__)
+
+# Pools padrão: chamadas a LLM/agentes, coordenação do wake manager, trabalho de CPU e I/O (rede, disco)
+#
+# Regra: uma thread de um pool nunca bloqueia esperando trabalho enviado ao
+# mesmo pool - com o pool cheio de threads esperando, ninguém sobra para
+# executar o que elas esperam. Por isso o wake manager, cujas threads só
+# aguardam os AgentPool, roda no pool de despacho e não no de LLM, onde o
+# fan-out paralelo do Carlos executa os agentes.
+LLM_POOL = "llm"
+DISPATCH_POOL = "dispatch"
+CPU_POOL = "cpu"
+IO_POOL = "io"
+
+DEFAULT_POOL_SIZES = {
+    LLM_POOL: int(os.getenv("EXECUTOR_LLM_WORKERS", "16")),
+    DISPATCH_POOL: int(os.getenv("EXECUTOR_DISPATCH_WORKERS", "16")),
+    CPU_POOL: int(os.getenv("EXECUTOR_CPU_WORKERS", str(os.cpu_count() or 2))),
+    IO_POOL: int(os.getenv("EXECUTOR_IO_WORKERS", "32"))
+}
+
+
+class ExecutorServiceShutdown(RuntimeError):
+    """Submissão depois do início do encerramento"""
+    pass
+
+
+class BoundedPool:
+    """ThreadPoolExecutor com métricas de fila (profundidade, espera, pico)"""
+
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=f"pool-{name}"
+        )
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "cancelled": 0,
+            "peak_queue_depth": 0,
+            "total_wait_ms": 0.0
+        }
+
+    def submit(self, fn: Callable, *args, **kwargs) -> concurrent.futures.Future:
+        submitted_at = time.perf_counter()
+        with self._lock:
+            self._queued += 1
+            self.stats["submitted"] += 1
+            self.stats["peak_queue_depth"] = max(self.stats["peak_queue_depth"], self._queued)
+
+        def run():
+            with self._lock:
+                self._queued -= 1
+                self._active += 1
+                self.stats["total_wait_ms"] += (time.perf_counter() - submitted_at) * 1000
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._active -= 1
+
+        future = self.executor.submit(run)
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future: concurrent.futures.Future):
+        with self._lock:
+            if future.cancelled():
+                self._queued -= 1  # Nunca chegou a rodar
+                self.stats["cancelled"] += 1
+            elif future.exception() is not None:
+                self.stats["failed"] += 1
+            else:
+                self.stats["completed"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            started = self.stats["submitted"] - self._queued - self.stats["cancelled"]
+            return {
+                **self.stats,
+                "max_workers": self.max_workers,
+                "active": self._active,
+                "queue_depth": self._queued,
+                "avg_wait_ms": self.stats["total_wait_ms"] / started if started else 0.0
+            }
+
+
+class ExecutorService:
+    """
+    Executores compartilhados pelo processo inteiro
+
+    Cada pool nomeado (llm, dispatch, cpu, io) tem um teto de threads, então o total
+    de concorrência do processo fica limitado independente de quantas
+    requisições fazem fan-out ao mesmo tempo - o excesso espera na fila do
+    pool (visível em get_stats). shutdown() para de aceitar tarefas, espera
+    as em andamento até o prazo e cancela as que ainda estão na fila.
+    """
+
+    def __init__(self, pool_sizes: Optional[Dict[str, int]] = None):
+        self._lock = threading.Lock()
+        self._pools: Dict[str, BoundedPool] = {}
+        self._closed = False
+        for name, size in {**DEFAULT_POOL_SIZES, **(pool_sizes or {})}.items():
+            self._pools[name] = BoundedPool(name, max(1, size))
+
+        logger.info("🧵 ExecutorService inicializado: " +
+                    ", ".join(f"{name}={pool.max_workers}" for name, pool in self._pools.items()))
+
+    def get_pool(self, name: str) -> BoundedPool:
+        with self._lock:
+            if self._closed:
+                raise ExecutorServiceShutdown(f"ExecutorService encerrado (pool {name})")
+            if name not in self._pools:
+                raise KeyError(f"Pool desconhecido: {name}")
+            return self._pools[name]
+
+    def submit(self, pool_name: str, fn: Callable, *args, **kwargs) -> concurrent.futures.Future:
+        """Agenda fn no pool nomeado"""
+        return self.get_pool(pool_name).submit(fn, *args, **kwargs)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: pool.get_stats() for name, pool in self._pools.items()}
+
+    def shutdown(self, timeout: float = 10.0) -> bool:
+        """Encerramento gracioso; False se sobrou tarefa rodando após o prazo"""
+        with self._lock:
+            if self._closed:
+                return True
+            self._closed = True
+
+        deadline = time.monotonic() + timeout
+        for pool in self._pools.values():
+            pool.executor.shutdown(wait=False, cancel_futures=True)
+
+        while time.monotonic() < deadline:
+            if all(pool.get_stats()["active"] == 0 for pool in self._pools.values()):
+                logger.debug("🧵 ExecutorService encerrado")
+                return True
+            time.sleep(0.05)
+
+        logger.warning("⚠️ ExecutorService encerrado com tarefas ainda em execução")
+        return False
+
+
+# Singleton global
+_executor_service = None
+_executor_service_lock = threading.Lock()
+
+
+def get_executor_service() -> ExecutorService:
+    """Retorna instância singleton do ExecutorService"""
+    global _executor_service
+
+    with _executor_service_lock:
+        if _executor_service is None:
+            _executor_service = ExecutorService()
+            atexit.register(_executor_service.shutdown)
+        return _executor_service
@@ -0,0 +1,233 @@
+"""
+Escalonador Justo por Usuário
+Deficit round-robin ponderado entre usuários na frente do orquestrador (asyncio)
+"""
+
+import os
+import asyncio
+import time
+from collections import deque
+from typing import Dict, Any, Optional, Callable, Awaitable
+
+# Logger
+try:
+    from utils.logger import get_logger
+except ImportError:
+    class SimpleLogger:
+        def __init__(self, name): self.name = name
+        def info(self, msg): print(f"[INFO] {msg}")
+        def warning(self, msg): print(f"[WARNING] {msg}")
+        def error(self, msg): print(f"[ERROR] {msg}")
+        def debug(self, msg): print(f"[DEBUG] {msg}")
+    def get_logger(name): return SimpleLogger(name)
+
+logger = get_logger(__name__)
+
+# Peso de cada tier na divisão da capacidade (quantum por rodada = QUANTUM × peso)
+TIER_WEIGHTS = {"premium": 2.0, "pro": 1.5, "standard": 1.0, "free": 1.0}
+
+QUANTUM_SECONDS = 1.0
+COST_EWMA_ALPHA = 0.3
+
+
+class FairTicket:
+    """Requisição de um usuário na fila justa"""
+
+    def __init__(self, user_id: str, cost: float, future: asyncio.Future):
+        self.user_id = user_id
+        self.cost = cost  # Custo estimado, cobrado na concessão e corrigido no release
+        self.future = future
+        self.enqueued_at = time.monotonic()
+        self.granted_at: Optional[float] = None
+
+    @property
+    def granted(self) -> bool:
+        return self.granted_at is not None
+
+
+class FairShareScheduler:
+    """
+    Fila justa entre usuários (deficit round-robin ponderado)
+
+    Cada usuário com trabalho pendente recebe, a cada volta, um crédito de
+    QUANTUM × peso do tier; uma requisição só é liberada quando o crédito
+    cobre seu custo. O custo é o tempo de execução: na concessão cobra-se a
+    média recente do usuário e no release a diferença para o tempo real.
+    Assim quem manda requisições pesadas em sequência gasta o crédito e
+    espera mais voltas, enquanto usuários leves passam quase direto.
+    Além do limite global de execuções simultâneas, cada usuário tem no
+    máximo per_user_limit em andamento. Todo o estado vive no event loop.
+    """
+
+    def __init__(self, max_concurrent: int = 8, per_user_limit: int = 2):
+        self.max_concurrent = max_concurrent
+        self.per_user_limit = per_user_limit
+
+        self._queues: Dict[str, deque] = {}
+        self._ring: deque = deque()  # Usuários com fila, na ordem da volta
+        self._deficit: Dict[str, float] = {}
+        self._weights: Dict[str, float] = {}
+        self._avg_cost: Dict[str, float] = {}
+        self._in_flight: Dict[str, int] = {}
+        self._total_in_flight = 0
+
+        self.stats = {
+            "granted": 0,
+            "queued": 0,
+            "cancelled": 0,
+            "total_wait_ms": 0.0
+        }
+
+    def enqueue(self, user_id: str, tier: Optional[str] = None) -> FairTicket:
+        """Coloca a requisição na fila do usuário (concede na hora se houver vaga)"""
+        future = asyncio.get_running_loop().create_future()
+        ticket = FairTicket(user_id, self._avg_cost.get(user_id, QUANTUM_SECONDS), future)
+        self._weights[user_id] = TIER_WEIGHTS.get(tier or "standard", 1.0)
+
+        if user_id not in self._queues:
+            self._queues[user_id] = deque()
+            self._deficit.setdefault(user_id, 0.0)
+            self._ring.append(user_id)
+        self._queues[user_id].append(ticket)
+
+        self._schedule()
+        if not ticket.granted:
+            self.stats["queued"] += 1
+            logger.debug(f"⏳ {user_id} na fila justa (posição ~{self.queue_position(ticket)})")
+        return ticket
+
+    async def wait(self, ticket: FairTicket, poll: float = 1.0,
+                   on_position: Optional[Callable[[int], Awaitable[None]]] = None):
+        """Espera a vez do ticket, avisando on_position quando a posição muda"""
+        last_position = None
+        try:
+            while not ticket.granted:
+                position = self.queue_position(ticket)
+                if on_position and position != last_position:
+                    await on_position(position)
+                    last_position = position
+                try:
+                    await asyncio.wait_for(asyncio.shield(ticket.future), timeout=poll)
+                except asyncio.TimeoutError:
+                    pass
+        except asyncio.CancelledError:
+            self.cancel(ticket)
+            raise
+
+    async def acquire(self, user_id: str, tier: Optional[str] = None,
+                      on_position: Optional[Callable[[int], Awaitable[None]]] = None) -> FairTicket:
+        ticket = self.enqueue(user_id, tier)
+        await self.wait(ticket, on_position=on_position)
+        return ticket
+
+    def release(self, ticket: FairTicket):
+        """Libera a vaga e ajusta o crédito do usuário pelo custo real"""
+        elapsed = time.monotonic() - ticket.granted_at
+        user_id = ticket.user_id
+        self._in_flight[user_id] -= 1
+        self._total_in_flight -= 1
+
+        self._avg_cost[user_id] = COST_EWMA_ALPHA * elapsed + \
+            (1 - COST_EWMA_ALPHA) * self._avg_cost.get(user_id, elapsed)
+        self._deficit[user_id] = self._deficit.get(user_id, 0.0) - (elapsed - ticket.cost)
+        if user_id not in self._queues:
+            self._deficit[user_id] = min(0.0, self._deficit[user_id])
+        self._schedule()
+
+    def cancel(self, ticket: FairTicket):
+        """Retira da fila um ticket abandonado (ou libera a vaga, se já concedido)"""
+        if ticket.granted:
+            self.release(ticket)
+            return
+        queue = self._queues.get(ticket.user_id)
+        if queue and ticket in queue:
+            queue.remove(ticket)
+            self.stats["cancelled"] += 1
+            if not queue:
+                self._drop_user(ticket.user_id)
+            self._schedule()
+
+    def queue_position(self, ticket: FairTicket) -> int:
+        """
+        Posição estimada (1 = próximo): a cada volta cada usuário libera
+        ~uma requisição, então à frente estão as anteriores do próprio
+        usuário e até o mesmo número de requisições de cada outro usuário
+        """
+        if ticket.granted:
+            return 0
+        own_queue = self._queues.get(ticket.user_id, ())
+        rounds = list(own_queue).index(ticket) + 1 if ticket in own_queue else 1
+        ahead = rounds - 1
+        for user_id, queue in self._queues.items():
+            if user_id != ticket.user_id:
+                ahead += min(len(queue), rounds)
+        return ahead + 1
+
+    def _schedule(self):
+        """Concede vagas livres pela ordem do deficit round-robin"""
+        while self._total_in_flight < self.max_concurrent:
+            ticket = self._next_ticket()
+            if ticket is None:
+                return
+            ticket.granted_at = time.monotonic()
+            self._in_flight[ticket.user_id] = self._in_flight.get(ticket.user_id, 0) + 1
+            self._total_in_flight += 1
+            self.stats["granted"] += 1
+            self.stats["total_wait_ms"] += (ticket.granted_at - ticket.enqueued_at) * 1000
+            if not ticket.future.done():
+                ticket.future.set_result(True)
+
+    def _next_ticket(self) -> Optional[FairTicket]:
+        eligible = {user_id for user_id in self._ring
+                    if self._in_flight.get(user_id, 0) < self.per_user_limit}
+        if not eligible:
+            return None
+
+        while True:
+            user_id = self._ring[0]
+            if user_id not in eligible:
+                self._ring.rotate(-1)
+                continue
+
+            queue = self._queues[user_id]
+            if self._deficit[user_id] >= queue[0].cost:
+                ticket = queue.popleft()
+                self._deficit[user_id] -= ticket.cost
+                if not queue:
+                    self._drop_user(user_id)
+                return ticket  # O usuário continua na vez enquanto tiver crédito
+
+            self._deficit[user_id] += QUANTUM_SECONDS * self._weights.get(user_id, 1.0)
+            self._ring.rotate(-1)
+
+    def _drop_user(self, user_id: str):
+        """Usuário sem fila sai da volta e perde o crédito acumulado (DRR)"""
+        del self._queues[user_id]
+        self._ring.remove(user_id)
+        self._deficit[user_id] = min(0.0, self._deficit[user_id])  # Dívida continua valendo
+
+    def get_stats(self) -> Dict[str, Any]:
+        granted = self.stats["granted"]
+        return {
+            **self.stats,
+            "in_flight": self._total_in_flight,
+            "queued_users": len(self._queues),
+            "queue_depth": sum(len(queue) for queue in self._queues.values()),
+            "avg_wait_ms": self.stats["total_wait_ms"] / granted if granted else 0.0
+        }
+
+
+# Singleton global (acessado só pelo event loop do Chainlit)
+_fair_scheduler = None
+
+
+def get_fair_scheduler() -> FairShareScheduler:
+    """Retorna instância singleton do FairShareScheduler"""
+    global _fair_scheduler
+
+    if _fair_scheduler is None:
+        _fair_scheduler = FairShareScheduler(
+            max_concurrent=int(os.getenv("FAIR_MAX_CONCURRENT", "8")),
+            per_user_limit=int(os.getenv("FAIR_USER_INFLIGHT", "2"))
+        )
+    return _fair_scheduler
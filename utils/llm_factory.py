@@ -34,6 +34,16 @@ class BaseLLMWrapper(ABC):
     def get_info(self) -> Dict[str, Any]:
         """Retorna informações sobre o LLM"""
         pass
+    
+    def aquecer(self):
+        """Cria de antemão o cliente que o SDK só abriria na primeira chamada"""
+        pass
+
+
+def warm_gemini_client():
+    """Cria o cliente padrão do google-generativeai (compartilhado por todos os GenerativeModel)"""
+    from google.generativeai import client as genai_client
+    genai_client.get_default_generative_client()
 
 
 class GeminiWrapper(BaseLLMWrapper):
@@ -106,6 +116,10 @@ class GeminiWrapper(BaseLLMWrapper):
             logger.error(f"❌ Erro ao invocar Gemini: {e}")
             raise
     
+    def aquecer(self):
+        """GenerativeModel só cria o cliente gRPC no primeiro generate_content"""
+        warm_gemini_client()
+    
     def get_info(self) -> Dict[str, Any]:
         """Retorna informações sobre o modelo Gemini"""
         return {
@@ -184,6 +198,10 @@ class AnthropicWrapper(BaseLLMWrapper):
         """Invoca o Claude"""
         return self.llm.invoke(prompt)
     
+    def aquecer(self):
+        """ChatAnthropic cria o cliente HTTP (_client, cached_property) no primeiro invoke"""
+        getattr(self.llm, '_client', None)
+    
     def get_info(self) -> Dict[str, Any]:
         """Retorna informações sobre o modelo"""
         return {
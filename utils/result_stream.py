@@ -0,0 +1,61 @@
+"""
+Stream Assíncrono de Resultados
+Ponte entre execuções síncronas com callback por resultado e consumidores asyncio
+"""
+
+import asyncio
+from typing import Any, AsyncIterator, Callable
+
+# Logger
+try:
+    from utils.logger import get_logger
+except ImportError:
+    class SimpleLogger:
+        def __init__(self, name): self.name = name
+        def info(self, msg): print(f"[INFO] {msg}")
+        def warning(self, msg): print(f"[WARNING] {msg}")
+        def error(self, msg): print(f"[ERROR] {msg}")
+        def debug(self, msg): print(f"[DEBUG] {msg}")
+    def get_logger(name): return SimpleLogger(name)
+
+logger = get_logger(__name__)
+
+_ITEM, _RETURN, _ERROR = range(3)
+
+
+async def stream_from_thread(run: Callable[..., Any], *args,
+                             callback_arg: str = "on_result", **kwargs) -> AsyncIterator[Any]:
+    """
+    Executa run(*args, **kwargs) numa thread e entrega, conforme chegam, os
+    itens que ela passa ao callback `callback_arg`; o último item é o valor
+    de retorno de run. Exceções de run são relançadas no consumidor.
+
+    Exemplo: async for item in stream_from_thread(orquestrador.process_optimized, msg)
+    """
+    loop = asyncio.get_running_loop()
+    items: asyncio.Queue = asyncio.Queue()
+
+    def put(kind: int, value: Any):
+        try:
+            loop.call_soon_threadsafe(items.put_nowait, (kind, value))
+        except RuntimeError:
+            pass  # Loop já encerrado: o consumidor foi embora
+
+    def worker():
+        try:
+            put(_RETURN, run(*args, **{**kwargs, callback_arg: lambda item: put(_ITEM, item)}))
+        except BaseException as e:
+            put(_ERROR, e)
+
+    done = loop.run_in_executor(None, worker)
+    try:
+        while True:
+            kind, value = await items.get()
+            if kind == _ERROR:
+                raise value
+            yield value
+            if kind == _RETURN:
+                break
+    finally:
+        if not done.done():
+            logger.debug("📡 Consumidor do stream saiu antes do fim; execução segue em segundo plano")
@@ -0,0 +1,586 @@
+"""
+Backend SQLite da Memória Compartilhada entre Agentes
+Permite que vários processos (workers Chainlit/uvicorn) na mesma máquina
+compartilhem a memória dos agentes através de um único arquivo SQLite
+"""
+
+import heapq
+import json
+import pickle
+import sqlite3
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Tuple, Set
+
+from utils.shared_memory_system import (
+    SharedMemoryBackend, MemoryEntry, tokenize_keywords, bm25_scores
+)
+
+# Logger
+try:
+    from utils.logger import get_logger
+except ImportError:
+    class SimpleLogger:
+        def __init__(self, name): self.name = name
+        def info(self, msg): print(f"[INFO] {msg}")
+        def warning(self, msg): print(f"[WARNING] {msg}")
+        def error(self, msg): print(f"[ERROR] {msg}")
+        def debug(self, msg): print(f"[DEBUG] {msg}")
+    def get_logger(name): return SimpleLogger(name)
+
+logger = get_logger(__name__)
+
+# Limite de parâmetros por IN (...) - abaixo do SQLITE_MAX_VARIABLE_NUMBER antigo
+SQL_BATCH_SIZE = 500
+
+
+class SQLiteSharedMemory(SharedMemoryBackend):
+    """
+    Memória compartilhada persistida num arquivo SQLite em modo WAL
+
+    Mesma API do SharedMemorySystem. Tags e palavras-chave (com frequência,
+    para o BM25) ficam em tabelas indexadas. Cada processo mantém um cache
+    LRU local que é descartado quando a versão global (memory_meta.version,
+    incrementada em toda escrita) muda - assim um worker enxerga o que os
+    outros gravaram sem reler valores que não mudaram.
+
+    Contadores de acesso são acumulados em memória e gravados em lote, sem
+    alterar a versão (não mudam valores).
+    """
+
+    backend_name = "sqlite"
+
+    def __init__(self, db_path: str = "memory/shared/shared_memory.db",
+                 max_memory_items: int = 10000, max_cache_size: int = 1000,
+                 access_flush_every: int = 100, cleanup_interval: float = 5.0,
+                 eviction_low_watermark: float = 0.9):
+        super().__init__(max_cache_size=max_cache_size)
+
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_memory_items = max_memory_items
+        self.access_flush_every = access_flush_every
+        self.cleanup_interval = cleanup_interval
+        self.eviction_low_watermark = eviction_low_watermark
+
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+
+        self._known_version = -1
+        self._pending_access: Dict[str, Tuple[int, float]] = {}
+        self._access_lock = threading.Lock()
+        self._last_cleanup = 0.0
+
+        self._init_database()
+
+        logger.info(f"🧠 SQLiteSharedMemory inicializado - {self._count_entries()} entradas ({self.db_path})")
+
+    # === CONEXÃO E ESQUEMA ===
+
+    def _connection(self) -> sqlite3.Connection:
+        """Conexão da thread atual (autocommit; transações explícitas)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def _write_transaction(self):
+        """Transação de escrita (BEGIN IMMEDIATE pega o lock de escrita de uma vez)"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _init_database(self):
+        """Cria tabelas e índices"""
+        with self._write_transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS memories (
+                    memory_key TEXT PRIMARY KEY,
+                    key TEXT NOT NULL,
+                    agent_owner TEXT NOT NULL,
+                    value BLOB,
+                    shared_with TEXT NOT NULL DEFAULT '[]',
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    access_count INTEGER NOT NULL DEFAULT 0,
+                    ttl_seconds INTEGER NOT NULL,
+                    is_high_value INTEGER NOT NULL DEFAULT 0,
+                    expires_at REAL NOT NULL,
+                    doc_length INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_memories_owner ON memories(agent_owner, key)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_memories_expires ON memories(is_high_value, expires_at)")
+
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS memory_tags (
+                    tag TEXT NOT NULL,
+                    memory_key TEXT NOT NULL,
+                    PRIMARY KEY (tag, memory_key)
+                ) WITHOUT ROWID
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_memory_tags_key ON memory_tags(memory_key)")
+
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS memory_keywords (
+                    keyword TEXT NOT NULL,
+                    memory_key TEXT NOT NULL,
+                    tf INTEGER NOT NULL,
+                    PRIMARY KEY (keyword, memory_key)
+                ) WITHOUT ROWID
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_memory_keywords_key ON memory_keywords(memory_key)")
+
+            # Contadores globais: versão, nº de entradas e estatísticas do BM25
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS memory_meta (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                )
+            """)
+            conn.executemany(
+                "INSERT OR IGNORE INTO memory_meta (name, value) VALUES (?, 0)",
+                [("version",), ("entries",), ("doc_count",), ("total_length",)]
+            )
+
+    def _read_meta(self, conn: sqlite3.Connection) -> Dict[str, int]:
+        return dict(conn.execute("SELECT name, value FROM memory_meta"))
+
+    def _count_entries(self) -> int:
+        return self._read_meta(self._connection())["entries"]
+
+    # === CACHE LOCAL COM INVALIDAÇÃO POR VERSÃO ===
+
+    def _sync_version(self):
+        """Descarta o cache local se outro processo (ou thread) gravou algo"""
+        row = self._connection().execute(
+            "SELECT value FROM memory_meta WHERE name = 'version'"
+        ).fetchone()
+        version = row[0] if row else 0
+
+        with self._cache_lock:
+            if version != self._known_version:
+                self.memory_cache.clear()
+                self._known_version = version
+
+    def _bump_version(self, conn: sqlite3.Connection):
+        """Incrementa a versão global dentro da transação de escrita"""
+        conn.execute("UPDATE memory_meta SET value = value + 1 WHERE name = 'version'")
+        version = conn.execute("SELECT value FROM memory_meta WHERE name = 'version'").fetchone()[0]
+
+        with self._cache_lock:
+            if version != self._known_version + 1:
+                # Houve escrita de outro processo no meio - cache local não vale mais
+                self.memory_cache.clear()
+            self._known_version = version
+
+    def _get_from_cache(self, key: Any) -> Tuple[bool, Any]:
+        self._sync_version()
+        return super()._get_from_cache(key)
+
+    # === CONTADORES DE ACESSO EM LOTE ===
+
+    def _record_access(self, memory_keys: List[str]):
+        now = time.time()
+        with self._access_lock:
+            for memory_key in memory_keys:
+                count, _ = self._pending_access.get(memory_key, (0, now))
+                self._pending_access[memory_key] = (count + 1, now)
+            should_flush = len(self._pending_access) >= self.access_flush_every
+
+        if should_flush:
+            self._flush_access()
+
+    def _flush_access(self, conn: Optional[sqlite3.Connection] = None):
+        """Grava contadores pendentes (dentro de uma transação, se recebida)"""
+        with self._access_lock:
+            pending, self._pending_access = self._pending_access, {}
+        if not pending:
+            return
+
+        rows = [(count, accessed_at, memory_key) for memory_key, (count, accessed_at) in pending.items()]
+        sql = ("UPDATE memories SET access_count = access_count + ?, "
+               "accessed_at = MAX(accessed_at, ?) WHERE memory_key = ?")
+
+        if conn is not None:
+            conn.executemany(sql, rows)
+        else:
+            with self._write_transaction() as write_conn:
+                write_conn.executemany(sql, rows)
+
+    # === API ===
+
+    def store_memory(self, agent_name: str, key: str, value: Any,
+                    share_with: Set[str] = None, ttl_seconds: int = 3600,
+                    is_high_value: bool = False, tags: Set[str] = None) -> str:
+        """
+        Armazena uma memória no arquivo compartilhado
+        Retorna chave única da memória
+        """
+        memory_key = self._generate_memory_key(agent_name, key, value)
+        now = time.time()
+
+        term_counts = Counter(tokenize_keywords(value)) if isinstance(value, str) else Counter()
+        doc_length = sum(term_counts.values())
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+        with self._write_transaction() as conn:
+            self._flush_access(conn)
+
+            row = conn.execute(
+                "SELECT shared_with FROM memories WHERE memory_key = ?", (memory_key,)
+            ).fetchone()
+
+            if row is not None:
+                # Já existe: só atualiza acesso e compartilhamento
+                conn.execute(
+                    "UPDATE memories SET access_count = access_count + 1, accessed_at = ? "
+                    "WHERE memory_key = ?", (now, memory_key)
+                )
+                shared = set(json.loads(row[0]))
+                if share_with and not set(share_with) <= shared:
+                    conn.execute(
+                        "UPDATE memories SET shared_with = ? WHERE memory_key = ?",
+                        (json.dumps(sorted(shared | set(share_with))), memory_key)
+                    )
+                    self._bump_version(conn)
+                return memory_key
+
+            conn.execute(
+                """
+                INSERT INTO memories (memory_key, key, agent_owner, value, shared_with, created_at,
+                                      accessed_at, access_count, ttl_seconds, is_high_value,
+                                      expires_at, doc_length)
+                VALUES (?, ?, ?, ?, ?, ?, ?, 0, ?, ?, ?, ?)
+                """,
+                (memory_key, key, agent_name, payload, json.dumps(sorted(share_with or ())),
+                 now, now, ttl_seconds, int(is_high_value), now + ttl_seconds, doc_length)
+            )
+            if tags:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO memory_tags (tag, memory_key) VALUES (?, ?)",
+                    [(tag, memory_key) for tag in tags]
+                )
+            if term_counts:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO memory_keywords (keyword, memory_key, tf) VALUES (?, ?, ?)",
+                    [(keyword, memory_key, tf) for keyword, tf in term_counts.items()]
+                )
+                conn.execute("UPDATE memory_meta SET value = value + 1 WHERE name = 'doc_count'")
+                conn.execute("UPDATE memory_meta SET value = value + ? WHERE name = 'total_length'",
+                             (doc_length,))
+            conn.execute("UPDATE memory_meta SET value = value + 1 WHERE name = 'entries'")
+            self._bump_version(conn)
+
+            entries = self._read_meta(conn)["entries"]
+
+        self._add_to_cache(("key", agent_name, key), (memory_key, value, now + ttl_seconds, is_high_value))
+        self._increment_stat("total_entries")
+
+        # Manutenção: expiração com intervalo mínimo e capacidade
+        if now - self._last_cleanup >= self.cleanup_interval:
+            self._last_cleanup = now
+            self._cleanup_expired()
+        if entries > self.max_memory_items:
+            self._enforce_capacity()
+
+        logger.debug(f"💾 Memória armazenada: {agent_name}.{key} -> {memory_key[:8]}...")
+
+        return memory_key
+
+    def retrieve_memory(self, agent_name: str, key: str) -> Optional[Any]:
+        """Recupera memória específica de um agente (versão mais recente da chave)"""
+        found, cached = self._get_from_cache(("key", agent_name, key))
+        if found:
+            memory_key, value, expires_at, is_high_value = cached
+            if is_high_value or expires_at >= time.time():
+                self._increment_stat("cache_hits")
+                self._record_access([memory_key])
+                return value
+
+        row = self._connection().execute(
+            """
+            SELECT memory_key, value, expires_at, is_high_value FROM memories
+            WHERE agent_owner = ? AND key = ?
+            ORDER BY created_at DESC LIMIT 1
+            """, (agent_name, key)
+        ).fetchone()
+
+        self._increment_stat("cache_misses")
+        if row is None:
+            return None
+
+        memory_key, payload, expires_at, is_high_value = row
+        if not is_high_value and expires_at < time.time():
+            return None
+
+        value = pickle.loads(payload)
+        self._add_to_cache(("key", agent_name, key), (memory_key, value, expires_at, bool(is_high_value)))
+        self._record_access([memory_key])
+        return value
+
+    def search_shared_memory(self, requesting_agent: str, query: str,
+                           tags: Set[str] = None, top_k: int = 10) -> List[Tuple[str, Any, str]]:
+        """
+        Busca memórias compartilhadas acessíveis ao agente
+        Retorna lista de (key, value, owner_agent) ordenada por BM25 + prior
+
+        Os valores (pickle) só são lidos para as top_k selecionadas.
+        """
+        cache_key = ("search", requesting_agent, query, frozenset(tags or ()), top_k)
+        found, cached = self._get_from_cache(cache_key)
+        if found and cached[0] >= time.time():
+            self._increment_stat("cache_hits")
+            return list(cached[1])
+
+        conn = self._connection()
+        keywords = sorted(set(tokenize_keywords(query)))
+
+        postings_by_term: Dict[str, Dict[str, int]] = {}
+        for batch in _batches(keywords):
+            for keyword, memory_key, tf in conn.execute(
+                f"SELECT keyword, memory_key, tf FROM memory_keywords "
+                f"WHERE keyword IN ({_placeholders(batch)})", batch
+            ):
+                postings_by_term.setdefault(keyword, {})[memory_key] = tf
+
+        candidate_keys = {key for postings in postings_by_term.values() for key in postings}
+        for batch in _batches(sorted(tags or ())):
+            candidate_keys.update(
+                memory_key for (memory_key,) in conn.execute(
+                    f"SELECT memory_key FROM memory_tags WHERE tag IN ({_placeholders(batch)})", batch
+                )
+            )
+
+        if not candidate_keys:
+            return []
+
+        # Metadados (sem o valor) dos candidatos
+        rows = []
+        for batch in _batches(sorted(candidate_keys)):
+            rows.extend(conn.execute(
+                f"""
+                SELECT memory_key, key, agent_owner, shared_with, created_at, accessed_at,
+                       access_count, ttl_seconds, is_high_value, expires_at, doc_length
+                FROM memories WHERE memory_key IN ({_placeholders(batch)})
+                """, batch
+            ))
+
+        meta = self._read_meta(conn)
+        num_docs = meta["doc_count"]
+        avg_length = meta["total_length"] / num_docs if num_docs else 0.0
+        text_scores = bm25_scores(postings_by_term, {row[0]: row[10] for row in rows},
+                                  num_docs, avg_length)
+
+        now = datetime.now()
+        now_ts = now.timestamp()
+        scored = []
+        for (memory_key, key, owner, shared_json, created_at, accessed_at,
+             access_count, ttl_seconds, is_high_value, expires_at, _) in rows:
+            shared_with = set(json.loads(shared_json))
+            if not (owner == requesting_agent or requesting_agent in shared_with or not shared_with):
+                continue
+            if not is_high_value and expires_at < now_ts:
+                continue
+
+            entry = MemoryEntry(
+                key=key, value=None, agent_owner=owner, shared_with=shared_with,
+                created_at=datetime.fromtimestamp(created_at),
+                accessed_at=datetime.fromtimestamp(accessed_at),
+                access_count=access_count, ttl_seconds=ttl_seconds,
+                is_high_value=bool(is_high_value)
+            )
+            score = text_scores.get(memory_key, 0.0) + self._memory_prior(entry, now)
+            scored.append((score, memory_key, key, owner, is_high_value, expires_at))
+
+        best = heapq.nlargest(top_k, scored, key=lambda item: (item[0], item[1]))
+        if not best:
+            return []
+
+        best_keys = [item[1] for item in best]
+        values = {
+            memory_key: pickle.loads(payload)
+            for memory_key, payload in conn.execute(
+                f"SELECT memory_key, value FROM memories WHERE memory_key IN ({_placeholders(best_keys)})",
+                best_keys
+            )
+        }
+
+        results = [(key, values[memory_key], owner)
+                   for _, memory_key, key, owner, _, _ in best if memory_key in values]
+
+        self._record_access(best_keys)
+        with self._stats_lock:
+            self.stats["reprocessing_prevented"] += 1
+            self.stats["tokens_saved"] += len(results) * 50  # Estimativa
+
+        # Válido até a próxima escrita global ou até a primeira expiração
+        valid_until = min((item[5] for item in best if not item[4]), default=float("inf"))
+        self._add_to_cache(cache_key, (valid_until, tuple(results)))
+
+        return results
+
+    def share_memory_with_agents(self, memory_key: str, agent_names: Set[str]):
+        """Compartilha memória existente com outros agentes"""
+        with self._write_transaction() as conn:
+            row = conn.execute(
+                "SELECT shared_with FROM memories WHERE memory_key = ?", (memory_key,)
+            ).fetchone()
+            if row is None:
+                return
+
+            shared = set(json.loads(row[0])) | set(agent_names)
+            conn.execute("UPDATE memories SET shared_with = ? WHERE memory_key = ?",
+                         (json.dumps(sorted(shared)), memory_key))
+            self._bump_version(conn)
+
+        logger.debug(f"📤 Memória {memory_key[:8]}... compartilhada com {agent_names}")
+
+    def get_agent_memory_summary(self, agent_name: str) -> Dict:
+        """Retorna resumo da memória de um agente"""
+        entries, high_value, shared, total_size, last_activity = self._connection().execute(
+            """
+            SELECT COUNT(*), SUM(is_high_value), SUM(shared_with != '[]'),
+                   SUM(LENGTH(value)), MAX(created_at)
+            FROM memories WHERE agent_owner = ?
+            """, (agent_name,)
+        ).fetchone()
+
+        if not entries:
+            return {"entries": 0, "specialties": [], "last_activity": None}
+
+        return {
+            "entries": entries,
+            "specialties": [],
+            "last_activity": datetime.fromtimestamp(last_activity),
+            "total_memory_size": total_size or 0,
+            "high_value_entries": high_value or 0,
+            "shared_memories": shared or 0
+        }
+
+    # === MANUTENÇÃO ===
+
+    def _cleanup_expired(self):
+        """Remove entradas comuns expiradas (consulta indexada por expires_at)"""
+        with self._write_transaction() as conn:
+            expired_keys = [
+                memory_key for (memory_key,) in conn.execute(
+                    "SELECT memory_key FROM memories WHERE is_high_value = 0 AND expires_at < ?",
+                    (time.time(),)
+                )
+            ]
+            removed = self._delete_entries(conn, expired_keys)
+
+        if removed:
+            self._increment_stat("expired_entries", removed)
+            logger.debug(f"🗑️ Removidas {removed} entradas expiradas")
+
+    def _enforce_capacity(self):
+        """Remove comuns antes de alto valor, menos acessadas primeiro, até a marca d'água"""
+        self._flush_access()
+        with self._write_transaction() as conn:
+            excess = self._read_meta(conn)["entries"] - int(self.max_memory_items * self.eviction_low_watermark)
+            if excess <= 0:
+                return
+
+            victims = [
+                memory_key for (memory_key,) in conn.execute(
+                    "SELECT memory_key FROM memories "
+                    "ORDER BY is_high_value, access_count, accessed_at LIMIT ?", (excess,)
+                )
+            ]
+            removed = self._delete_entries(conn, victims)
+
+        self._increment_stat("evicted_entries", removed)
+        logger.debug(f"🧹 Capacidade atingida - {removed} entradas removidas")
+
+    def _delete_entries(self, conn: sqlite3.Connection, memory_keys: List[str]) -> int:
+        """Apaga entradas, postings e atualiza contadores (dentro da transação)"""
+        if not memory_keys:
+            return 0
+
+        removed = 0
+        for batch in _batches(memory_keys):
+            marks = _placeholders(batch)
+            docs, total_length = conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(doc_length), 0) FROM memories "
+                f"WHERE doc_length > 0 AND memory_key IN ({marks})", batch
+            ).fetchone()
+            conn.execute(f"DELETE FROM memory_tags WHERE memory_key IN ({marks})", batch)
+            conn.execute(f"DELETE FROM memory_keywords WHERE memory_key IN ({marks})", batch)
+            batch_removed = conn.execute(f"DELETE FROM memories WHERE memory_key IN ({marks})", batch).rowcount
+
+            conn.execute("UPDATE memory_meta SET value = value - ? WHERE name = 'entries'", (batch_removed,))
+            conn.execute("UPDATE memory_meta SET value = value - ? WHERE name = 'doc_count'", (docs,))
+            conn.execute("UPDATE memory_meta SET value = value - ? WHERE name = 'total_length'", (total_length,))
+            removed += batch_removed
+
+        if removed:
+            self._bump_version(conn)
+        return removed
+
+    def get_system_stats(self) -> Dict:
+        """Retorna estatísticas do sistema"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        with self._cache_lock:
+            cache_size = len(self.memory_cache)
+
+        conn = self._connection()
+        meta = self._read_meta(conn)
+        registered_agents = conn.execute("SELECT COUNT(DISTINCT agent_owner) FROM memories").fetchone()[0]
+
+        lookups = stats["cache_hits"] + stats["cache_misses"]
+        return {
+            **stats,
+            "total_memory_entries": meta["entries"],
+            "cache_size": cache_size,
+            "registered_agents": registered_agents,
+            "backend": self.backend_name,
+            "db_path": str(self.db_path),
+            "data_version": meta["version"],
+            "max_memory_items": self.max_memory_items,
+            "cache_hit_rate": stats["cache_hits"] / lookups if lookups > 0 else 0
+        }
+
+    def shutdown(self):
+        """Grava contadores pendentes, faz checkpoint do WAL e fecha conexões"""
+        try:
+            self._flush_access()
+            self._connection().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        except Exception as e:
+            logger.error(f"Erro ao finalizar SQLiteSharedMemory: {e}")
+
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+        logger.info("💾 SQLiteSharedMemory finalizado")
+
+
+def _placeholders(items: List[Any]) -> str:
+    return ",".join("?" * len(items))
+
+
+def _batches(items: List[Any], size: int = SQL_BATCH_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
@@ -6,10 +6,17 @@ Seguindo especificações Gemini AI
 
 import json
 import hashlib
+import heapq
+import math
+import os
+import re
+import struct
 import time
 import threading
+import zlib
+from collections import Counter, OrderedDict
 from typing import Dict, List, Optional, Any, Tuple, Set
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field, asdict, replace
 from datetime import datetime, timedelta
 from pathlib import Path
 from abc import ABC, abstractmethod
@@ -29,6 +36,65 @@ except ImportError:
 
 logger = get_logger(__name__)
 
+# Parâmetros do ranking BM25 usado em search_shared_memory
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Pesos do prior somado ao BM25 (valor, recência e popularidade da memória)
+PRIOR_HIGH_VALUE = 0.5
+PRIOR_RECENCY = 0.5
+PRIOR_RECENCY_HALF_LIFE = 3600.0  # segundos
+PRIOR_ACCESS = 0.1
+
+# Persistência incremental (snapshot + write-ahead log)
+SNAPSHOT_FILE = "memory_snapshot.pkl"
+WAL_FILE = "memory_wal.log"
+SNAPSHOT_VERSION = 1
+
+
+# Stop words em português
+STOP_WORDS = {
+    "o", "a", "de", "da", "do", "que", "é", "para", "com", "em", 
+    "um", "uma", "por", "se", "no", "na", "os", "as", "dos", "das",
+    "este", "esta", "isso", "seu", "sua", "como", "mais"
+}
+
+
+def tokenize_keywords(text: str, min_length: int = 4) -> List[str]:
+    """Palavras-chave do texto, com repetição (para frequência do termo)"""
+    words = re.findall(r'\b\w+\b', text.lower())
+    return [
+        word for word in words 
+        if len(word) >= min_length and word not in STOP_WORDS
+    ]
+
+
+def bm25_scores(postings_by_term: Dict[str, Dict[str, int]], doc_lengths: Dict[str, int],
+                num_docs: int, avg_length: float) -> Dict[str, float]:
+    """
+    BM25 das memórias que contêm ao menos um termo da consulta
+    
+    Args:
+        postings_by_term: {termo: {memory_key: tf}}
+        doc_lengths: nº de termos de cada memory_key presente nas postings
+        num_docs / avg_length: estatísticas da coleção inteira
+    """
+    scores: Dict[str, float] = {}
+    if not num_docs or not avg_length:
+        return scores
+    
+    for postings in postings_by_term.values():
+        doc_freq = len(postings)
+        if not doc_freq:
+            continue
+        idf = math.log(1 + (num_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+        
+        for memory_key, tf in postings.items():
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_lengths.get(memory_key, 0) / avg_length)
+            scores[memory_key] = scores.get(memory_key, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+    
+    return scores
+
 
 @dataclass
 class MemoryEntry:
@@ -48,6 +114,11 @@ class MemoryEntry:
         """Verifica se a entrada expirou"""
         return datetime.now() - self.created_at > timedelta(seconds=self.ttl_seconds)
     
+    @property
+    def expires_at(self) -> float:
+        """Instante de expiração (timestamp), usado pela heap de expiração"""
+        return self.created_at.timestamp() + self.ttl_seconds
+    
     def update_access(self):
         """Atualiza estatísticas de acesso"""
         self.accessed_at = datetime.now()
@@ -69,92 +140,244 @@ class AgentMemoryIndex:
 
 
 class MemorySearchIndex:
-    """Índice de busca por tags e palavras-chave"""
+    """
+    Índice de busca por tags e palavras-chave
     
-    def __init__(self):
-        self.tag_index: Dict[str, Set[str]] = {}        # tag -> set(memory_keys)
-        self.keyword_index: Dict[str, Set[str]] = {}    # keyword -> set(memory_keys)
-        self.agent_index: Dict[str, Set[str]] = {}      # agent -> set(memory_keys)
-        self.lock = threading.Lock()
+    Usa lock striping: cada termo é protegido pela fatia de lock escolhida
+    pelo seu hash, então buscas e inserções em termos diferentes não disputam
+    o mesmo lock. As postings de palavras-chave guardam a frequência do termo
+    em cada memória, usada pelo ranking BM25.
+    """
+    
+    def __init__(self, num_stripes: int = 16):
+        self.tag_index: Dict[str, Set[str]] = {}                # tag -> set(memory_keys)
+        self.keyword_index: Dict[str, Dict[str, int]] = {}      # keyword -> {memory_key: tf}
+        self.agent_index: Dict[str, Set[str]] = {}              # agent -> set(memory_keys)
+        self._stripes = [threading.Lock() for _ in range(max(1, num_stripes))]
+        
+        # Estatísticas de documentos para o BM25
+        self.doc_lengths: Dict[str, int] = {}                   # memory_key -> nº de termos
+        self._total_length = 0
+        self._docs_lock = threading.Lock()
+    
+    def _stripe(self, term: str) -> threading.Lock:
+        """Lock responsável pelo termo"""
+        return self._stripes[zlib.crc32(term.encode('utf-8')) % len(self._stripes)]
+    
+    def _add_posting(self, index: Dict[str, Set[str]], term: str, memory_key: str):
+        """Adiciona memory_key à lista do termo sob o lock da fatia"""
+        with self._stripe(term):
+            index.setdefault(term, set()).add(memory_key)
+    
+    def _get_postings(self, index: Dict[str, Set[str]], term: str) -> Set[str]:
+        """Cópia da lista do termo sob o lock da fatia"""
+        with self._stripe(term):
+            return set(index.get(term, ()))
     
     def add_entry(self, memory_key: str, entry: MemoryEntry):
         """Adiciona entrada aos índices de busca"""
-        with self.lock:
-            # Índice de tags
-            for tag in entry.tags:
-                if tag not in self.tag_index:
-                    self.tag_index[tag] = set()
-                self.tag_index[tag].add(memory_key)
+        # Índice de tags
+        for tag in entry.tags:
+            self._add_posting(self.tag_index, tag, memory_key)
+        
+        # Índice de agente
+        self._add_posting(self.agent_index, entry.agent_owner, memory_key)
+        
+        # Índice de palavras-chave com frequência (extrair do valor se for string)
+        if isinstance(entry.value, str):
+            term_counts = Counter(self._tokenize(entry.value))
+            for keyword, tf in term_counts.items():
+                with self._stripe(keyword):
+                    self.keyword_index.setdefault(keyword, {})[memory_key] = tf
             
-            # Índice de agente
-            if entry.agent_owner not in self.agent_index:
-                self.agent_index[entry.agent_owner] = set()
-            self.agent_index[entry.agent_owner].add(memory_key)
+            doc_length = sum(term_counts.values())
+            with self._docs_lock:
+                self._total_length += doc_length - self.doc_lengths.get(memory_key, 0)
+                self.doc_lengths[memory_key] = doc_length
+    
+    def remove_entry(self, memory_key: str, entry: MemoryEntry):
+        """Remove a entrada de todas as postings (chaves ausentes são ignoradas)"""
+        for tag in entry.tags:
+            self._discard_posting(self.tag_index, tag, memory_key)
+        
+        self._discard_posting(self.agent_index, entry.agent_owner, memory_key)
+        
+        if isinstance(entry.value, str):
+            for keyword in self._extract_keywords(entry.value):
+                self._discard_posting(self.keyword_index, keyword, memory_key)
             
-            # Índice de palavras-chave (extrair do valor se for string)
-            if isinstance(entry.value, str):
-                keywords = self._extract_keywords(entry.value)
-                for keyword in keywords:
-                    if keyword not in self.keyword_index:
-                        self.keyword_index[keyword] = set()
-                    self.keyword_index[keyword].add(memory_key)
+            with self._docs_lock:
+                self._total_length -= self.doc_lengths.pop(memory_key, 0)
+    
+    def _discard_posting(self, index: Dict, term: str, memory_key: str):
+        """Tira a chave da lista do termo e apaga listas vazias"""
+        with self._stripe(term):
+            postings = index.get(term)
+            if postings is None:
+                return
+            if isinstance(postings, dict):
+                postings.pop(memory_key, None)
+            else:
+                postings.discard(memory_key)
+            if not postings:
+                del index[term]
+    
+    def keyword_postings(self, keyword: str) -> Dict[str, int]:
+        """Cópia das postings do termo: {memory_key: frequência}"""
+        with self._stripe(keyword):
+            return dict(self.keyword_index.get(keyword, {}))
+    
+    def bm25_scores(self, postings_by_term: Dict[str, Dict[str, int]]) -> Dict[str, float]:
+        """
+        Calcula BM25 das memórias que contêm ao menos um termo da consulta
+        
+        Args:
+            postings_by_term: {termo: {memory_key: tf}} (de keyword_postings)
+        """
+        with self._docs_lock:
+            num_docs = len(self.doc_lengths)
+            avg_length = (self._total_length / num_docs) if num_docs else 0.0
+            doc_lengths = {
+                memory_key: self.doc_lengths.get(memory_key, 0)
+                for postings in postings_by_term.values() for memory_key in postings
+            }
+        
+        return bm25_scores(postings_by_term, doc_lengths, num_docs, avg_length)
     
     def search_by_tag(self, tag: str) -> Set[str]:
         """Busca entradas por tag"""
-        with self.lock:
-            return self.tag_index.get(tag, set()).copy()
+        return self._get_postings(self.tag_index, tag)
     
     def search_by_keyword(self, keyword: str) -> Set[str]:
         """Busca entradas por palavra-chave"""
-        with self.lock:
-            return self.keyword_index.get(keyword.lower(), set()).copy()
+        return self._get_postings(self.keyword_index, keyword.lower())
     
     def search_by_agent(self, agent_name: str) -> Set[str]:
         """Busca entradas de um agente específico"""
-        with self.lock:
-            return self.agent_index.get(agent_name, set()).copy()
+        return self._get_postings(self.agent_index, agent_name)
+    
+    def _tokenize(self, text: str, min_length: int = 4) -> List[str]:
+        """Palavras-chave do texto, com repetição (para frequência do termo)"""
+        return tokenize_keywords(text, min_length)
     
     def _extract_keywords(self, text: str, min_length: int = 4) -> Set[str]:
         """Extrai palavras-chave relevantes de um texto"""
-        import re
-        
-        # Stop words em português
-        stop_words = {
-            "o", "a", "de", "da", "do", "que", "é", "para", "com", "em", 
-            "um", "uma", "por", "se", "no", "na", "os", "as", "dos", "das",
-            "este", "esta", "isso", "isso", "seu", "sua", "como", "mais"
-        }
-        
-        words = re.findall(r'\b\w+\b', text.lower())
-        keywords = {
-            word for word in words 
-            if len(word) >= min_length and word not in stop_words
-        }
-        
-        return keywords
+        return set(self._tokenize(text, min_length))
 
 
-class SharedMemorySystem:
+class MemoryWriteAheadLog:
     """
-    Sistema de Memória Compartilhada entre Agentes
-    Implementa especificações Gemini para evitar reprocessamento
+    Log append-only de operações da memória compartilhada
+    
+    Cada registro é um pickle precedido de cabeçalho (tamanho + crc32), então
+    um registro cortado por crash no meio da escrita é detectado e descartado
+    no replay. rotate() troca o arquivo ativo para a compactação: o anterior
+    vira "<nome>.old" até o snapshot novo estar gravado.
     """
     
-    def __init__(self, data_dir: str = "memory/shared", max_memory_items: int = 10000):
-        self.data_dir = Path(data_dir)
-        self.data_dir.mkdir(parents=True, exist_ok=True)
+    HEADER = struct.Struct("<II")
+    
+    def __init__(self, path: Path, fsync: bool = False):
+        self.path = Path(path)
+        self.old_path = self.path.with_name(self.path.name + ".old")
+        self.fsync = fsync
+        self.records_written = 0
+        self._lock = threading.Lock()
+        self._file = open(self.path, "ab")
+    
+    def append(self, payload: bytes):
+        """Grava um registro já serializado (O(1))"""
+        header = self.HEADER.pack(len(payload), zlib.crc32(payload))
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(header + payload)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self.records_written += 1
+    
+    def rotate(self) -> bool:
+        """Move o log ativo para .old e começa um vazio; False se já há um .old pendente"""
+        with self._lock:
+            if self._file is None or self.old_path.exists():
+                return False
+            self._file.close()
+            os.replace(self.path, self.old_path)
+            self._file = open(self.path, "ab")
+            self.records_written = 0
+            return True
+    
+    def discard_old(self):
+        """Remove o log rotacionado (já coberto pelo snapshot)"""
+        try:
+            self.old_path.unlink()
+        except FileNotFoundError:
+            pass
+    
+    def replay(self):
+        """Gera os registros válidos do .old (se houver) e do log ativo, em ordem"""
+        for path in (self.old_path, self.path):
+            if path.exists():
+                yield from self._read_records(path)
+    
+    def _read_records(self, path: Path):
+        with open(path, "rb") as f:
+            data = f.read()
         
-        self.max_memory_items = max_memory_items
-        self.memory_store: Dict[str, MemoryEntry] = {}
-        self.agent_indices: Dict[str, AgentMemoryIndex] = {}
-        self.search_index = MemorySearchIndex()
+        offset = 0
+        while offset + self.HEADER.size <= len(data):
+            length, checksum = self.HEADER.unpack_from(data, offset)
+            start = offset + self.HEADER.size
+            payload = data[start:start + length]
+            if len(payload) < length or zlib.crc32(payload) != checksum:
+                break
+            try:
+                yield pickle.loads(payload)
+            except Exception:
+                break
+            offset = start + length
         
+        if offset < len(data):
+            logger.warning(f"⚠️ WAL {path.name}: {len(data) - offset} bytes finais descartados (registro incompleto)")
+            if path == self.path:
+                with self._lock:
+                    self._file.truncate(offset)
+    
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class MemoryShard:
+    """Fatia do armazenamento de memórias com lock próprio"""
+    
+    def __init__(self):
+        self.entries: Dict[str, MemoryEntry] = {}
         self.lock = threading.Lock()
+
+
+class SharedMemoryBackend(ABC):
+    """
+    Interface comum dos backends de memória compartilhada
+    
+    Implementações: SharedMemorySystem (em processo, shards em RAM) e
+    SQLiteSharedMemory (arquivo SQLite compartilhado entre processos, em
+    utils/shared_memory_sqlite.py). A base cuida do cache LRU local, das
+    estatísticas e da checagem de processamento similar.
+    """
+    
+    backend_name = "base"
+    
+    def __init__(self, max_cache_size: int = 1000):
+        self._cache_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
         
-        # Cache em memória com LRU
-        self.memory_cache: Dict[str, Any] = {}
-        self.cache_access_order: List[str] = []
-        self.max_cache_size = 1000
+        # Cache em memória com LRU (OrderedDict: mais recente no fim)
+        self.memory_cache: "OrderedDict[Any, Any]" = OrderedDict()
+        self.max_cache_size = max_cache_size
         
         # Estatísticas
         self.stats = {
@@ -162,137 +385,53 @@ class SharedMemorySystem:
             "cache_hits": 0,
             "cache_misses": 0,
             "reprocessing_prevented": 0,
-            "tokens_saved": 0
+            "tokens_saved": 0,
+            "expired_entries": 0,
+            "evicted_entries": 0
         }
-        
-        # Carregar dados persistentes
-        self._load_persistent_data()
-        
-        logger.info(f"🧠 SharedMemorySystem inicializado - {len(self.memory_store)} entradas")
     
+    @abstractmethod
     def store_memory(self, agent_name: str, key: str, value: Any, 
                     share_with: Set[str] = None, ttl_seconds: int = 3600,
                     is_high_value: bool = False, tags: Set[str] = None) -> str:
-        """
-        Armazena uma memória no sistema compartilhado
-        Retorna chave única da memória
-        """
-        with self.lock:
-            # Gerar chave única
-            memory_key = self._generate_memory_key(agent_name, key, value)
-            
-            # Verificar se já existe (evitar duplicação)
-            if memory_key in self.memory_store:
-                existing = self.memory_store[memory_key]
-                existing.update_access()
-                if share_with:
-                    existing.shared_with.update(share_with)
-                return memory_key
-            
-            # Criar nova entrada
-            entry = MemoryEntry(
-                key=key,
-                value=value,
-                agent_owner=agent_name,
-                shared_with=share_with or set(),
-                created_at=datetime.now(),
-                accessed_at=datetime.now(),
-                ttl_seconds=ttl_seconds,
-                is_high_value=is_high_value,
-                tags=tags or set()
-            )
-            
-            # Armazenar
-            self.memory_store[memory_key] = entry
-            self.search_index.add_entry(memory_key, entry)
-            
-            # Atualizar índice do agente
-            if agent_name not in self.agent_indices:
-                self.agent_indices[agent_name] = AgentMemoryIndex(agent_name)
-            self.agent_indices[agent_name].add_entry(key, memory_key)
-            
-            # Adicionar ao cache
-            self._add_to_cache(memory_key, value)
-            
-            self.stats["total_entries"] += 1
-            
-            # Limpeza periódica
-            if len(self.memory_store) % 100 == 0:
-                self._cleanup_expired()
-            
-            logger.debug(f"💾 Memória armazenada: {agent_name}.{key} -> {memory_key[:8]}...")
-            
-            return memory_key
+        """Armazena uma memória e retorna sua chave única"""
+        pass
     
+    @abstractmethod
     def retrieve_memory(self, agent_name: str, key: str) -> Optional[Any]:
         """Recupera memória específica de um agente"""
-        with self.lock:
-            # Verificar índice do agente
-            if agent_name not in self.agent_indices:
-                return None
-            
-            agent_index = self.agent_indices[agent_name]
-            if key not in agent_index.entries:
-                return None
-            
-            memory_key = agent_index.entries[key]
-            return self._get_memory_by_key(memory_key)
+        pass
     
+    @abstractmethod
     def search_shared_memory(self, requesting_agent: str, query: str, 
-                           tags: Set[str] = None) -> List[Tuple[str, Any, str]]:
-        """
-        Busca memórias compartilhadas acessíveis ao agente
-        Retorna lista de (key, value, owner_agent)
-        """
-        with self.lock:
-            candidate_keys = set()
-            
-            # Buscar por tags
-            if tags:
-                for tag in tags:
-                    candidate_keys.update(self.search_index.search_by_tag(tag))
-            
-            # Buscar por palavras-chave na query
-            keywords = self.search_index._extract_keywords(query)
-            for keyword in keywords:
-                candidate_keys.update(self.search_index.search_by_keyword(keyword))
-            
-            # Filtrar por permissões de acesso
-            accessible_memories = []
-            for memory_key in candidate_keys:
-                if memory_key not in self.memory_store:
-                    continue
-                
-                entry = self.memory_store[memory_key]
-                
-                # Verificar se pode acessar
-                if (entry.agent_owner == requesting_agent or 
-                    requesting_agent in entry.shared_with or
-                    not entry.shared_with):  # Compartilhado com todos se empty
-                    
-                    # Verificar se não expirou
-                    if not entry.is_expired():
-                        entry.update_access()
-                        accessible_memories.append((
-                            entry.key, 
-                            entry.value, 
-                            entry.agent_owner
-                        ))
-            
-            # Ordenar por relevância (alto valor primeiro, depois por acessos)
-            accessible_memories.sort(
-                key=lambda x: (
-                    self.memory_store[self._find_memory_key(x[0], x[2])].is_high_value,
-                    self.memory_store[self._find_memory_key(x[0], x[2])].access_count
-                ), 
-                reverse=True
-            )
-            
-            if accessible_memories:
-                self.stats["reprocessing_prevented"] += 1
-                self.stats["tokens_saved"] += len(accessible_memories) * 50  # Estimativa
-            
-            return accessible_memories[:10]  # Limitar a 10 resultados
+                           tags: Set[str] = None, top_k: int = 10) -> List[Tuple[str, Any, str]]:
+        """Busca memórias acessíveis ao agente: [(key, value, owner_agent)]"""
+        pass
+    
+    @abstractmethod
+    def share_memory_with_agents(self, memory_key: str, agent_names: Set[str]):
+        """Compartilha memória existente com outros agentes"""
+        pass
+    
+    @abstractmethod
+    def get_agent_memory_summary(self, agent_name: str) -> Dict:
+        """Retorna resumo da memória de um agente"""
+        pass
+    
+    @abstractmethod
+    def get_system_stats(self) -> Dict:
+        """Retorna estatísticas do sistema"""
+        pass
+    
+    @abstractmethod
+    def shutdown(self):
+        """Persiste o que estiver pendente e libera recursos"""
+        pass
+    
+    def _increment_stat(self, stat_name: str, amount: int = 1):
+        """Atualiza estatística de forma thread-safe"""
+        with self._stats_lock:
+            self.stats[stat_name] += amount
     
     def check_similar_processing(self, agent_name: str, task_description: str, 
                                 context_hash: str = None) -> Optional[Any]:
@@ -307,11 +446,12 @@ class SharedMemorySystem:
             ).hexdigest()
         
         # Buscar em cache primeiro
-        if context_hash in self.memory_cache:
-            self.stats["cache_hits"] += 1
-            return self.memory_cache[context_hash]
+        found, cached = self._get_from_cache(context_hash)
+        if found:
+            self._increment_stat("cache_hits")
+            return cached
         
-        self.stats["cache_misses"] += 1
+        self._increment_stat("cache_misses")
         
         # Buscar por similaridade
         similar_memories = self.search_shared_memory(
@@ -328,185 +468,691 @@ class SharedMemorySystem:
         
         return None
     
+    def _memory_prior(self, entry: MemoryEntry, now: datetime) -> float:
+        """Prior de relevância independente da query: valor, recência e acessos"""
+        age_seconds = max(0.0, (now - entry.accessed_at).total_seconds())
+        recency = 0.5 ** (age_seconds / PRIOR_RECENCY_HALF_LIFE)
+        
+        return (
+            PRIOR_HIGH_VALUE * entry.is_high_value +
+            PRIOR_RECENCY * recency +
+            PRIOR_ACCESS * math.log1p(entry.access_count)
+        )
+    
+    def _generate_memory_key(self, agent_name: str, key: str, value: Any) -> str:
+        """Gera chave única para a memória"""
+        content_hash = hashlib.sha256(
+            f"{agent_name}:{key}:{str(value)[:1000]}".encode()
+        ).hexdigest()
+        return f"{agent_name}_{content_hash[:16]}"
+    
+    def _get_from_cache(self, key: str) -> Tuple[bool, Any]:
+        """Consulta o cache LRU (encontrado, valor)"""
+        with self._cache_lock:
+            if key in self.memory_cache:
+                self.memory_cache.move_to_end(key)
+                return True, self.memory_cache[key]
+        return False, None
+    
+    def _add_to_cache(self, key: str, value: Any):
+        """Adiciona item ao cache LRU (O(1))"""
+        with self._cache_lock:
+            self.memory_cache[key] = value
+            self.memory_cache.move_to_end(key)
+            
+            # Manter tamanho do cache
+            while len(self.memory_cache) > self.max_cache_size:
+                self.memory_cache.popitem(last=False)
+
+
+class SharedMemorySystem(SharedMemoryBackend):
+    """
+    Sistema de Memória Compartilhada entre Agentes
+    Implementa especificações Gemini para evitar reprocessamento
+    
+    O armazenamento é dividido em shards pelo hash da chave, cada um com seu
+    lock, para que agentes em paralelo não serializem num lock global.
+    
+    Persistência: cada store/share/expire é anexado a um WAL e, a cada
+    wal_compact_every registros (e no shutdown), o estado vivo é compactado
+    num snapshot. Na inicialização carrega o snapshot e reaplica o WAL.
+    
+    Manutenção: expirações saem de uma min-heap (custo proporcional ao que
+    expirou) e, acima de max_memory_items, as entradas de menor valor e menos
+    acessadas são removidas em lote até eviction_low_watermark da capacidade.
+    """
+    
+    backend_name = "memory"
+    
+    def __init__(self, data_dir: str = "memory/shared", max_memory_items: int = 10000,
+                 num_shards: int = 16, wal_compact_every: int = 5000,
+                 wal_fsync: bool = False, eviction_low_watermark: float = 0.9):
+        super().__init__(max_cache_size=1000)
+        
+        self.data_dir = Path(data_dir)
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.wal_compact_every = wal_compact_every
+        self._compact_lock = threading.Lock()
+        
+        self.max_memory_items = max_memory_items
+        self.eviction_low_watermark = eviction_low_watermark
+        self.num_shards = max(1, num_shards)
+        self.shards: List[MemoryShard] = [MemoryShard() for _ in range(self.num_shards)]
+        self.agent_indices: Dict[str, AgentMemoryIndex] = {}
+        self.search_index = MemorySearchIndex(num_stripes=self.num_shards)
+        
+        # Locks auxiliares (nunca segurados junto com o lock de um shard)
+        self._agents_lock = threading.Lock()
+        self._expiry_lock = threading.Lock()
+        self._eviction_lock = threading.Lock()
+        
+        # Min-heap (expires_at, memory_key) das entradas que podem expirar
+        self._expiry_heap: List[Tuple[float, str]] = []
+        
+        # Carregar dados persistentes (snapshot + replay do WAL)
+        self.wal = MemoryWriteAheadLog(self.data_dir / WAL_FILE, fsync=wal_fsync)
+        self._load_persistent_data()
+        
+        logger.info(f"🧠 SharedMemorySystem inicializado - {len(self.memory_store)} entradas "
+                    f"({self.num_shards} shards)")
+    
+    @property
+    def memory_store(self) -> Dict[str, MemoryEntry]:
+        """Visão consolidada (cópia) de todas as memórias dos shards"""
+        merged: Dict[str, MemoryEntry] = {}
+        for shard in self.shards:
+            with shard.lock:
+                merged.update(shard.entries)
+        return merged
+    
+    def _shard_for(self, memory_key: str) -> MemoryShard:
+        """Shard responsável pela chave de memória"""
+        return self.shards[zlib.crc32(memory_key.encode('utf-8')) % self.num_shards]
+    
+    def _count_entries(self) -> int:
+        """Total de entradas em todos os shards"""
+        return sum(len(shard.entries) for shard in self.shards)
+    
+    def store_memory(self, agent_name: str, key: str, value: Any, 
+                    share_with: Set[str] = None, ttl_seconds: int = 3600,
+                    is_high_value: bool = False, tags: Set[str] = None) -> str:
+        """
+        Armazena uma memória no sistema compartilhado
+        Retorna chave única da memória
+        """
+        # Gerar chave única
+        memory_key = self._generate_memory_key(agent_name, key, value)
+        shard = self._shard_for(memory_key)
+        
+        with shard.lock:
+            # Verificar se já existe (evitar duplicação)
+            existing = shard.entries.get(memory_key)
+            if existing is not None:
+                existing.update_access()
+                if share_with:
+                    existing.shared_with.update(share_with)
+            else:
+                # Criar nova entrada
+                entry = MemoryEntry(
+                    key=key,
+                    value=value,
+                    agent_owner=agent_name,
+                    shared_with=set(share_with or ()),
+                    created_at=datetime.now(),
+                    accessed_at=datetime.now(),
+                    ttl_seconds=ttl_seconds,
+                    is_high_value=is_high_value,
+                    tags=set(tags or ())
+                )
+                
+                # Armazenar
+                shard.entries[memory_key] = entry
+                
+                # Serializado ainda sob o lock: ninguém altera a entrada no meio
+                record = self._serialize_operation(("store", memory_key, entry))
+        
+        if existing is not None:
+            if share_with:
+                self._log_operation(self._serialize_operation(("share", memory_key, set(share_with))))
+            return memory_key
+        
+        self._log_operation(record)
+        
+        self.search_index.add_entry(memory_key, entry)
+        self._schedule_expiry(memory_key, entry)
+        
+        # Atualizar índice do agente
+        with self._agents_lock:
+            if agent_name not in self.agent_indices:
+                self.agent_indices[agent_name] = AgentMemoryIndex(agent_name)
+            self.agent_indices[agent_name].add_entry(key, memory_key)
+        
+        # Adicionar ao cache
+        self._add_to_cache(memory_key, value)
+        
+        self._increment_stat("total_entries")
+        
+        # Manutenção: O(expiradas) + remoção em lote quando passa da capacidade
+        self._cleanup_expired()
+        if self._count_entries() > self.max_memory_items:
+            self._enforce_capacity()
+        
+        logger.debug(f"💾 Memória armazenada: {agent_name}.{key} -> {memory_key[:8]}...")
+        
+        return memory_key
+    
+    def retrieve_memory(self, agent_name: str, key: str) -> Optional[Any]:
+        """Recupera memória específica de um agente"""
+        with self._agents_lock:
+            # Verificar índice do agente
+            agent_index = self.agent_indices.get(agent_name)
+            if agent_index is None or key not in agent_index.entries:
+                return None
+            
+            memory_key = agent_index.entries[key]
+        
+        return self._get_memory_by_key(memory_key)
+    
+    def search_shared_memory(self, requesting_agent: str, query: str, 
+                           tags: Set[str] = None, top_k: int = 10) -> List[Tuple[str, Any, str]]:
+        """
+        Busca memórias compartilhadas acessíveis ao agente
+        Retorna lista de (key, value, owner_agent) ordenada por relevância
+        
+        Relevância = BM25 da query sobre o texto da memória + prior de
+        valor/recência/acessos (_memory_prior). Só as top_k são mantidas
+        (heap limitado, O(n log k)).
+        """
+        candidate_keys = set()
+        
+        # Buscar por tags
+        if tags:
+            for tag in tags:
+                candidate_keys.update(self.search_index.search_by_tag(tag))
+        
+        # Buscar por palavras-chave na query (com frequências para o BM25)
+        keywords = self.search_index._extract_keywords(query)
+        postings_by_term = {
+            keyword: self.search_index.keyword_postings(keyword) for keyword in keywords
+        }
+        for postings in postings_by_term.values():
+            candidate_keys.update(postings)
+        
+        if not candidate_keys:
+            return []
+        
+        text_scores = self.search_index.bm25_scores(postings_by_term)
+        
+        # Agrupar candidatos por shard para pegar cada lock uma vez só
+        keys_by_shard: Dict[int, List[str]] = {}
+        for memory_key in candidate_keys:
+            shard_id = zlib.crc32(memory_key.encode('utf-8')) % self.num_shards
+            keys_by_shard.setdefault(shard_id, []).append(memory_key)
+        
+        # Filtrar por permissões de acesso e pontuar
+        now = datetime.now()
+        scored: List[Tuple[float, str, MemoryEntry]] = []
+        for shard_id, memory_keys in keys_by_shard.items():
+            shard = self.shards[shard_id]
+            with shard.lock:
+                for memory_key in memory_keys:
+                    entry = shard.entries.get(memory_key)
+                    if entry is None:
+                        continue
+                    
+                    # Verificar se pode acessar
+                    if (entry.agent_owner == requesting_agent or 
+                        requesting_agent in entry.shared_with or
+                        not entry.shared_with):  # Compartilhado com todos se empty
+                        
+                        # Verificar se não expirou
+                        if not entry.is_expired():
+                            score = text_scores.get(memory_key, 0.0) + self._memory_prior(entry, now)
+                            scored.append((score, memory_key, entry))
+        
+        best = heapq.nlargest(top_k, scored, key=lambda item: (item[0], item[1]))
+        
+        # Só as memórias efetivamente retornadas contam como acesso
+        accessible_memories = []
+        for _, memory_key, entry in best:
+            with self._shard_for(memory_key).lock:
+                entry.update_access()
+            accessible_memories.append((entry.key, entry.value, entry.agent_owner))
+        
+        if accessible_memories:
+            with self._stats_lock:
+                self.stats["reprocessing_prevented"] += 1
+                self.stats["tokens_saved"] += len(accessible_memories) * 50  # Estimativa
+        
+        return accessible_memories
+    
     def share_memory_with_agents(self, memory_key: str, agent_names: Set[str]):
         """Compartilha memória existente com outros agentes"""
-        with self.lock:
-            if memory_key in self.memory_store:
-                entry = self.memory_store[memory_key]
+        shard = self._shard_for(memory_key)
+        with shard.lock:
+            entry = shard.entries.get(memory_key)
+            if entry is not None:
                 entry.shared_with.update(agent_names)
-                logger.debug(f"📤 Memória {memory_key[:8]}... compartilhada com {agent_names}")
+        
+        if entry is not None:
+            self._log_operation(self._serialize_operation(("share", memory_key, set(agent_names))))
+            logger.debug(f"📤 Memória {memory_key[:8]}... compartilhada com {agent_names}")
     
     def get_agent_memory_summary(self, agent_name: str) -> Dict:
         """Retorna resumo da memória de um agente"""
-        with self.lock:
+        with self._agents_lock:
             if agent_name not in self.agent_indices:
                 return {"entries": 0, "specialties": [], "last_activity": None}
             
             agent_index = self.agent_indices[agent_name]
-            
-            # Estatísticas das memórias do agente
-            agent_memories = self.search_index.search_by_agent(agent_name)
-            total_size = 0
-            high_value_count = 0
-            
-            for memory_key in agent_memories:
-                if memory_key in self.memory_store:
-                    entry = self.memory_store[memory_key]
-                    if entry.is_high_value:
-                        high_value_count += 1
-                    total_size += len(str(entry.value))
-            
-            return {
-                "entries": len(agent_index.entries),
-                "specialties": list(agent_index.specialties),
-                "last_activity": agent_index.last_activity,
-                "total_memory_size": total_size,
-                "high_value_entries": high_value_count,
-                "shared_memories": len([
-                    k for k in agent_memories 
-                    if k in self.memory_store and self.memory_store[k].shared_with
-                ])
-            }
-    
-    def _generate_memory_key(self, agent_name: str, key: str, value: Any) -> str:
-        """Gera chave única para a memória"""
-        content_hash = hashlib.sha256(
-            f"{agent_name}:{key}:{str(value)[:1000]}".encode()
-        ).hexdigest()
-        return f"{agent_name}_{content_hash[:16]}"
+            entries_count = len(agent_index.entries)
+            specialties = list(agent_index.specialties)
+            last_activity = agent_index.last_activity
+        
+        # Estatísticas das memórias do agente
+        agent_memories = self.search_index.search_by_agent(agent_name)
+        total_size = 0
+        high_value_count = 0
+        shared_count = 0
+        
+        for memory_key in agent_memories:
+            shard = self._shard_for(memory_key)
+            with shard.lock:
+                entry = shard.entries.get(memory_key)
+                if entry is None:
+                    continue
+                if entry.is_high_value:
+                    high_value_count += 1
+                if entry.shared_with:
+                    shared_count += 1
+                total_size += len(str(entry.value))
+        
+        return {
+            "entries": entries_count,
+            "specialties": specialties,
+            "last_activity": last_activity,
+            "total_memory_size": total_size,
+            "high_value_entries": high_value_count,
+            "shared_memories": shared_count
+        }
     
     def _get_memory_by_key(self, memory_key: str) -> Optional[Any]:
         """Obtém memória pela chave, verificando cache primeiro"""
-        # Verificar cache
-        if memory_key in self.memory_cache:
-            self.stats["cache_hits"] += 1
-            return self.memory_cache[memory_key]
+        # Verificar cache (o acesso conta para a política de remoção)
+        found, cached = self._get_from_cache(memory_key)
+        if found:
+            self._increment_stat("cache_hits")
+            shard = self._shard_for(memory_key)
+            with shard.lock:
+                entry = shard.entries.get(memory_key)
+                if entry is not None:
+                    entry.update_access()
+            return cached
         
         # Verificar store
-        if memory_key in self.memory_store:
-            entry = self.memory_store[memory_key]
-            if not entry.is_expired():
+        shard = self._shard_for(memory_key)
+        with shard.lock:
+            entry = shard.entries.get(memory_key)
+            if entry is not None and not entry.is_expired():
                 entry.update_access()
-                self._add_to_cache(memory_key, entry.value)
-                return entry.value
+                value = entry.value
+            else:
+                entry = None
         
-        self.stats["cache_misses"] += 1
+        if entry is not None:
+            self._add_to_cache(memory_key, value)
+            return value
+        
+        self._increment_stat("cache_misses")
         return None
     
     def _find_memory_key(self, key: str, agent_name: str) -> Optional[str]:
         """Encontra chave de memória baseada em key e agente"""
-        if agent_name in self.agent_indices:
-            return self.agent_indices[agent_name].entries.get(key)
+        with self._agents_lock:
+            if agent_name in self.agent_indices:
+                return self.agent_indices[agent_name].entries.get(key)
         return None
     
-    def _add_to_cache(self, key: str, value: Any):
-        """Adiciona item ao cache LRU"""
-        # Remover se já existe
-        if key in self.memory_cache:
-            self.cache_access_order.remove(key)
-        
-        # Adicionar no final
-        self.memory_cache[key] = value
-        self.cache_access_order.append(key)
-        
-        # Manter tamanho do cache
-        while len(self.memory_cache) > self.max_cache_size:
-            oldest_key = self.cache_access_order.pop(0)
-            del self.memory_cache[oldest_key]
+    def _schedule_expiry(self, memory_key: str, entry: MemoryEntry):
+        """Registra a entrada na heap de expiração (alto valor nunca expira)"""
+        if entry.is_high_value:
+            return
+        with self._expiry_lock:
+            heapq.heappush(self._expiry_heap, (entry.expires_at, memory_key))
     
     def _cleanup_expired(self):
-        """Remove entradas expiradas"""
+        """Remove entradas expiradas olhando só o topo da heap"""
+        now = time.time()
+        due_keys = []
+        
+        with self._expiry_lock:
+            while self._expiry_heap and self._expiry_heap[0][0] < now:
+                due_keys.append(heapq.heappop(self._expiry_heap)[1])
+        
+        if not due_keys:
+            return
+        
+        # Itens da heap podem estar obsoletos (entrada já removida ou recriada)
         expired_keys = []
+        for memory_key in due_keys:
+            shard = self._shard_for(memory_key)
+            with shard.lock:
+                entry = shard.entries.get(memory_key)
+                if entry is not None and not entry.is_high_value and entry.is_expired():
+                    expired_keys.append(memory_key)
         
-        for memory_key, entry in self.memory_store.items():
-            if entry.is_expired() and not entry.is_high_value:
-                expired_keys.append(memory_key)
+        removed = self._remove_entries(expired_keys)
+        if removed:
+            self._increment_stat("expired_entries", removed)
+            logger.debug(f"🗑️ Removidas {removed} entradas expiradas")
+    
+    def _enforce_capacity(self):
+        """
+        Remove entradas até eviction_low_watermark × max_memory_items
         
-        for key in expired_keys:
-            del self.memory_store[key]
-            if key in self.memory_cache:
-                del self.memory_cache[key]
-                if key in self.cache_access_order:
-                    self.cache_access_order.remove(key)
+        Ordem de remoção: comuns antes de alto valor, menos acessadas e com
+        acesso mais antigo primeiro. Remover em lote abaixo da capacidade
+        amortiza a varredura entre os próximos inserts.
+        """
+        if not self._eviction_lock.acquire(blocking=False):
+            return  # Outra thread já está removendo
         
-        if expired_keys:
-            logger.debug(f"🗑️ Removidas {len(expired_keys)} entradas expiradas")
+        try:
+            excess = self._count_entries() - int(self.max_memory_items * self.eviction_low_watermark)
+            if excess <= 0:
+                return
+            
+            candidates = []
+            for shard in self.shards:
+                with shard.lock:
+                    candidates.extend(
+                        (entry.is_high_value, entry.access_count, entry.accessed_at, memory_key)
+                        for memory_key, entry in shard.entries.items()
+                    )
+            
+            victims = [item[3] for item in heapq.nsmallest(excess, candidates)]
+            removed = self._remove_entries(victims)
+            self._increment_stat("evicted_entries", removed)
+            logger.debug(f"🧹 Capacidade atingida - {removed} entradas removidas")
+        finally:
+            self._eviction_lock.release()
     
-    def _save_persistent_data(self):
-        """Salva dados importantes em disco"""
+    def _remove_entries(self, memory_keys: List[str], log: bool = True) -> int:
+        """Remove entradas do shard, índices, cache e índice do agente"""
+        removed_entries = []
+        for memory_key in memory_keys:
+            shard = self._shard_for(memory_key)
+            with shard.lock:
+                entry = shard.entries.pop(memory_key, None)
+            if entry is not None:
+                removed_entries.append((memory_key, entry))
+        
+        if not removed_entries:
+            return 0
+        
+        for memory_key, entry in removed_entries:
+            self.search_index.remove_entry(memory_key, entry)
+        
+        with self._cache_lock:
+            for memory_key, _ in removed_entries:
+                self.memory_cache.pop(memory_key, None)
+        
+        with self._agents_lock:
+            for memory_key, entry in removed_entries:
+                agent_index = self.agent_indices.get(entry.agent_owner)
+                if agent_index is not None and agent_index.entries.get(entry.key) == memory_key:
+                    del agent_index.entries[entry.key]
+        
+        if log:
+            self._log_operation(self._serialize_operation(
+                ("expire", [memory_key for memory_key, _ in removed_entries])
+            ))
+        
+        return len(removed_entries)
+    
+    def _serialize_operation(self, operation: Tuple) -> Optional[bytes]:
+        """Serializa uma operação para o WAL (None se o valor não é serializável)"""
         try:
-            # Salvar entradas de alto valor
-            high_value_entries = {
-                k: v for k, v in self.memory_store.items() 
-                if v.is_high_value and not v.is_expired()
-            }
+            return pickle.dumps(operation, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            logger.warning(f"Operação '{operation[0]}' não persistida no WAL: {e}")
+            return None
+    
+    def _log_operation(self, record: Optional[bytes]):
+        """Anexa operação ao WAL e dispara compactação quando o log cresce"""
+        if record is None:
+            return
+        
+        self.wal.append(record)
+        
+        if self.wal_compact_every and self.wal.records_written >= self.wal_compact_every:
+            if self._compact_lock.acquire(blocking=False):
+                threading.Thread(target=self._compact_in_background, daemon=True).start()
+    
+    def _compact_in_background(self):
+        try:
+            self._save_persistent_data(locked=True)
+        finally:
+            self._compact_lock.release()
+    
+    def _apply_operation(self, operation: Tuple):
+        """Reaplica uma operação do WAL (idempotente)"""
+        op = operation[0]
+        
+        if op == "store":
+            _, memory_key, entry = operation
+            self._restore_entry(memory_key, entry)
+        
+        elif op == "share":
+            _, memory_key, agent_names = operation
+            shard = self._shard_for(memory_key)
+            with shard.lock:
+                entry = shard.entries.get(memory_key)
+                if entry is not None:
+                    entry.shared_with.update(agent_names)
+        
+        elif op == "expire":
+            self._remove_entries(operation[1], log=False)
+    
+    def _restore_entry(self, memory_key: str, entry: MemoryEntry):
+        """Coloca uma entrada persistida no shard e nos índices"""
+        shard = self._shard_for(memory_key)
+        with shard.lock:
+            shard.entries[memory_key] = entry
+        
+        with self._agents_lock:
+            agent_index = self.agent_indices.get(entry.agent_owner)
+            if agent_index is None:
+                agent_index = self.agent_indices[entry.agent_owner] = AgentMemoryIndex(entry.agent_owner)
+            agent_index.entries[entry.key] = memory_key
+            agent_index.last_activity = max(agent_index.last_activity, entry.created_at)
+    
+    def _copy_live_entries(self) -> Dict[str, MemoryEntry]:
+        """
+        Cópia das entradas vivas, tirada sob o lock de cada shard
+        
+        share() e update_access() mutam as entradas no lugar; copiar os
+        sets e contadores sob o lock evita que o pickle leia uma entrada
+        no meio de uma mutação. Entram as de alto valor (que nunca
+        expiram) e as demais ainda dentro do TTL - o WAL coberto pelo
+        snapshot é descartado, então o snapshot precisa de todas elas.
+        """
+        live_entries: Dict[str, MemoryEntry] = {}
+        for shard in self.shards:
+            with shard.lock:
+                for memory_key, entry in shard.entries.items():
+                    if entry.is_high_value or not entry.is_expired():
+                        live_entries[memory_key] = replace(
+                            entry,
+                            shared_with=set(entry.shared_with),
+                            tags=set(entry.tags)
+                        )
+        return live_entries
+    
+    @staticmethod
+    def _picklable_entries(entries: Dict[str, MemoryEntry]) -> Dict[str, MemoryEntry]:
+        """Entradas que o pickle aceita (mesmo critério do _serialize_operation)"""
+        picklable = {}
+        for memory_key, entry in entries.items():
+            try:
+                pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL)
+            except Exception:
+                continue
+            picklable[memory_key] = entry
+        logger.warning(f"⚠️ Snapshot sem {len(entries) - len(picklable)} entradas não serializáveis")
+        return picklable
+    
+    @staticmethod
+    def _write_snapshot(path: Path, snapshot: Dict[str, Any]):
+        with open(path, "wb") as f:
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+    
+    def _save_persistent_data(self, locked: bool = False):
+        """
+        Compacta o estado vivo num snapshot e descarta o WAL já coberto
+        
+        O WAL é rotacionado antes de copiar o estado: tudo que chegar durante
+        a cópia vai para o log novo, e o replay (idempotente) sobre o snapshot
+        reconstrói o mesmo estado. Até o snapshot ser gravado o log antigo
+        fica em .old e continua valendo no replay.
+        """
+        if not locked:
+            with self._compact_lock:
+                return self._save_persistent_data(locked=True)
+        
+        try:
+            if not self.wal.rotate():
+                # Compactação anterior interrompida: o .old ainda não foi absorvido
+                logger.warning("⚠️ WAL .old pendente - compactando com o log ativo preservado")
             
-            with open(self.data_dir / "high_value_memories.pkl", "wb") as f:
-                pickle.dump(high_value_entries, f)
+            live_entries = self._copy_live_entries()
             
-            # Salvar índices de agentes
-            with open(self.data_dir / "agent_indices.json", "w") as f:
+            with self._agents_lock:
                 serializable_indices = {}
                 for agent_name, index in self.agent_indices.items():
                     serializable_indices[agent_name] = {
-                        "entries": index.entries,
+                        "entries": dict(index.entries),
                         "specialties": list(index.specialties),
                         "last_activity": index.last_activity.isoformat()
                     }
-                json.dump(serializable_indices, f, indent=2)
+            
+            snapshot = {
+                "version": SNAPSHOT_VERSION,
+                "entries": live_entries,
+                "agent_indices": serializable_indices
+            }
+            
+            # Escrita atômica: arquivo temporário + rename
+            snapshot_file = self.data_dir / SNAPSHOT_FILE
+            tmp_file = snapshot_file.with_name(snapshot_file.name + ".tmp")
+            try:
+                self._write_snapshot(tmp_file, snapshot)
+            except Exception:
+                # Valor não serializável (já ficou fora do WAL): segue só em memória
+                snapshot["entries"] = live_entries = self._picklable_entries(live_entries)
+                self._write_snapshot(tmp_file, snapshot)
+            os.replace(tmp_file, snapshot_file)
+            
+            self.wal.discard_old()
+            logger.debug(f"💾 Snapshot da memória compartilhada: {len(live_entries)} entradas")
                 
         except Exception as e:
             logger.error(f"Erro ao salvar dados persistentes: {e}")
     
     def _load_persistent_data(self):
-        """Carrega dados persistentes do disco"""
+        """Carrega snapshot (ou arquivos do formato antigo) e reaplica o WAL"""
         try:
-            # Carregar entradas de alto valor
-            high_value_file = self.data_dir / "high_value_memories.pkl"
-            if high_value_file.exists():
-                with open(high_value_file, "rb") as f:
-                    high_value_entries = pickle.load(f)
-                    self.memory_store.update(high_value_entries)
-                    
-                    # Reconstruir índices de busca
-                    for memory_key, entry in high_value_entries.items():
-                        self.search_index.add_entry(memory_key, entry)
+            snapshot_file = self.data_dir / SNAPSHOT_FILE
+            if snapshot_file.exists():
+                with open(snapshot_file, "rb") as f:
+                    snapshot = pickle.load(f)
+                entries = snapshot["entries"]
+                indices_data = snapshot["agent_indices"]
+            else:
+                entries, indices_data = self._load_legacy_files()
             
-            # Carregar índices de agentes
-            indices_file = self.data_dir / "agent_indices.json"
-            if indices_file.exists():
-                with open(indices_file, "r") as f:
-                    indices_data = json.load(f)
-                    
-                    for agent_name, data in indices_data.items():
-                        self.agent_indices[agent_name] = AgentMemoryIndex(
-                            agent_name=agent_name,
-                            entries=data["entries"],
-                            specialties=set(data["specialties"]),
-                            last_activity=datetime.fromisoformat(data["last_activity"])
-                        )
-                        
+            for memory_key, entry in entries.items():
+                shard = self._shard_for(memory_key)
+                with shard.lock:
+                    shard.entries[memory_key] = entry
+            
+            with self._agents_lock:
+                for agent_name, data in indices_data.items():
+                    self.agent_indices[agent_name] = AgentMemoryIndex(
+                        agent_name=agent_name,
+                        entries=data["entries"],
+                        specialties=set(data["specialties"]),
+                        last_activity=datetime.fromisoformat(data["last_activity"])
+                    )
+        
         except Exception as e:
             logger.warning(f"Não foi possível carregar dados persistentes: {e}")
+        
+        replayed = 0
+        try:
+            for operation in self.wal.replay():
+                self._apply_operation(operation)
+                replayed += 1
+        except Exception as e:
+            logger.warning(f"Replay do WAL interrompido após {replayed} operações: {e}")
+        
+        # Reconstruir índices de busca e heap de expiração
+        for memory_key, entry in self.memory_store.items():
+            self.search_index.add_entry(memory_key, entry)
+            self._schedule_expiry(memory_key, entry)
+        
+        # Entradas que expiraram com o processo parado, e capacidade
+        self._cleanup_expired()
+        if self._count_entries() > self.max_memory_items:
+            self._enforce_capacity()
+        
+        if replayed:
+            logger.info(f"🔁 WAL reaplicado: {replayed} operações")
+    
+    def _load_legacy_files(self) -> Tuple[Dict[str, MemoryEntry], Dict[str, Dict]]:
+        """Lê high_value_memories.pkl + agent_indices.json (formato anterior ao WAL)"""
+        entries: Dict[str, MemoryEntry] = {}
+        indices_data: Dict[str, Dict] = {}
+        
+        high_value_file = self.data_dir / "high_value_memories.pkl"
+        if high_value_file.exists():
+            with open(high_value_file, "rb") as f:
+                entries = pickle.load(f)
+        
+        indices_file = self.data_dir / "agent_indices.json"
+        if indices_file.exists():
+            with open(indices_file, "r") as f:
+                indices_data = json.load(f)
+        
+        return entries, indices_data
     
     def get_system_stats(self) -> Dict:
         """Retorna estatísticas do sistema"""
-        with self.lock:
-            return {
-                **self.stats,
-                "total_memory_entries": len(self.memory_store),
-                "cache_size": len(self.memory_cache),
-                "registered_agents": len(self.agent_indices),
-                "cache_hit_rate": (
-                    self.stats["cache_hits"] / 
-                    (self.stats["cache_hits"] + self.stats["cache_misses"])
-                    if (self.stats["cache_hits"] + self.stats["cache_misses"]) > 0 else 0
-                )
-            }
+        with self._stats_lock:
+            stats = dict(self.stats)
+        with self._cache_lock:
+            cache_size = len(self.memory_cache)
+        with self._agents_lock:
+            registered_agents = len(self.agent_indices)
+        
+        lookups = stats["cache_hits"] + stats["cache_misses"]
+        return {
+            **stats,
+            "total_memory_entries": self._count_entries(),
+            "cache_size": cache_size,
+            "registered_agents": registered_agents,
+            "backend": self.backend_name,
+            "num_shards": self.num_shards,
+            "max_memory_items": self.max_memory_items,
+            "cache_hit_rate": stats["cache_hits"] / lookups if lookups > 0 else 0
+        }
     
     def shutdown(self):
         """Salva dados e finaliza sistema"""
         self._save_persistent_data()
+        self.wal.close()
         logger.info("💾 SharedMemorySystem finalizado - dados salvos")
 
 
@@ -515,18 +1161,86 @@ _shared_memory_instance = None
 _shared_memory_lock = threading.Lock()
 
 
-def get_shared_memory_system() -> SharedMemorySystem:
-    """Retorna instância singleton do SharedMemorySystem"""
+def get_shared_memory_system() -> SharedMemoryBackend:
+    """
+    Retorna instância singleton da memória compartilhada
+    
+    O backend vem de SHARED_MEMORY_BACKEND: "memory" (padrão, só este
+    processo) ou "sqlite" (arquivo SHARED_MEMORY_DB compartilhado entre os
+    workers da mesma máquina).
+    """
     global _shared_memory_instance
     
     with _shared_memory_lock:
         if _shared_memory_instance is None:
-            _shared_memory_instance = SharedMemorySystem()
+            backend = os.getenv("SHARED_MEMORY_BACKEND", "memory").lower()
+            if backend == "sqlite":
+                from utils.shared_memory_sqlite import SQLiteSharedMemory
+                _shared_memory_instance = SQLiteSharedMemory(
+                    db_path=os.getenv("SHARED_MEMORY_DB", "memory/shared/shared_memory.db")
+                )
+            else:
+                _shared_memory_instance = SharedMemorySystem()
         return _shared_memory_instance
 
 
+def run_contention_benchmark(thread_counts: Tuple[int, ...] = (1, 2, 4, 8),
+                             ops_per_thread: int = 2000,
+                             num_shards: int = 16) -> Dict[int, float]:
+    """
+    Benchmark de contenção: mede throughput (ops/s) com N threads concorrentes
+    
+    Cada operação é um store_memory seguido de retrieve_memory; a cada dez
+    operações também roda um search_shared_memory. Compare num_shards=1
+    (equivalente ao lock global) com o valor padrão.
+    """
+    import tempfile
+    
+    results = {}
+    for num_threads in thread_counts:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            memory_system = SharedMemorySystem(data_dir=tmpdir, num_shards=num_shards)
+            barrier = threading.Barrier(num_threads + 1)
+            
+            def worker(worker_id: int):
+                agent_name = f"agent_{worker_id}"
+                barrier.wait()
+                for i in range(ops_per_thread):
+                    memory_system.store_memory(
+                        agent_name, f"key_{i}", f"relatorio {agent_name} item{i}",
+                        tags={"research"}
+                    )
+                    memory_system.retrieve_memory(agent_name, f"key_{i}")
+                    if i % 10 == 0:
+                        memory_system.search_shared_memory(agent_name, f"item{i}")
+            
+            threads = [threading.Thread(target=worker, args=(n,)) for n in range(num_threads)]
+            for thread in threads:
+                thread.start()
+            
+            barrier.wait()
+            start = time.perf_counter()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+            
+            results[num_threads] = (num_threads * ops_per_thread) / elapsed if elapsed else 0.0
+    
+    return results
+
+
 # Teste do sistema
 if __name__ == "__main__":
+    import sys
+    
+    if "--benchmark" in sys.argv:
+        print("🏁 BENCHMARK DE CONTENÇÃO (ops/s)")
+        for shards in (1, 16):
+            throughput = run_contention_benchmark(num_shards=shards)
+            linha = ", ".join(f"{t} threads: {ops:,.0f}" for t, ops in throughput.items())
+            print(f"   {shards:>2} shard(s) -> {linha}")
+        sys.exit(0)
+    
     print("🧪 TESTE DO SISTEMA DE MEMÓRIA COMPARTILHADA")
     print("=" * 60)
     